@@ -2,6 +2,10 @@
 
 Comparison of multiprocessing performance as data scales.
 
+Each ensemble is fitted sequentially, with all cores, and with all cores and
+a thread budget (``threads='auto'``) that splits the cores between outer
+workers and inner BLAS / estimator threads to avoid oversubscription.
+
 Example Output
 --------------
 
@@ -68,6 +72,7 @@ from time import perf_counter
 PLOT = True
 ENS = [SuperLearner, BlendEnsemble]
 KWG = [{'folds': 2}, {}]
+THREADS = [None, 'auto']
 MAX = int(1e4)
 STEP = int(1e3)
 COLS = 50
@@ -76,22 +81,28 @@ SEED = 2017
 np.random.seed(SEED)
 
 
-def build_ensemble(kls, **kwargs):
+def build_ensemble(kls, threads=None, **kwargs):
     """Generate ensemble of class kls."""
 
     ens = kls(**kwargs)
-    ens.add([SVR() for _ in range(4)])
-    ens.add_meta(SVR())
+    ens.add([SVR() for _ in range(4)], threads=threads)
+    ens.add_meta(SVR(), threads=threads)
     return ens
 
+
+def label(n, t):
+    """Label of a (n_jobs, threads) configuration"""
+    return '%i' % n if t is None else '%i, %s' % (n, t)
+
+
 if __name__ == '__main__':
 
     c = os.cpu_count()
-    cores = [1, c]
+    cores = [(1, None)] + [(c, t) for t in THREADS]
 
-    ens = [[build_ensemble(kls, n_jobs=i, **kwd)
+    ens = [[build_ensemble(kls, threads=t, n_jobs=i, **kwd)
             for kls, kwd in zip(ENS, KWG)]
-           for i in cores]
+           for i, t in cores]
 
     ###########################################################################
     # PRINTED MESSAGE
@@ -143,7 +154,7 @@ if __name__ == '__main__':
 
                 times[n][name].append(t1)
 
-                print('%s (%i) : %6.2fs |' % (name, n, t1),
+                print('%s (%s) : %6.2fs |' % (name, label(*n), t1),
                       end=" ", flush=True)
             print()
         print()
@@ -167,7 +178,7 @@ if __name__ == '__main__':
             for n in cores:
                 for s, e in times[n].items():
                     ax = plt.plot(x, e, color=cm[i], marker='.',
-                                  label='%s (%i)' % (s, n))
+                                  label='%s (%s)' % (s, label(*n)))
                     i += 1
 
             plt.title('Benchmark of time to fit')
@@ -2,46 +2,52 @@
 
 Comparison of multiprocessing performance as data scales.
 
+Each ensemble is fitted with the multiprocessing backend under every CPU
+affinity policy in ``AFFINITY``. ``None`` lets workers float across cores,
+``'compact'`` fills one NUMA node before the next, and ``'scatter'``
+distributes workers across NUMA nodes with a node-local replica of the input
+memmap.
+
 Example Output
 --------------
 
+Run with ``MAX = 6000`` and ``STEP = 2000`` on a single-cpu machine with one
+NUMA node. Pinning has no room to act there and no replicas are written, so
+the policies differ only by noise. Gains from ``'scatter'`` with node-local
+replicas require workers spread over several NUMA nodes.
+
 ML-ENSEMBLE
 
-Ensemble scale benchmark for datadimensioned up to (250000, 20)
-Available CPUs: 4
+Ensemble scale benchmark for datadimensioned up to (6000, 20)
+Available CPUs: 1
 
 Ensemble architecture
 Num layers: 2
-layer-1 | Estimators: ['svr', 'randomforestregressor', 'gradientboostingregressor', 'lasso', 'mlpregressor'].
+layer-1 | Estimators: ['gradientboostingregressor', 'lasso', 'mlpregressor', 'randomforestregressor', 'svr'].
 layer-2 | Meta Estimator: lasso
 
 SCORES (TIME TO FIT)
 Sample size
-      20000 SuperLearner : 0.807 ( 19.83s) | BlendEnsemble : 0.823 (  4.09s) | Subsemble : 0.789 (  9.84s) |
-      40000 SuperLearner : 0.396 ( 42.94s) | BlendEnsemble : 0.462 ( 11.37s) | Subsemble : 0.777 ( 28.49s) |
-      60000 SuperLearner : 0.280 ( 75.08s) | BlendEnsemble : 0.328 ( 23.43s) | Subsemble : 0.570 ( 56.93s) |
-      80000 SuperLearner : 0.310 (126.59s) | BlendEnsemble : 0.414 ( 41.75s) | Subsemble : 0.434 ( 90.66s) |
-     100000 SuperLearner : 0.447 (180.77s) | BlendEnsemble : 0.308 ( 63.80s) | Subsemble : 0.541 (111.31s) |
-     120000 SuperLearner : 0.306 (243.34s) | BlendEnsemble : 0.281 ( 92.71s) | Subsemble : 0.323 (129.15s) |
-     140000 SuperLearner : 0.269 (312.58s) | BlendEnsemble : 0.408 (107.19s) | Subsemble : 0.303 (165.86s) |
-     160000 SuperLearner : 0.298 (410.33s) | BlendEnsemble : 0.312 (145.76s) | Subsemble : 0.343 (234.12s) |
-     180000 SuperLearner : 0.250 (614.27s) | BlendEnsemble : 0.279 (195.74s) | Subsemble : 0.272 (295.76s) |
-     200000 SuperLearner : 0.301 (594.41s) | BlendEnsemble : 0.390 (208.11s) | Subsemble : 0.260 (265.42s) |
-     220000 SuperLearner : 0.280 (787.79s) | BlendEnsemble : 0.260 (251.45s) | Subsemble : 0.407 (356.17s) |
-     240000 SuperLearner : 0.304 (928.15s) | BlendEnsemble : 0.299 (314.76s) | Subsemble : 0.300 (459.59s) |
-     260000 SuperLearner : 0.252 (1226.66s) | BlendEnsemble : 0.273 (350.77s) | Subsemble : 0.279 (462.97s) |
-Benchmark done | 04:20:34
-
-Plotting results...
-Figure written to /Users/Sebastian/Documents/python/mlens_dev/scale_benchmark2_time.png
-Figure written to /Users/Sebastian/Documents/python/mlens_dev/scale_benchmark2_score.png
-done.
+       2000 SuperLearner (None) : 1.075 (  1.60s) | BlendEnsemble (None) : 1.091 (  1.33s) | Subsemble (None) : 1.203 (  2.77s) |
+            SuperLearner (compact) : 1.076 (  2.59s) | BlendEnsemble (compact) : 1.090 (  1.86s) | Subsemble (compact) : 1.204 (  2.79s) |
+            SuperLearner (scatter) : 1.077 (  2.39s) | BlendEnsemble (scatter) : 1.089 (  1.85s) | Subsemble (scatter) : 1.202 (  2.88s) |
+
+       4000 SuperLearner (None) : 1.004 (  4.15s) | BlendEnsemble (None) : 1.005 (  2.91s) | Subsemble (None) : 1.088 (  5.26s) |
+            SuperLearner (compact) : 1.004 (  3.91s) | BlendEnsemble (compact) : 1.005 (  2.71s) | Subsemble (compact) : 1.090 (  5.06s) |
+            SuperLearner (scatter) : 1.003 (  4.35s) | BlendEnsemble (scatter) : 1.006 (  2.55s) | Subsemble (scatter) : 1.088 (  4.60s) |
+
+       6000 SuperLearner (None) : 0.954 (  7.15s) | BlendEnsemble (None) : 0.957 (  3.86s) | Subsemble (None) : 0.898 (  7.37s) |
+            SuperLearner (compact) : 0.956 (  6.33s) | BlendEnsemble (compact) : 0.958 (  4.06s) | Subsemble (compact) : 0.897 (  6.71s) |
+            SuperLearner (scatter) : 0.954 (  5.09s) | BlendEnsemble (scatter) : 0.958 (  5.35s) | Subsemble (scatter) : 0.897 (  7.24s) |
+
+Benchmark done | 00:01:58
 
 """
 
 import os
 import numpy as np
 
+from mlens import config
 from mlens.ensemble import SuperLearner, BlendEnsemble, Subsemble
 from mlens.utils import print_time
 from mlens.metrics import rmse
@@ -59,6 +65,7 @@ import warnings
 PLOT = True
 ENS = [SuperLearner, BlendEnsemble, Subsemble]
 KWG = [{'folds': 2}, {}, {'partitions': 3, 'folds': 2}]
+AFFINITY = [None, 'compact', 'scatter']
 MAX = int(2.5 * 1e5)
 STEP = int(2*1e4)
 COLS = 20
@@ -83,7 +90,8 @@ if __name__ == '__main__':
 
     c = os.cpu_count()
 
-    ens = [build_ensemble(kls, n_jobs=-1, **kwd) for kls, kwd in zip(ENS, KWG)]
+    ens = [build_ensemble(kls, n_jobs=-1, backend='multiprocessing', **kwd)
+           for kls, kwd in zip(ENS, KWG)]
 
     ###########################################################################
     # PRINTED MESSAGE
@@ -92,25 +100,24 @@ if __name__ == '__main__':
           "dimensioned up to (%i, %i)" % (MAX, COLS))
     print("Available CPUs: %i\n" % c)
     print('Ensemble architecture')
-    print("Num layers: %i" % ens[0].layers.n_layers)
-
-    for lyr in ens[0].layers.layers:
-        if int(lyr[-1]) == ens[0].layers.n_layers:
-            continue
+    print("Num layers: %i" % len(ens[0].layers))
 
+    for lyr in ens[0].layers[:-1]:
         print('%s | Estimators: %r.' %
-              (lyr, [e for e, _ in ens[0].layers.layers[lyr].estimators]))
+              (lyr.name, [lr.name for lr in lyr.learners]))
 
     print("%s | Meta Estimator: %s" %
-          ('layer-2', ens[0].layers.layers['layer-2'].estimators[0][0]))
+          (ens[0].layers[-1].name, ens[0].layers[-1].learners[0].name))
 
     print('\nSCORES (TIME TO FIT)')
     print('%11s' % 'Sample size', flush=True)
 
     ###########################################################################
     # ESTIMATION
-    times = {kls().__class__.__name__: [] for kls in ENS}
-    scores = {kls().__class__.__name__: [] for kls in ENS}
+    names = ['%s (%s)' % (kls().__class__.__name__, aff)
+             for kls in ENS for aff in AFFINITY]
+    times = {name: [] for name in names}
+    scores = {name: [] for name in names}
 
     ts = perf_counter()
     for s in range(STEP, MAX + STEP, STEP):
@@ -121,22 +128,29 @@ if __name__ == '__main__':
 
         X, y = make_friedman1(n_samples=s, n_features=COLS, random_state=SEED)
 
-        # Iterate over ensembles with given number of cores
-        for e in ens:
-            name = e.__class__.__name__
-            e = clone(e)
+        # Iterate over ensembles with given affinity policy
+        for aff in AFFINITY:
+            config.set_affinity(aff)
+            config.set_numa_replicas(aff == 'scatter')
+            for e in ens:
+                name = '%s (%s)' % (e.__class__.__name__, aff)
+                e = clone(e)
 
-            t0 = perf_counter()
-            e.fit(X[:q], y[:q])
-            t1 = perf_counter() - t0
+                t0 = perf_counter()
+                e.fit(X[:q], y[:q])
+                t1 = perf_counter() - t0
 
-            sc = rmse(y[q:], e.predict(X[q:]))
+                sc = rmse(y[q:], e.predict(X[q:]))
 
-            times[name].append(t1)
-            scores[name].append(sc)
+                times[name].append(t1)
+                scores[name].append(sc)
 
-            print('%s : %.3f (%6.2fs) |' % (name, sc, t1), end=" ", flush=True)
+                print('%s : %.3f (%6.2fs) |' % (name, sc, t1),
+                      end=" ", flush=True)
+            print('\n%11s' % '', end=" ", flush=True)
         print()
+        config.set_affinity(None)
+        config.set_numa_replicas(False)
 
     print_time(ts, "Benchmark done")
 
@@ -151,7 +165,7 @@ if __name__ == '__main__':
 
             x = range(STEP, MAX + STEP, STEP)
             cm = [plt.cm.rainbow(i)
-                  for i in np.linspace(0, 1.0, int(len(ENS)))]
+                  for i in np.linspace(0, 1.0, int(len(names)))]
 
             for i, (s, e) in enumerate(times.items()):
                 ax = plt.plot(x, e, color=cm[i], marker='.', label='%s' % s)
@@ -171,7 +185,7 @@ if __name__ == '__main__':
 
             x = range(STEP, MAX + STEP, STEP)
             cm = [plt.cm.rainbow(i)
-                  for i in np.linspace(0, 1.0, int(len(ENS)))]
+                  for i in np.linspace(0, 1.0, int(len(names)))]
 
             for i, (s, e) in enumerate(scores.items()):
                 ax = plt.plot(x, e, color=cm[i], marker='.', label='%s' % s)
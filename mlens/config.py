@@ -26,6 +26,13 @@ Variables
 
 7. ``IVALS``: load exception handling interval. Default is ``(0.01, 120)``.
 
+8. ``AFFINITY``: global default CPU affinity policy of multiprocessing
+   workers. One of ``'compact'``, ``'scatter'``, or a comma-separated list
+   of cpu ids. Default is no pinning.
+
+9. ``NUMA_REPLICAS``: whether pinned workers should read from a replica of
+   the input memmap local to their NUMA node. Set to ``Y`` to activate.
+
 Environmental variables can be set by ::
 
     export MLENS_[VARIABLE]=VALUE
@@ -63,6 +70,10 @@ _PREFIX = os.environ.get('MLENS_PREFIX', ".mlens_tmp_cache_")
 _BACKEND = os.environ.get('MLENS_BACKEND', 'threading')
 _START_METHOD = os.environ.get('MLENS_START_METHOD', '')
 _VERBOSE = os.environ.get('MLENS_VERBOSE', 'Y')
+_AFFINITY = os.environ.get('MLENS_AFFINITY') or None
+if _AFFINITY and _AFFINITY not in ('compact', 'scatter'):
+    _AFFINITY = [int(i) for i in _AFFINITY.split(',')]
+_NUMA_REPLICAS = os.environ.get('MLENS_NUMA_REPLICAS', 'N') == 'Y'
 
 _IVALS = os.environ.get('MLENS_IVALS', '0.01_120').split('_')
 _IVALS = (float(_IVALS[0]), float(_IVALS[1]))
@@ -102,6 +113,16 @@ def get_tmpdir():
     """Return start method"""
     return _TMPDIR
 
+
+def get_affinity():
+    """Return worker affinity policy"""
+    return _AFFINITY
+
+
+def get_numa_replicas():
+    """Return whether to replicate inputs per NUMA node"""
+    return _NUMA_REPLICAS
+
 ###############################################################################
 # Configuration calls
 
@@ -167,6 +188,31 @@ def set_start_method(method):
     os.environ['JOBLIB_START_METHOD'] = _START_METHOD
 
 
+def set_affinity(affinity):
+    """Set the CPU affinity policy of multiprocessing workers.
+
+    Parameters
+    ----------
+    affinity : str, list, None
+        One of 'compact', 'scatter', a list of cpu ids, or ``None`` for
+        no pinning.
+    """
+    global _AFFINITY
+    _AFFINITY = affinity
+
+
+def set_numa_replicas(numa_replicas):
+    """Set whether pinned workers read from NUMA-local input replicas.
+
+    Parameters
+    ----------
+    numa_replicas : bool
+        whether to place one replica of the input memmap per NUMA node.
+    """
+    global _NUMA_REPLICAS
+    _NUMA_REPLICAS = numa_replicas
+
+
 def set_ivals(interval, limit):
     """Set the parallel backend to use during estimation.
 
@@ -14,10 +14,12 @@ from .blend import BlendEnsemble
 from .subsemble import Subsemble
 from .sequential import SequentialEnsemble
 from .base import Sequential, BaseEnsemble
+from .prune import prune
 
 __all__ = ['SuperLearner',
            'BlendEnsemble',
            'Subsemble',
            'SequentialEnsemble',
            'Sequential',
-           'BaseEnsemble']
+           'BaseEnsemble',
+           'prune']
@@ -16,14 +16,19 @@ from __future__ import division, print_function, with_statement
 from abc import ABCMeta, abstractmethod
 import warnings
 
+from scipy.sparse import issparse
+
 from .. import config
 from ..parallel import Layer, ParallelProcessing, make_group
+from ..parallel.backend import pop_processor_kwargs, KEPT_FILES
+from ..parallel.hooks import check_hooks
 from ..parallel.base import BaseStacker
 from ..externals.sklearn.validation import check_random_state
 from ..utils import (check_ensemble_build, check_inputs, print_time,
                      safe_print, IdTrain, format_name)
 from ..utils.exceptions import (
     LayerSpecificationWarning, NotFittedError, NotInitializedError)
+from ..utils.feature_store import check_feature_store
 from ..metrics import Data
 from ..externals.sklearn.base import BaseEstimator, clone
 try:
@@ -125,6 +130,8 @@ class Sequential(BaseStacker):
         name = format_name(name, 'sequential', GLOBAL_SEQUENTIAL_NAME)
         super(Sequential, self).__init__(
             stack=stack, name=name, verbose=verbose, **kwargs)
+        self._kept = None
+        self._id_train = None
 
     def __iter__(self):
         """Generator for stacked layers"""
@@ -146,7 +153,10 @@ class Sequential(BaseStacker):
             training labels.
 
         **kwargs : optional
-            optional arguments to processor
+            optional arguments to processor, i.e. a ``tracer``, ``hooks``,
+            ``keep_preds`` to retain the output of each layer (see
+            :func:`refit`), or ``reorder`` to store inputs so that folds are
+            contiguous (see :class:`~mlens.parallel.ParallelProcessing`).
        """
         if not self.__stack__:
             raise NotInitializedError("No elements in stack to fit.")
@@ -154,9 +164,16 @@ class Sequential(BaseStacker):
         f, t0 = print_job(self, "Fitting")
 
         with ParallelProcessing(self.backend, self.n_jobs,
-                                max(self.verbose - 4, 0)) as manager:
+                                max(self.verbose - 4, 0),
+                                **pop_processor_kwargs(kwargs)) as manager:
             out = manager.stack(self, 'fit', X, y, **kwargs)
 
+        kept, self._kept = self._kept, None
+        if manager.kept is not None:
+            self._kept = self._keep(self.stack, manager.kept)
+            self._id_train = IdTrain().fit(X)
+        self._release(kept, self._kept)
+
         if self.verbose:
             print_time(t0, "{:<35}".format("Fit complete"), file=f)
 
@@ -164,6 +181,152 @@ class Sequential(BaseStacker):
             return self
         return out
 
+    def refit(self, k=1, **kwargs):
+        r"""Refit the last layers on retained predictions.
+
+        Fits the last ``k`` layers on the output of the preceding layer,
+        as retained during the last ``fit`` call with ``keep_preds``. The
+        preceding layers are not refitted. Layers to refit can be replaced
+        or removed and re-added before the call.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        -----------
+        k : int (default = 1)
+            number of layers to refit. Must be smaller than the number of
+            layers in the stack.
+
+        **kwargs : optional
+            optional arguments to processor.
+        """
+        if not self.__stack__:
+            raise NotInitializedError("No elements in stack to fit.")
+
+        n = len(self.stack)
+        if not isinstance(k, int) or not 0 < k < n:
+            raise ValueError("k must be an integer in [1, %i]. Got %r."
+                             % (n - 1, k))
+
+        i = n - k - 1
+        if not self._kept or len(self._kept) <= i or \
+                self._kept[i][0] is not self.stack[i]:
+            raise NotFittedError(
+                "No retained predictions of layer %i in its current state. "
+                "Fit the stack with keep_preds=True." % (i + 1))
+        X, y = self._kept[i][1]
+
+        f, t0 = print_job(self, "Refitting")
+
+        if not kwargs.get('keep_preds'):
+            kwargs['keep_preds'] = True
+        with ParallelProcessing(self.backend, self.n_jobs,
+                                max(self.verbose - 4, 0),
+                                **pop_processor_kwargs(kwargs)) as manager:
+            out = manager.stack(self.stack[i + 1:], 'fit', X, y, **kwargs)
+
+        kept = self._kept
+        self._kept = kept[:i + 1] + self._keep(
+            self.stack[i + 1:], manager.kept)
+        self._release(kept[i + 1:], self._kept)
+
+        if self.verbose:
+            print_time(t0, "{:<35}".format("Refit complete"), file=f)
+
+        if out is None:
+            return self
+        return out
+
+    @property
+    def preds(self):
+        """Retained output of each layer.
+
+        .. versionadded:: 0.2.2
+
+        List of ``(P, y)`` tuples, one per layer, of the out-of-fold
+        predictions of the layer and the targets they are aligned with, as
+        retained by the last ``fit`` call with ``keep_preds``. ``None`` if
+        predictions were not retained.
+        """
+        if self._kept is None:
+            return None
+        return [preds for _, preds, _ in self._kept]
+
+    @staticmethod
+    def _keep(layers, preds):
+        """Record retained output with the layers and columns it is for"""
+        return [(layer, p, layer.spans) for layer, p in zip(layers, preds)]
+
+    @staticmethod
+    def _release(old, new):
+        """Remove the files of retained output replaced by a new fit"""
+        if old:
+            KEPT_FILES.release([a for _, p, _ in old for a in p],
+                               [a for _, p, _ in new or () for a in p])
+
+    def update(self, X, y=None, **kwargs):
+        r"""Fit only what changed since the last fit.
+
+        Learners added to, or with parameters changed in, a layer are fitted
+        and their columns written into the output of the layer retained
+        during the last ``fit`` call with ``keep_preds``. Learners fitted
+        with their current parameters are not refitted. Layers downstream of
+        a layer whose output changed are refitted. Layers replaced since the
+        last fit adopt the fitted learners of the previous layer that are
+        identical by name and parameters.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        -----------
+        X : array-like of shape = [n_samples, n_features]
+            input matrix the stack was last fitted on.
+
+        y : array-like of shape = [n_samples, ]
+            training labels the stack was last fitted on.
+
+        **kwargs : optional
+            optional arguments to processor.
+        """
+        if not self.__stack__:
+            raise NotInitializedError("No elements in stack to fit.")
+        if not self._kept or not self._id_train.is_train(X):
+            raise NotFittedError(
+                "No retained predictions for X. Fit the stack on X with "
+                "keep_preds=True.")
+
+        changed = False
+        for i, layer in enumerate(self.stack):
+            layer.__reuse__ = None
+            if changed or i >= len(self._kept):
+                changed = True
+                continue
+
+            old, (P, _), spans = self._kept[i]
+            if layer is not old:
+                if any(getattr(layer, p) != getattr(old, p)
+                       for p in ['propagate_features', 'shuffle',
+                                 'random_state', 'dtype']):
+                    changed = True
+                    continue
+                layer.adopt(old)
+
+            if layer.shuffle and layer.random_state is None:
+                # Permutation cannot be reproduced
+                changed = True
+                continue
+
+            layer.reuse(P, spans)
+            changed = layer.changed(spans)
+
+        if not kwargs.get('keep_preds'):
+            kwargs['keep_preds'] = True
+        try:
+            return self.fit(X, y, **kwargs)
+        finally:
+            for layer in self.stack:
+                layer.__reuse__ = None
+
     def fit_transform(self, X, y=None, **kwargs):
         r"""Fit instance and return cross-validated predictions.
 
@@ -262,12 +425,13 @@ class Sequential(BaseStacker):
         """
         r = kwargs.pop('return_preds', True)
         with ParallelProcessing(self.backend, self.n_jobs,
-                                max(self.verbose - 4, 0)) as manager:
+                                max(self.verbose - 4, 0),
+                                **pop_processor_kwargs(kwargs)) as manager:
             out = manager.stack(self, job, X, return_preds=r, **kwargs)
 
         if not isinstance(out, list):
             out = [out]
-        out = [p.squeeze() for p in out]
+        out = [p.squeeze() if not issparse(p) else p for p in out]
         if len(out) == 1:
             out = out[0]
         return out
@@ -283,6 +447,27 @@ class Sequential(BaseStacker):
             out.extend([('%s/%s' % (layer.name, k), v) for k, v in d])
         return Data(out)
 
+    @property
+    def profile(self):
+        """Merged sub-task profiles of the last profiled job.
+
+        .. versionadded:: 0.2.2
+
+        Dictionary of :class:`pstats.Stats` instances, with one entry per
+        layer (``layer_name``) and per learner and transformer
+        (``layer_name/name``). Empty unless a job was run with
+        ``profile=True``.
+        """
+        out = dict()
+        for layer in self.stack:
+            if layer.profile is None:
+                continue
+            out[layer.name] = layer.profile
+            for node in layer.transformers + layer.learners:
+                if node.profile is not None:
+                    out['%s/%s' % (layer.name, node.name)] = node.profile
+        return out
+
 
 ###############################################################################
 class BaseEnsemble(BaseEstimator):
@@ -305,8 +490,8 @@ class BaseEnsemble(BaseEstimator):
         test folds are transformed with the ``predict`` method.
 
     samples_size: int (default=20)
-        size of training set sample
-        (``[min(sample_size, X.size[0]), min(X.size[1], sample_size)]``
+        unused. Kept for backwards compatibility: the training set is
+        identified by a fingerprint of all its values.
 
     shuffle: bool (default=False)
         whether to shuffle input data during fit calls
@@ -325,8 +510,23 @@ class BaseEnsemble(BaseEstimator):
         ``0`` disables.
 
     samples_size: int (default=20)
-        size of training set sample
-        (``[min(sample_size, X.size[0]), min(X.size[1], sample_size)]``
+        unused. Kept for backwards compatibility: the training set is
+        identified by a fingerprint of all its values.
+
+    feature_store: obj, str, optional
+        a :class:`~mlens.utils.FeatureStore` instance or path to persist
+        predictions to in model selection mode. See :class:`FeatureStore`.
+
+        .. versionadded:: 0.2.2
+
+    keep_preds: bool, str (default=False)
+        whether to retain the out-of-fold predictions of each layer during
+        fit, so that the last layers can be refitted without refitting the
+        preceding layers. See :func:`refit`. Predictions larger than 128 MB
+        are memory-mapped to the temporary directory. Pass a path to
+        memory-map all retained predictions to that directory.
+
+        .. versionadded:: 0.2.2
     """
 
     __metaclass__ = ABCMeta
@@ -335,7 +535,7 @@ class BaseEnsemble(BaseEstimator):
     def __init__(
             self, shuffle=False, random_state=None, scorer=None, verbose=False,
             layers=None, array_check=2, model_selection=False, sample_size=20,
-            **kwargs):
+            feature_store=None, keep_preds=False, **kwargs):
         self.shuffle = shuffle
         self.random_state = random_state
         self.scorer = scorer
@@ -346,6 +546,10 @@ class BaseEnsemble(BaseEstimator):
 
         self.sample_size = sample_size
         self.model_selection = model_selection
+        self.feature_store = feature_store
+        self.keep_preds = keep_preds
+        self._store_key = None
+        self._store_fit = None
 
         self._backend = Sequential(verbose=verbose, **kwargs)
         self.raise_on_exception = self._backend.raise_on_exception
@@ -457,7 +661,9 @@ class BaseEnsemble(BaseEstimator):
         self : instance
             Modified instance
         """
-        lyr = self._build_layer(estimators, indexer, preprocessing, **kwargs)
+        idx = idx % len(self._backend.stack)
+        lyr = self._build_layer(
+            estimators, indexer, preprocessing, idx=idx, **kwargs)
 
         self.layers[idx] = clone(lyr)
         setattr(self, lyr.name.replace('-', '_'), lyr)
@@ -499,6 +705,11 @@ class BaseEnsemble(BaseEstimator):
         y : array-like of shape = [n_samples, ] or None (default = None)
             output vector to trained estimators on.
 
+        **kwargs : optional
+            optional arguments to processor, i.e. ``hooks`` for event hooks
+            (see :class:`~mlens.parallel.hooks.Hooks`), a ``tracer``, or
+            ``profile=True`` to profile sub-tasks (see :attr:`profile`).
+
         Returns
         -------
         self : instance
@@ -508,10 +719,16 @@ class BaseEnsemble(BaseEstimator):
             # No layers instantiated, but raise_on_exception is False
             return self
 
-        X, y = check_inputs(X, y, self.array_check)
+        X, y = check_inputs(
+            X, y, self.array_check, n_jobs=self._backend.n_jobs)
 
         if self.model_selection:
             self._id_train.fit(X)
+            if self._restore(X, y, **kwargs):
+                return self
+
+        if self.keep_preds:
+            kwargs.setdefault('keep_preds', self.keep_preds)
 
         out = self._backend.fit(X, y, **kwargs)
         if out is not self._backend:
@@ -520,6 +737,98 @@ class BaseEnsemble(BaseEstimator):
         else:
             return self
 
+    def refit(self, k=1, **kwargs):
+        """Refit the last layers on retained out-of-fold predictions.
+
+        Fits the last ``k`` layers on the out-of-fold predictions of the
+        preceding layer, as retained during the last ``fit`` call with
+        ``keep_preds=True``, without refitting the preceding layers. To try
+        a different meta learner, replace the final layer and refit::
+
+            ensemble = SuperLearner(keep_preds=True)
+            ensemble.add(estimators).add_meta(LogisticRegression())
+            ensemble.fit(X, y)
+
+            ensemble.remove(-1).add_meta(SVC()).refit()
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        k : int (default = 1)
+            number of layers to refit, counting from the final layer. Must
+            be smaller than the number of layers.
+
+        **kwargs : optional
+            optional arguments to processor.
+
+        Returns
+        -------
+        self : instance
+            class instance with refitted layers.
+        """
+        if not check_ensemble_build(self._backend):
+            # No layers instantiated, but raise_on_exception is False
+            return self
+
+        if self.keep_preds:
+            kwargs.setdefault('keep_preds', self.keep_preds)
+
+        self._backend.refit(k, **kwargs)
+        return self
+
+    def update(self, X, y=None, **kwargs):
+        """Fit only learners and layers that changed since the last fit.
+
+        After editing a fitted ensemble, fits only the learners that were
+        added or whose parameters changed, writes their columns into the
+        out-of-fold predictions retained during the last ``fit`` call with
+        ``keep_preds=True``, and refits the layers downstream of a layer
+        whose predictions changed. Layers can be edited in place with
+        ``set_params``, or replaced with :func:`replace`, in which case
+        learners identical by name and parameters to those of the previous
+        layer are not refitted::
+
+            ensemble = SuperLearner(keep_preds=True)
+            ensemble.add([('ols', OLS()), ('svr', SVR())]).add_meta(OLS())
+            ensemble.fit(X, y)
+
+            ensemble.replace(0, [('ols', OLS()), ('svr', SVR()),
+                                 ('knn', KNeighborsRegressor())],
+                             FoldIndex(2))
+            ensemble.update(X, y)  # Fits knn and the meta learner only
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        X : array-like of shape = [n_samples, n_features]
+            input matrix the ensemble was last fitted on.
+
+        y : array-like of shape = [n_samples, ]
+            output vector the ensemble was last fitted on.
+
+        **kwargs : optional
+            optional arguments to processor.
+
+        Returns
+        -------
+        self : instance
+            class instance with fitted estimators.
+        """
+        if not check_ensemble_build(self._backend):
+            # No layers instantiated, but raise_on_exception is False
+            return self
+
+        X, y = check_inputs(
+            X, y, self.array_check, n_jobs=self._backend.n_jobs)
+
+        if self.keep_preds:
+            kwargs.setdefault('keep_preds', self.keep_preds)
+
+        self._backend.update(X, y, **kwargs)
+        return self
+
     def transform(self, X, y=None, **kwargs):
         """Transform with fitted ensemble.
 
@@ -546,29 +855,90 @@ class BaseEnsemble(BaseEstimator):
             # No layers instantiated, but raise_on_exception is False
             return
 
-        X, y = check_inputs(X, y, check_level=self.array_check)
+        X, y = check_inputs(X, y, check_level=self.array_check,
+                            n_jobs=self._backend.n_jobs)
 
         if self.model_selection:
             if y is None:
                 raise TypeError(
                     "In model selection mode, y is a required argument.")
 
-            # Need to modify the transform method to account for blending
-            # cutting X in size, so y needs to be cut too
-            if not self._id_train.is_train(X):
-                return self.predict(X, **kwargs), y
-
-            # Asked to reproduce predictions during fit, here we need to
-            # account for that in model selection mode,
-            # blend ensemble will cut X in observation size so need to adjust y
-            X = self._backend.transform(X, **kwargs)
-            if X.shape[0] != y.shape[0]:
-                r = y.shape[0] - X.shape[0]
-                y = y[r:]
-            return X, y
+            return self._stored(
+                self._model_selection_transform, X, y, **kwargs)
 
         return self._backend.transform(X, **kwargs)
 
+    def _model_selection_transform(self, X, y, **kwargs):
+        """Transform training set or predict new data"""
+        # Need to modify the transform method to account for blending
+        # cutting X in size, so y needs to be cut too
+        if not self._id_train.is_train(X):
+            return self.predict(X, **kwargs), y
+
+        # Asked to reproduce predictions during fit, here we need to
+        # account for that in model selection mode,
+        # blend ensemble will cut X in observation size so need to adjust y
+        X = self._backend.transform(X, **kwargs)
+        if X.shape[0] != y.shape[0]:
+            r = y.shape[0] - X.shape[0]
+            y = y[r:]
+        return X, y
+
+    def _restore(self, X, y, **kwargs):
+        """Check the feature store for the output of a fit on (X, y).
+
+        Returns ``True`` if the fit can be skipped. Base learners are then
+        fitted lazily, should predictions on data not in the store be
+        requested.
+        """
+        store = check_feature_store(self.feature_store)
+        self._store_key = self._store_fit = None
+        if store is None or kwargs.get('return_preds'):
+            return False
+
+        self._store_key = store.key(self, X, y)
+        if self._store_key not in store:
+            return False
+        self._store_fit = (X, y, kwargs)
+        self._hit('fit', **kwargs)
+        return True
+
+    def _fit_restored(self):
+        """Fit base learners skipped on a feature store hit"""
+        if self._store_fit is not None:
+            X, y, kwargs = self._store_fit
+            self._store_fit = None
+            self._backend.fit(X, y, **kwargs)
+
+    def _stored(self, transform, X, y, **kwargs):
+        """Read a model selection transform from the feature store"""
+        store = check_feature_store(self.feature_store)
+        if store is None or self._store_key is None:
+            self._fit_restored()
+            return transform(X, y, **kwargs)
+
+        train = self._is_train(X)
+        key = self._store_key if train else store.key(self._store_key, X)
+        entry = store.load(key)
+        if entry is not None:
+            self._hit('transform', **kwargs)
+            return entry[0], entry[1] if train else y
+
+        self._fit_restored()
+        X, y = transform(X, y, **kwargs)
+        store.dump(key, X, y if train else None)
+        return X, y
+
+    def _hit(self, job, **kwargs):
+        """Emit a cache hit on a feature store entry"""
+        hooks = check_hooks(kwargs.get('hooks'))
+        if hooks is not None:
+            hooks.emit('cache_hit', task=self._backend.name, job=job)
+
+    def _is_train(self, X):
+        """Check if X is the training set"""
+        return self._id_train.is_train(X)
+
     def fit_transform(self, X, y, **kwargs):
         r"""Fit ensemble and return cross-validated predictions.
 
@@ -593,7 +963,7 @@ class BaseEnsemble(BaseEstimator):
             ``y``, or a trunctated version to match the samples in ``X_trans``.
         """
         kwargs.pop('return_preds', None)
-        return self.fit(X, y, return_preds=True)
+        return self.fit(X, y, return_preds=True, **kwargs)
 
     def predict(self, X, **kwargs):
         """Predict with fitted ensemble.
@@ -611,7 +981,9 @@ class BaseEnsemble(BaseEstimator):
         if not check_ensemble_build(self._backend):
             # No layers instantiated, but raise_on_exception is False
             return
-        X, _ = check_inputs(X, check_level=self.array_check)
+        X, _ = check_inputs(X, check_level=self.array_check,
+                            n_jobs=self._backend.n_jobs)
+        self._fit_restored()
         return self._backend.predict(X, **kwargs)
 
     def predict_proba(self, X, **kwargs):
@@ -634,7 +1006,8 @@ class BaseEnsemble(BaseEstimator):
         kwargs.pop('proba', None)
         return self.predict(X, proba=True, **kwargs)
 
-    def _build_layer(self, estimators, indexer, preprocessing, **kwargs):
+    def _build_layer(self, estimators, indexer, preprocessing, idx=None,
+                     **kwargs):
         """Build a layer from estimators and preprocessing pipelines"""
         # --- check args ---
 
@@ -659,7 +1032,9 @@ class BaseEnsemble(BaseEstimator):
         group = make_group(indexer, estimators, preprocessing, kwargs)
 
         # --- layer ---
-        name = "layer-%i" % (len(self._backend.stack) + 1)  # Start count at 1
+        if idx is None:
+            idx = len(self._backend.stack)
+        name = "layer-%i" % (idx + 1)  # Start count at 1
         lyr = Layer(
             name=name, dtype=dtype, shuffle=shuffle,
             random_state=random_state, verbose=verbose,
@@ -685,3 +1060,31 @@ class BaseEnsemble(BaseEstimator):
     def data(self):
         """Fit data"""
         return self._backend.data
+
+    @property
+    def preds(self):
+        """Out-of-fold predictions of each layer retained during fit.
+
+        .. versionadded:: 0.2.2
+
+        List of ``(P, y)`` tuples, one per layer, of the out-of-fold
+        predictions of the layer and the targets they are aligned with.
+        ``None`` unless the ensemble was fitted with ``keep_preds=True``.
+        """
+        return self._backend.preds
+
+    @property
+    def profile(self):
+        """Sub-task profiles of the last call with ``profile=True``.
+
+        .. versionadded:: 0.2.2
+
+        Dictionary of :class:`pstats.Stats` instances, one per layer
+        (``layer_name``) and per learner and transformer
+        (``layer_name/name``). Sub-tasks are profiled with :mod:`cProfile`
+        inside the workers. ::
+
+            ensemble.fit(X, y, profile=True)
+            ensemble.profile['layer-1'].sort_stats('cumtime').print_stats(10)
+        """
+        return self._backend.profile
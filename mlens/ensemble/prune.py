@@ -0,0 +1,356 @@
+"""ML-ENSEMBLE
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:licence: MIT
+
+Predict-cost-aware pruning of fitted ensembles. Selects a subset of the
+learners of a layer from the layer's retained out-of-fold predictions and
+the measured prediction time of each learner, and rebuilds the ensemble
+with only the selected learners, without refitting them.
+"""
+# pylint: disable=protected-access
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-locals
+
+from __future__ import division
+
+from copy import deepcopy
+
+import numpy as np
+
+from ..parallel.layer import node_key
+from ..externals.sklearn.base import clone
+from ..utils.exceptions import NotFittedError
+
+METHODS = ['greedy', 'coef']
+
+
+def learner_costs(layer):
+    """Measured prediction time of each learner in a layer.
+
+    The cost of a learner is the total time its sub-learners spent
+    predicting their test folds during fitting, i.e. the time to predict
+    roughly one pass over the training set. Preprocessing is not included.
+
+    Parameters
+    ----------
+    layer : :class:`~mlens.parallel.Layer`
+        fitted layer.
+
+    Returns
+    -------
+    costs : array of shape = [n_learners, ]
+        prediction time of each learner, in seconds.
+    """
+    costs = list()
+    for lr in layer.learners:
+        costs.append(sum(data.get('pt') or 0. for _, data in lr.raw_data))
+    return np.array(costs, dtype=np.float64)
+
+
+def learner_weights(layer, spans, n_features):
+    """Absolute weight the learners of a layer put on each input learner.
+
+    Weights are taken from the ``coef_`` or ``feature_importances_`` of
+    the estimators fitted on the full data, summed over classes and
+    learners.
+
+    Parameters
+    ----------
+    layer : :class:`~mlens.parallel.Layer`
+        fitted layer whose input is the output of the learners in
+        ``spans``.
+
+    spans : list
+        list of ``(start, stop)`` column spans of the input learners.
+
+    n_features : int
+        number of input features of ``layer``.
+
+    Returns
+    -------
+    weights : array of shape = [n_spans, ]
+        summed absolute weight on the columns of each span.
+    """
+    weights = np.zeros(n_features)
+    for lr in layer.learners:
+        for est in lr.learner:
+            est = est.estimator
+            coef = getattr(est, 'coef_', None)
+            if coef is None:
+                coef = getattr(est, 'feature_importances_', None)
+            if coef is None:
+                raise ValueError(
+                    "Learner %s has neither coef_ nor feature_importances_. "
+                    "Use method='greedy'." % lr.name)
+            coef = np.abs(np.atleast_2d(coef)).sum(axis=0)
+            if coef.shape[0] != n_features:
+                raise ValueError(
+                    "Learner %s has %i weights for %i input features. "
+                    "Preprocessed input cannot be mapped to learners. Use "
+                    "method='greedy'." % (lr.name, coef.shape[0], n_features))
+            weights += coef
+    return np.array([weights[mi:mx].sum() for mi, mx in spans])
+
+
+def greedy_selection(P, y, spans, costs, scorer=None,
+                     greater_is_better=False, tol=0., cost_penalty=0.,
+                     max_iter=None):
+    """Caruana-style greedy forward selection of learners.
+
+    Starting from an empty ensemble, repeatedly adds (with replacement) the
+    learner whose predictions, averaged with those of the learners already
+    added, give the best score. Adding a learner that is already selected
+    adds no prediction cost. Of the ensembles visited, the one with the
+    lowest prediction cost among those scoring within ``tol`` of the best
+    is selected.
+
+    Parameters
+    ----------
+    P : array-like of shape = [n_samples, n_features]
+        out-of-fold predictions of the learners.
+
+    y : array-like of shape = [n_samples, ]
+        targets aligned with ``P``.
+
+    spans : list
+        list of ``(start, stop)`` column spans of each learner in ``P``.
+        All spans must be of equal width.
+
+    costs : array-like of shape = [n_learners, ]
+        prediction cost of each learner.
+
+    scorer : callable, optional
+        scoring function ``score = f(y, p)``. ``p`` is a 1d array if
+        learners output one column, else a 2d array of averaged columns.
+        Defaults to the mean squared error over all columns, evaluated
+        for all candidates at once. Pass a scorer if learners output class
+        probabilities.
+
+    greater_is_better : bool (default = False)
+        whether a higher score is better.
+
+    tol : float (default = 0.)
+        tolerated loss of score relative to the best ensemble visited.
+
+    cost_penalty : float (default = 0.)
+        penalty, in units of score, on the share of the total prediction
+        cost a candidate learner would add to the ensemble.
+
+    max_iter : int, optional
+        number of learners to add. Defaults to the number of learners.
+
+    Returns
+    -------
+    selected : list
+        indices of the selected learners, in order of ``spans``.
+    """
+    widths = set(mx - mi for mi, mx in spans)
+    if len(widths) != 1:
+        raise ValueError("Greedy selection requires learners of equal "
+                         "output width. Got widths %r." % sorted(widths))
+    w = widths.pop()
+
+    n = P.shape[0]
+    m = len(spans)
+    B = np.stack([np.asarray(P[:, mi:mx], dtype=np.float64).ravel()
+                  for mi, mx in spans])
+
+    if scorer is None:
+        # Each column, i.e. of each partition, is compared with y
+        y = np.repeat(np.asarray(y, dtype=np.float64).ravel(), w)
+        sq = np.einsum('ij,ij->i', B, B)
+
+    costs = np.asarray(costs, dtype=np.float64)
+    total = costs.sum() or 1.
+    sign = 1. if greater_is_better else -1.
+    max_iter = m if max_iter is None else max_iter
+
+    S = np.zeros(n * w)
+    selected = np.zeros(m, dtype=bool)
+    path = list()
+    for k in range(1, max_iter + 1):
+        if scorer is None:
+            # ||(S + B_j) / k - y||^2 for all j without forming S + B
+            R = S / k - y
+            loss = (R.dot(R) + 2 * B.dot(R) / k + sq / k ** 2) / (n * w)
+        else:
+            loss = np.empty(m)
+            for j in range(m):
+                p = (S + B[j]) / k
+                p = p if w == 1 else p.reshape(n, w)
+                loss[j] = -sign * scorer(y, p)
+
+        added = np.where(selected, 0., costs) / total
+        j = int(np.argmin(loss + cost_penalty * added))
+
+        S += B[j]
+        selected[j] = True
+        path.append((loss[j], costs[selected].sum(), selected.copy()))
+
+    best = min(loss for loss, _, _ in path)
+    _, _, selected = min(
+        (p for p in path if p[0] <= best + abs(tol)), key=lambda p: p[1])
+    return np.flatnonzero(selected).tolist()
+
+
+def coef_selection(weights, costs, tol=0.):
+    """Select learners by the weight the next layer puts on them.
+
+    Learners are dropped in order of increasing weight per unit of
+    prediction cost for as long as the dropped share of the total weight
+    does not exceed ``tol``.
+
+    Parameters
+    ----------
+    weights : array-like of shape = [n_learners, ]
+        absolute weight of each learner, see :func:`learner_weights`.
+
+    costs : array-like of shape = [n_learners, ]
+        prediction cost of each learner.
+
+    tol : float (default = 0.)
+        share of the total weight that may be dropped.
+
+    Returns
+    -------
+    selected : list
+        indices of the selected learners.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    costs = np.asarray(costs, dtype=np.float64)
+    share = weights / (weights.sum() or 1.)
+    value = share / np.maximum(costs, np.finfo(np.float64).tiny)
+
+    keep = np.ones(share.shape[0], dtype=bool)
+    dropped = 0.
+    for j in np.lexsort((-costs, value)):
+        if dropped + share[j] > tol or keep.sum() == 1:
+            break
+        dropped += share[j]
+        keep[j] = False
+    return np.flatnonzero(keep).tolist()
+
+
+def prune(ensemble, method='greedy', idx=-2, scorer=None,
+          greater_is_better=False, tol=0., cost_penalty=0., max_iter=None,
+          costs=None):
+    """Prune the learners of a fitted ensemble.
+
+    Selects a subset of the learners of a layer from the layer's retained
+    out-of-fold predictions and the measured prediction time of each
+    learner, and returns a copy of the ensemble where the layer only holds
+    the selected learners. Selected learners are not refitted. The
+    downstream layers are refitted on the retained predictions of the
+    selected learners, as in :func:`~mlens.ensemble.BaseEnsemble.refit`.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    ensemble : :class:`~mlens.ensemble.BaseEnsemble`, :class:`Sequential`
+        ensemble fitted with ``keep_preds=True``.
+
+    method : str (default = 'greedy')
+        selection method.
+
+            - ``'greedy'``: Caruana-style greedy forward selection on the
+              out-of-fold predictions, see :func:`greedy_selection`.
+
+            - ``'coef'``: drop learners the next layer puts little weight
+              on, see :func:`coef_selection`. The next layer's learners
+              must expose ``coef_`` or ``feature_importances_``.
+
+    idx : int (default = -2)
+        position in the stack of the layer to prune. Must not be the final
+        layer.
+
+    scorer : callable, optional
+        scoring function ``score = f(y, p)`` for ``method='greedy'``.
+        Defaults to the mean squared error.
+
+    greater_is_better : bool (default = False)
+        whether a higher score is better.
+
+    tol : float (default = 0.)
+        tolerance. For ``method='greedy'``, the tolerated loss of score
+        relative to the best subset. For ``method='coef'``, the share of
+        the total weight that may be dropped.
+
+    cost_penalty : float (default = 0.)
+        penalty on added prediction cost in greedy selection, see
+        :func:`greedy_selection`.
+
+    max_iter : int, optional
+        number of greedy selection steps.
+
+    costs : dict, optional
+        prediction cost per learner name, overriding the measured
+        prediction times (see :func:`learner_costs`).
+
+    Returns
+    -------
+    pruned : instance
+        copy of the ensemble with the layer pruned.
+
+    Examples
+    --------
+    >>> from mlens.ensemble import SuperLearner, prune
+    >>> ensemble = SuperLearner(keep_preds=True)
+    >>> ensemble.add(estimators).add_meta(LinearRegression())
+    >>> ensemble.fit(X, y)
+    >>> fast = prune(ensemble, tol=0.01)
+    >>> [lr.name for lr in fast.layer_1.learners]
+    """
+    if method not in METHODS:
+        raise ValueError("method must be one of %r. Got %r."
+                         % (METHODS, method))
+
+    pruned = deepcopy(ensemble)
+    stack = getattr(pruned, '_backend', pruned)
+    n = len(stack.stack)
+    i = idx % n if n else 0
+    if not n or i == n - 1:
+        raise ValueError("Cannot prune the final layer. Got idx=%r for a "
+                         "stack of %i layers." % (idx, n))
+
+    layer = stack.stack[i]
+    kept = stack._kept
+    if not kept or len(kept) <= i or kept[i][0] is not layer or \
+            [k for k, _ in kept[i][2]] != [node_key(lr)
+                                          for lr in layer.learners]:
+        raise NotFittedError(
+            "No retained predictions of layer %i in its current state. Fit "
+            "the ensemble with keep_preds=True." % (i + 1))
+    _, (P, y), spans = kept[i]
+
+    keys = [k for k, _ in spans]
+    spans = [s for _, s in spans]
+    c = learner_costs(layer)
+    if costs is not None:
+        c = np.array([costs.get(lr.name, ci)
+                      for lr, ci in zip(layer.learners, c)])
+
+    if method == 'greedy':
+        selected = greedy_selection(
+            P, y, spans, c, scorer, greater_is_better, tol, cost_penalty,
+            max_iter)
+    else:
+        weights = learner_weights(stack.stack[i + 1], spans, P.shape[1])
+        selected = coef_selection(weights, c, tol)
+
+    # Retained output of the selected learners
+    cols = list(range(layer.n_feature_prop))
+    new = list()
+    for j in selected:
+        mi, mx = spans[j]
+        new.append((keys[j], (len(cols), len(cols) + mx - mi)))
+        cols.extend(range(mi, mx))
+
+    layer.prune([keys[j] for j in selected])
+    stack._kept = kept[:i] + [(layer, (P.take(cols, axis=1), y), new)]
+
+    if hasattr(pruned, 'layers') and pruned.layers is not stack.stack:
+        pruned.layers[i] = clone(layer)
+    return pruned.refit(n - i - 1)
@@ -96,8 +96,25 @@ class SequentialEnsemble(BaseEnsemble):
         test folds are transformed with the ``predict`` method.
 
     sample_size: int (default=20)
-        size of training set sample
-        (``[min(sample_size, X.size[0]), min(X.size[1], sample_size)]``)
+        unused. Kept for backwards compatibility: the training set is
+        identified by a fingerprint of all its values.
+
+    feature_store: obj, str, optional
+        a :class:`~mlens.utils.FeatureStore` instance, or a path to one, to
+        persist predictions to in model selection mode. Repeated fits on the
+        same data with the same configuration restore predictions from the
+        store instead of fitting the base learners.
+
+        .. versionadded:: 0.2.2
+
+    keep_preds: bool, str (default=False)
+        whether to retain the out-of-fold predictions of each layer during
+        fit. The last layers can then be replaced and refitted with
+        :func:`refit` without refitting the preceding layers. Predictions
+        larger than 128 MB are memory-mapped; pass a path to memory-map all
+        retained predictions to that directory.
+
+        .. versionadded:: 0.2.2
 
     Examples
     --------
@@ -129,13 +146,15 @@ class SequentialEnsemble(BaseEnsemble):
     def __init__(
             self, shuffle=False, random_state=None, scorer=None,
             raise_on_exception=True, array_check=2, verbose=False, n_jobs=-1,
-            backend=None, model_selection=False, sample_size=20, layers=None):
+            backend=None, model_selection=False, sample_size=20, layers=None,
+            feature_store=None, keep_preds=False):
         super(SequentialEnsemble, self).__init__(
             shuffle=shuffle, random_state=random_state, scorer=scorer,
             raise_on_exception=raise_on_exception, verbose=verbose,
             n_jobs=n_jobs, layers=layers, array_check=array_check,
             model_selection=model_selection, sample_size=sample_size,
-            backend=backend)
+            backend=backend, feature_store=feature_store,
+            keep_preds=keep_preds)
 
     def add_meta(self, estimator, **kwargs):
         """Meta Learner.
@@ -196,8 +196,25 @@ class Subsemble(BaseEnsemble):
         test folds are transformed with the ``predict`` method.
 
     sample_size: int (default=20)
-        size of training set sample
-        (``[min(sample_size, X.size[0]), min(X.size[1], sample_size)]``)
+        unused. Kept for backwards compatibility: the training set is
+        identified by a fingerprint of all its values.
+
+    feature_store: obj, str, optional
+        a :class:`~mlens.utils.FeatureStore` instance, or a path to one, to
+        persist predictions to in model selection mode. Repeated fits on the
+        same data with the same configuration restore predictions from the
+        store instead of fitting the base learners.
+
+        .. versionadded:: 0.2.2
+
+    keep_preds: bool, str (default=False)
+        whether to retain the out-of-fold predictions of each layer during
+        fit. The last layers can then be replaced and refitted with
+        :func:`refit` without refitting the preceding layers. Predictions
+        larger than 128 MB are memory-mapped; pass a path to memory-map all
+        retained predictions to that directory.
+
+        .. versionadded:: 0.2.2
 
     Examples
     --------
@@ -251,12 +268,14 @@ class Subsemble(BaseEnsemble):
             self, partitions=2, partition_estimator=None, folds=2,
             shuffle=False, random_state=None, scorer=None,
             raise_on_exception=True, array_check=2, verbose=False, n_jobs=-1,
-            backend=None, model_selection=False, sample_size=20, layers=None):
+            backend=None, model_selection=False, sample_size=20, layers=None,
+            feature_store=None, keep_preds=False):
         super(Subsemble, self).__init__(
             shuffle=shuffle, random_state=random_state, scorer=scorer,
             raise_on_exception=raise_on_exception, verbose=verbose,
             n_jobs=n_jobs, layers=layers, model_selection=model_selection,
-            sample_size=sample_size, array_check=array_check, backend=backend)
+            sample_size=sample_size, array_check=array_check, backend=backend,
+            feature_store=feature_store, keep_preds=keep_preds)
 
         self.__initialized__ = 0  # Unlock parameter setting
         self.partition_estimator = partition_estimator
@@ -365,6 +384,15 @@ class Subsemble(BaseEnsemble):
         proba : bool (default = False)
             whether to call ``predict_proba`` on base learners.
 
+        drop_first : bool (default = False)
+            whether to drop the redundant probability column of the first
+            class when ``proba=True``. Each learner then outputs
+            ``n_classes - 1`` columns, i.e. only the positive class in a
+            binary problem. Use on intermediate layers to cut the width of
+            the input to the next layer.
+
+            .. versionadded:: 0.2.2
+
         propagate_features : list, optional
             List of column indexes to propagate from the input of
             the layer to the output of the layer. Propagated features are
@@ -389,6 +417,16 @@ class Subsemble(BaseEnsemble):
                   the input data for the ``attr`` method.
                   One of ``'X'``, ``'y'`` or ``'both'``.
 
+                * **route** *(str, optional)* -
+                  routed prediction mode. If ``'compact'``, each
+                  observation is only predicted by the learners of its
+                  partition, and learners output one set of columns. If
+                  ``'sparse'``, the layer outputs the full layout of one
+                  set of columns per partition as a sparse matrix, with
+                  observations only populating the columns of their
+                  partition. See
+                  :class:`~mlens.index.ClusteredSubsetIndex`.
+
 
         Returns
         -------
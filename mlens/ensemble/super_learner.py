@@ -160,8 +160,25 @@ class SuperLearner(BaseEnsemble):
         test folds are transformed with the ``predict`` method.
 
     sample_size: int (default=20)
-        size of training set sample
-        (``[min(sample_size, X.size[0]), min(X.size[1], sample_size)]``)
+        unused. Kept for backwards compatibility: the training set is
+        identified by a fingerprint of all its values.
+
+    feature_store: obj, str, optional
+        a :class:`~mlens.utils.FeatureStore` instance, or a path to one, to
+        persist predictions to in model selection mode. Repeated fits on the
+        same data with the same configuration restore predictions from the
+        store instead of fitting the base learners.
+
+        .. versionadded:: 0.2.2
+
+    keep_preds: bool, str (default=False)
+        whether to retain the out-of-fold predictions of each layer during
+        fit. The last layers can then be replaced and refitted with
+        :func:`refit` without refitting the preceding layers. Predictions
+        larger than 128 MB are memory-mapped; pass a path to memory-map all
+        retained predictions to that directory.
+
+        .. versionadded:: 0.2.2
 
     Examples
     --------
@@ -214,13 +231,15 @@ class SuperLearner(BaseEnsemble):
     def __init__(
             self, folds=2, shuffle=False, random_state=None, scorer=None,
             raise_on_exception=True, array_check=2, verbose=False, n_jobs=-1,
-            backend='threading', model_selection=False, sample_size=20, layers=None):
+            backend='threading', model_selection=False, sample_size=20, layers=None,
+            feature_store=None, keep_preds=False):
         super(SuperLearner, self).__init__(
             shuffle=shuffle, random_state=random_state, scorer=scorer,
             raise_on_exception=raise_on_exception, verbose=verbose,
             n_jobs=n_jobs, layers=layers, backend=backend,
             array_check=array_check, model_selection=model_selection,
-            sample_size=sample_size)
+            sample_size=sample_size, feature_store=feature_store,
+            keep_preds=keep_preds)
 
         self.__initialized__ = 0  # Unlock parameter setting
         self.folds = folds
@@ -304,6 +323,15 @@ class SuperLearner(BaseEnsemble):
             ``proba=True`` will attempt to call an the estimators
             ``predict_proba`` method.
 
+        drop_first : bool (default = False)
+            whether to drop the redundant probability column of the first
+            class when ``proba=True``. Each learner then outputs
+            ``n_classes - 1`` columns, i.e. only the positive class in a
+            binary problem. Use on intermediate layers to cut the width of
+            the input to the next layer.
+
+            .. versionadded:: 0.2.2
+
         propagate_features : list, optional
             List of column indexes to propagate from the input of
             the layer to the output of the layer. Propagated features are
@@ -0,0 +1,73 @@
+"""ML-ENSEMBLE
+
+Test of ensemble pruning.
+"""
+import numpy as np
+from mlens.testing.dummy import OLS
+from mlens.ensemble import SuperLearner, prune
+from mlens.ensemble.prune import greedy_selection, coef_selection
+from mlens.externals.sklearn.base import clone
+
+from sklearn.linear_model import LinearRegression
+
+np.random.seed(0)
+X = np.random.rand(100, 4)
+y = X.sum(axis=1) + np.random.rand(100) * 0.1
+
+
+def _mse(y_true, p):
+    return np.mean((y_true - p) ** 2)
+
+
+def test_greedy_selection():
+    """[Prune] greedy_selection: vectorized default matches scorer."""
+    P = np.random.rand(50, 4)
+    P[:, 2] = y[:50] + 0.01
+    spans = [(i, i + 1) for i in range(4)]
+    costs = [1., 1., 1., 1.]
+
+    sel = greedy_selection(P, y[:50], spans, costs)
+    assert sel == [2]
+    assert sel == greedy_selection(P, y[:50], spans, costs, scorer=_mse)
+
+    # A slightly worse learner is selected if much cheaper
+    P[:, 1] = y[:50] + 0.02
+    costs = [1., 0.01, 1., 1.]
+    sel = greedy_selection(P, y[:50], spans, costs, cost_penalty=0.01)
+    assert sel == [1]
+
+
+def test_coef_selection():
+    """[Prune] coef_selection: drop low-weight learners per unit cost."""
+    weights = [0., 0.1, 0.5, 0.4]
+    assert coef_selection(weights, [1, 1, 1, 1]) == [1, 2, 3]
+    assert coef_selection(weights, [1, 1, 1, 1], tol=0.1) == [2, 3]
+
+    # Cheap learner is kept over expensive one of similar weight
+    assert coef_selection(weights, [1, 1, 10, 1], tol=0.5) == [1, 3]
+
+
+def test_prune():
+    """[Prune] prune: pruned ensemble predicts with selected learners."""
+    ens = SuperLearner(keep_preds=True)
+    ens.add([OLS(offset=0), OLS(offset=1), OLS(offset=5)])
+    ens.add_meta(LinearRegression())
+    ens.fit(X, y)
+
+    pruned = prune(ens)
+    assert [lr.name for lr in pruned.layer_1.learners] == ['ols-1']
+    assert len(ens.layer_1.learners) == 3
+
+    # Equivalent to fitting only the selected learners
+    ref = SuperLearner()
+    ref.add([OLS(offset=0)]).add_meta(LinearRegression())
+    ref.fit(X, y)
+    np.testing.assert_array_almost_equal(pruned.predict(X), ref.predict(X))
+
+    # Parameters reflect the pruned layer
+    ref = clone(pruned).fit(X, y)
+    np.testing.assert_array_almost_equal(pruned.predict(X), ref.predict(X))
+
+    # All learners carry weight
+    pruned = prune(ens, method='coef')
+    assert len(pruned.layer_1.learners) == 3
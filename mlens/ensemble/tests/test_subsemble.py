@@ -43,3 +43,37 @@ def test_subset_equiv():
     P = sl.fit(X, y).predict(X)
 
     np.testing.assert_array_equal(P, F)
+
+
+def test_subset_route():
+    """[Subsemble] Routed predictions only use the own partition."""
+    from scipy.sparse import issparse
+    from mlens.ensemble.base import Sequential
+    from sklearn.cluster import KMeans
+    from sklearn.linear_model import LinearRegression
+
+    Z = np.vstack([X, X + 10])
+    z = np.hstack([y, y + 10])
+
+    def layer(route):
+        ens = Subsemble(partition_estimator=KMeans(2, random_state=0),
+                        partitions=2)
+        ens.add(OLS(), route=route)
+        ens.add_meta(LinearRegression())
+        ens.fit(Z, z)
+        return Sequential(stack=[ens._backend.stack[0]])
+
+    full = layer(None).predict(Z)
+    compact = layer('compact').predict(Z)
+    sparse = layer('sparse').predict(Z)
+
+    labels = KMeans(2, random_state=0).fit(Z).predict(Z)
+    own = full[np.arange(Z.shape[0]), labels]
+
+    assert compact.shape == (Z.shape[0],)
+    np.testing.assert_array_almost_equal(compact, own)
+
+    assert issparse(sparse)
+    assert sparse.shape == full.shape
+    assert sparse.nnz == Z.shape[0]
+    np.testing.assert_array_almost_equal(sparse.toarray().sum(1), own)
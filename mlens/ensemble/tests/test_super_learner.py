@@ -5,13 +5,16 @@ Place holder for more rigorous tests.
 """
 import numpy as np
 from mlens.metrics import rmse
-from mlens.utils.exceptions import MetricWarning
+from mlens.utils.exceptions import MetricWarning, NotFittedError
 from mlens.index import FoldIndex
 from mlens.testing.dummy import Data, OLS, PREPROCESSING, ESTIMATORS, ECM
+from mlens.utils.dummy import LogisticRegression
 
 from mlens.ensemble import SuperLearner
 
 import os
+import shutil
+import tempfile
 try:
     from contextlib import redirect_stdout, redirect_stderr
 except ImportError:
@@ -247,3 +250,116 @@ if run_sklearn:
 
         for k in scores:
             assert scores[k] == ens3.data['score-m']['layer-1/%s' % k]
+
+
+def test_refit():
+    """[SuperLearner] test refitting the meta layer on retained predictions."""
+    ens = SuperLearner(folds=FOLDS, keep_preds=True)
+    ens.add(ESTIMATORS, PREPROCESSING, dtype=np.float64)
+    ens.add_meta(OLS(offset=1), dtype=np.float64)
+    ens.fit(X1, y1)
+
+    P, y = ens.preds[0]
+    np.testing.assert_array_equal(P, F1)
+    np.testing.assert_array_equal(y, y1)
+
+    # Preceding layer is not refitted
+    layer = ens._backend.stack[0]
+    fitted = [lr._learner_ for lr in layer.learners]
+
+    ens.remove(-1).add_meta(OLS(), dtype=np.float64).refit()
+    np.testing.assert_array_equal(ens.predict(X1), G1)
+    assert all(lr._learner_ is f for lr, f in zip(layer.learners, fitted))
+
+    np.testing.assert_raises(ValueError, ens.refit, 2)
+    np.testing.assert_raises(NotFittedError, SuperLearner().add(
+        ESTIMATORS, PREPROCESSING).add_meta(OLS()).refit)
+
+
+def test_refit_files():
+    """[SuperLearner] test removal of files of replaced predictions."""
+    tmp = tempfile.mkdtemp()
+    try:
+        ens = SuperLearner(folds=FOLDS, keep_preds=tmp)
+        ens.add(ESTIMATORS, PREPROCESSING, dtype=np.float64)
+        ens.add_meta(OLS(), dtype=np.float64)
+        ens.fit(X1, y1)
+        first = set(os.listdir(tmp))
+        assert len(first) == 4
+
+        ens.refit()
+        second = set(os.listdir(tmp))
+        assert len(second) == 4 and len(first & second) == 2
+
+        ens.fit(X1, y1)
+        assert len(os.listdir(tmp)) == 4
+        assert not second & set(os.listdir(tmp))
+        np.testing.assert_array_equal(ens.preds[0][0], F1)
+    finally:
+        shutil.rmtree(tmp)
+
+
+class CountingOLS(OLS):
+
+    """OLS recording fit calls"""
+
+    fits = list()
+
+    def fit(self, X, y):
+        CountingOLS.fits.append(self.offset)
+        return super(CountingOLS, self).fit(X, y)
+
+
+def test_update():
+    """[SuperLearner] test incremental fit of changed learners only."""
+    def learners(offsets):
+        return [('ols-%i' % i, CountingOLS(offset=j))
+                for i, j in enumerate(offsets)]
+
+    def build(offsets):
+        ens = SuperLearner(folds=FOLDS, keep_preds=True)
+        ens.add(learners(offsets), dtype=np.float64)
+        ens.add_meta(CountingOLS(offset=10), dtype=np.float64)
+        return ens
+
+    ens = build([1, 2])
+    ens.fit(X1, y1)
+
+    del CountingOLS.fits[:]
+    ens.update(X1, y1)
+    assert not CountingOLS.fits
+
+    # Changed learner and downstream layer only
+    ens.layer_1.learners[1].estimator.set_params(offset=3)
+    ens.update(X1, y1)
+    assert sorted(set(CountingOLS.fits)) == [3, 10]
+
+    # Added learner in replaced layer
+    del CountingOLS.fits[:]
+    ens.replace(0, learners([1, 3, 4]), FoldIndex(FOLDS), dtype=np.float64)
+    ens.update(X1, y1)
+    assert sorted(set(CountingOLS.fits)) == [4, 10]
+
+    ref = build([1, 3, 4])
+    ref.fit(X1, y1)
+    np.testing.assert_array_equal(ens.predict(X1), ref.predict(X1))
+    np.testing.assert_raises(NotFittedError, build([1]).update, X1, y1)
+
+
+def test_drop_first():
+    """[SuperLearner] test dropping the redundant probability column."""
+    def build(drop_first):
+        ens = SuperLearner(folds=FOLDS)
+        ens.add([LogisticRegression(offset=1), LogisticRegression(offset=2)],
+                proba=True, drop_first=drop_first, dtype=np.float64)
+        return ens
+
+    X = np.random.RandomState(0).rand(30, 2)
+    for n_classes in [2, 3]:
+        y = np.arange(30) % n_classes
+        full = build(False).fit_transform(X, y)
+        compact = build(True).fit_transform(X, y)
+        assert compact.shape[1] == 2 * (n_classes - 1)
+
+        keep = [j for j in range(full.shape[1]) if j % n_classes]
+        np.testing.assert_array_equal(compact, full[:, keep])
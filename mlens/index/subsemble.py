@@ -14,6 +14,10 @@ from ._checks import check_subsample_index
 from .base import BaseIndex, partition, make_tuple, prune_train
 
 
+# Routed prediction modes of the ClusteredSubsetIndex
+ROUTES = [None, False, 'compact', 'sparse']
+
+
 class SubsetIndex(BaseIndex):
 
     r"""Subsample index generator.
@@ -339,6 +343,25 @@ class ClusteredSubsetIndex(BaseIndex):
     raise_on_exception : bool (default = True)
         whether to warn on suspicious slices or raise an error.
 
+    route : str, optional
+        routed prediction mode. By default, learners of every partition
+        predict every observation. If ``route`` is set, observations are
+        assigned to a partition by the partition estimator and only learners
+        of that partition predict them: during fitting, the test folds of a
+        partition only span the partition, and during prediction, each
+        observation is routed to its cluster. Unseen cluster labels are
+        predicted as zeros. Requires ``partition_on='X'``. One of
+
+            - ``'compact'``: learners output one set of columns that holds
+              the prediction of the partition each observation belongs to.
+
+            - ``'sparse'``: learners output one set of columns per
+              partition, and observations have non-zero predictions only
+              in the columns of their partition. The layer outputs a sparse
+              matrix.
+
+        .. versionadded:: 0.2.2
+
     Examples
     --------
     >>> import numpy as np
@@ -382,7 +405,8 @@ class ClusteredSubsetIndex(BaseIndex):
                  fit_estimator=True,
                  attr='predict',
                  partition_on='X',
-                 raise_on_exception=True):
+                 raise_on_exception=True,
+                 route=None):
         super(ClusteredSubsetIndex, self).__init__()
         self.partition_estimator = partition_estimator
         self.fit_estimator = fit_estimator
@@ -391,8 +415,18 @@ class ClusteredSubsetIndex(BaseIndex):
         self.partitions = partitions
         self.folds = folds
         self.raise_on_exception = raise_on_exception
+        self.route = route
+
+        if route not in ROUTES:
+            raise ValueError("route must be one of %r. Got %r."
+                             % (ROUTES, route))
+        if route and partition_on != 'X':
+            raise ValueError("Routed prediction requires partition_on='X'. "
+                             "Got %r." % partition_on)
 
         self._clusters_ = None
+        self._labels_ = None
+        self._routes_ = None
         if X is not None:
             self.fit(X, y)
 
@@ -433,9 +467,36 @@ class ClusteredSubsetIndex(BaseIndex):
             # generate cluster predictions during the fit call. To minimize
             # memory consumption, store cluster indexes as list of tuples
             self._clusters_ = self._get_partitions(X, y)
+        elif job == 'predict' and self.route:
+            self._routes_ = self._get_routes(X)
         self.__fitted__ = True
         return self
 
+    def routes(self):
+        """Observations routed to each partition in the last prediction.
+
+        .. versionadded:: 0.2.2
+
+        Returns
+        -------
+        routes : list
+            list with the index tuples of the observations assigned to each
+            partition, or ``None`` for partitions without observations.
+        """
+        return self._routes_
+
+    def _get_routes(self, X):
+        """Assign observations to the partitions learnt during fit"""
+        cluster_ids = getattr(self.partition_estimator, self.attr)(X)
+
+        out = list()
+        index = np.arange(X.shape[0])
+        for c in self._labels_:
+            cluster_index = index[cluster_ids == c]
+            out.append(make_tuple(cluster_index)
+                       if cluster_index.shape[0] else None)
+        return out
+
     def partition(self, X=None, y=None, as_array=False):
         """Get partition indices for training full subset estimators.
 
@@ -494,6 +555,7 @@ class ClusteredSubsetIndex(BaseIndex):
 
         clusters = np.unique(cluster_ids)
         self.partitions = len(clusters)
+        self._labels_ = clusters
 
         # Condense the cluster index array into a list of tuples
         out = list()  # list of cluster indexes
@@ -529,8 +591,8 @@ class ClusteredSubsetIndex(BaseIndex):
 
                 tri = prt[t_start:t_stop]
 
-                # Create test set by iterating over the index range
-                tei = np.asarray([i for i in I if i not in tri])
+                # Routed test sets only span the partition
+                tei = np.setdiff1d(prt if self.route else I, tri)
 
                 # Condense indexes to list of tuples
                 tri = make_tuple(tri)
@@ -13,9 +13,10 @@ grid search and batch benchmarking. Ensembles can be treated as preprocessing
 pipelines for next-layer model selection.
 """
 
-from .model_selection import BaseEval, Evaluator, Benchmark, benchmark
+from .model_selection import (BaseEval, Evaluator, HalvingEvaluator,
+                              AsyncEvaluator, Benchmark, benchmark)
 from .ensemble_transformer import EnsembleTransformer
 
 
-__all__ = ['BaseEval', 'Evaluator',
+__all__ = ['BaseEval', 'Evaluator', 'HalvingEvaluator', 'AsyncEvaluator',
            'EnsembleTransformer', 'Benchmark', 'benchmark']
@@ -13,6 +13,7 @@ from ..index import INDEXERS
 from ..utils import check_ensemble_build, check_inputs, IdTrain
 from ..utils.exceptions import DeprecationWarning
 from ..ensemble import BaseEnsemble
+from ..parallel._base_functions import PermutedInput
 from ..externals.sklearn.validation import check_random_state
 
 import warnings
@@ -66,13 +67,12 @@ class EnsembleTransformer(BaseEnsemble):
         can result in unexpected behavior unless the exception is anticipated.
 
     sample_dim : int, default = 20
-        dimensionality of training set to sample. During a call to `fit`, a
-        random sample of size [sample_dim, sample_dim] will be sampled from the
-        training data, along with the dimensions of the training data. If in a
-        call to ``transform``, sampling the same indices on the array to
-        transform gives the same sample matrix, the transformer will reproduce
-        the predictions from the call to ``fit``, as opposed to using the
-        base learners fitted on the full training data.
+        unused. Kept for backwards compatibility. During a call to `fit`,
+        the shape and a fingerprint of the training data are stored. If in a
+        call to ``transform`` the array to transform has the same shape and
+        fingerprint, the transformer will reproduce the predictions from the
+        call to ``fit``, as opposed to using the base learners fitted on the
+        full training data.
 
     raise_on_exception : bool, default = True
         whether to issue warnings on soft exceptions or raise error.
@@ -102,6 +102,16 @@ class EnsembleTransformer(BaseEnsemble):
         documentation. To change global backend, call
         :func:`mlens.config.set_backend()`.
 
+    feature_store : obj or str, optional
+        a :class:`~mlens.utils.FeatureStore` instance, or a path to one, to
+        persist out-of-fold predictions to. When the transformer is fitted
+        on a training fold it has seen before with the same configuration,
+        predictions are read from the store and base learners are not
+        refitted. Useful for repeated meta learner searches over the same
+        base layers.
+
+        .. versionadded:: 0.2.2
+
     Examples
     --------
     >>> from mlens.model_selection import EnsembleTransformer
@@ -145,7 +155,8 @@ class EnsembleTransformer(BaseEnsemble):
                  n_jobs=-1,
                  layers=None,
                  backend=None,
-                 sample_dim=20):
+                 sample_dim=20,
+                 feature_store=None):
         warnings.warn(
             "EnsembleTransformer is depreciated and will be discontinued in "
             "0.2.2. Use ensemble classes with 'model_selection=True'.",
@@ -155,7 +166,8 @@ class EnsembleTransformer(BaseEnsemble):
                 shuffle=shuffle, random_state=random_state,
                 raise_on_exception=raise_on_exception,
                 verbose=verbose, n_jobs=n_jobs, layers=layers,
-                backend=backend, array_check=array_check)
+                backend=backend, array_check=array_check,
+                feature_store=feature_store)
 
         self.__initialized__ = 0
         self.sample_dim = sample_dim
@@ -281,8 +293,11 @@ class EnsembleTransformer(BaseEnsemble):
         y : array-like of shape = [n_samples, ] or None (default = None)
             output vector to trained estimators on.
         """
-        X, y = check_inputs(X, y, self.array_check)
+        X, y = check_inputs(
+            X, y, self.array_check, n_jobs=self._backend.n_jobs)
         self.id_train.fit(X)
+        if self._restore(X, y, **kwargs):
+            return self
         return super(EnsembleTransformer, self).fit(X, y, **kwargs)
 
     def transform(self, X, y, **kwargs):
@@ -301,25 +316,35 @@ class EnsembleTransformer(BaseEnsemble):
         y : array-like of shape = [n_samples, ] or None (default = None)
             output vector to trained estimators on.
         """
+        return self._stored(self._select, X, y, **kwargs)
+
+    def _select(self, X, y, **kwargs):
+        """Reproduce predictions from 'fit' call or predict anew."""
         if self.id_train.is_train(X):
             return self._transform(X, y, **kwargs)
         return self.predict(X, **kwargs), y
 
+    def _is_train(self, X):
+        """Check if X is the training set"""
+        return self.id_train.is_train(X)
+
     def _transform(self, X, y, **kwargs):
         """Check whether to reproduce predictions from 'fit' call or predict anew."""
         if not check_ensemble_build(self._backend):
             # No layers instantiated, but raise_on_exception is False
             return
 
-        X, y = check_inputs(X, y, check_level=self.array_check)
+        X, y = check_inputs(X, y, check_level=self.array_check,
+                            n_jobs=self._backend.n_jobs)
 
         if self.shuffle:
+            # Gather folds through the permutation instead of copying X
             r = check_random_state(self.random_state)
             idx = r.permutation(X.shape[0])
-            X = X[idx]
+            X = PermutedInput(X, idx)
             y = y[idx]
 
-        X = super(EnsembleTransformer, self).transform(X, **kwargs)
+        X = self._backend.transform(X, **kwargs)
         if X.shape[0] != y.shape[0]:
             r = y.shape[0] - X.shape[0]
             y = y[r:]
@@ -11,13 +11,20 @@ Model selection suite for tuning and benchmarking a set of estimators.
 
 from __future__ import division, with_statement
 
+import numbers
 import warnings
+import threading
+from collections import deque
 import numpy as np
 
 from ._base_functions import (parse_key, set_job, cat, check_scorer,
                               make_learners, make_tansformers, check_instances)
 from ..index import FoldIndex
 from ..parallel import ParallelEvaluation
+from ..parallel.backend import pop_processor_kwargs
+from ..parallel.hooks import dispatch_task
+from ..parallel.tracing import now
+from ..parallel._base_functions import effective_n_jobs
 from ..parallel.base import BaseBackend, IndexMixin
 from ..metrics import Data, assemble_data
 from ..utils.formatting import _flatten, _check_instances
@@ -37,6 +44,12 @@ except ImportError:
     _dict = dict
 
 
+# Warm-startable parameters. Only ensembles grown along n_estimators fit
+# the same model incrementally as from scratch: a warm-started max_iter runs
+# max_iter more iterations, and C or alpha only move the solver start point.
+WARM_START_PARAMS = ['n_estimators']
+
+
 def benchmark(X, y, scorer, cv, estimators,
               preprocessing, error_score=None, **kwargs):
     """Benchmark estimators across preprocessing pipelines.
@@ -113,9 +126,15 @@ class BaseEval(IndexMixin, BaseBackend):
 
     """Base Evaluation class."""
 
-    def __init__(self, verbose=False, array_check=2, **kwargs):
+    def __init__(self, verbose=False, array_check=2, train_score=True,
+                 **kwargs):
+        if not isinstance(train_score, (bool, numbers.Integral)) or \
+                train_score < 0:
+            raise ValueError("train_score must be a boolean or a "
+                             "non-negative integer. Got %r." % train_score)
         self.verbose = verbose
         self.array_check = array_check
+        self.train_score = train_score
         self._transformers = None
         self._learners = None
         super(BaseEval, self).__init__(**kwargs)
@@ -149,8 +168,8 @@ class BaseEval(IndexMixin, BaseBackend):
                 safe_print(self._print_eval_start(), file=f)
                 t1 = time()
 
-            self._run('estimators', parallel, args)
-            self.collect(args['dir'], 'estimators')
+            records = self._run('estimators', parallel, args)
+            self.collect(args['dir'], 'estimators', records)
 
             if self.verbose >= 2:
                 print_time(t1, '{:<13} done'.format('Evaluation'), file=f)
@@ -170,23 +189,36 @@ class BaseEval(IndexMixin, BaseBackend):
             generator = self._learners
             inp = 'main'
 
-        parallel(delayed(subtask, not _threading)()
-                 for task in generator for subtask in task(args, inp))
+        t0 = now()
+        records = parallel(delayed(subtask, not _threading)()
+                           for task in generator
+                           for subtask in task(args, inp))
 
-    def _fit(self, X, y, job):
-        X, y = check_inputs(X, y, self.array_check)
+        if args.get('hooks') is not None:
+            args['hooks'].emit('layer_done', task=case, job=args['job'],
+                               duration=now() - t0)
+        return records
+
+    def _fit(self, X, y, job, **kwargs):
+        X, y = check_inputs(X, y, self.array_check, n_jobs=self.n_jobs)
         verbose = max(self.verbose - 2, 0) if self.verbose < 15 else 0
-        with ParallelEvaluation(self.backend, self.n_jobs, verbose) as manager:
+        with ParallelEvaluation(self.backend, self.n_jobs, verbose,
+                                **pop_processor_kwargs(kwargs)) as manager:
             manager.process(self, job, X, y)
 
-    def collect(self, path, case):
+    def collect(self, path, case, records=None):
         """Collect cache estimators"""
         if case == 'transformers':
             for transformer in self._transformers:
                 transformer.collect(path)
         if case == 'estimators':
+            # Score-only learners collect data from sub-task records
+            grouped = _group_data(records)
             for learner in self._learners:
-                learner.collect(path)
+                if getattr(learner, 'score_only', False):
+                    learner.collect(path, grouped.get(learner.cache_name))
+                else:
+                    learner.collect(path)
 
     @property
     def raw_data(self):
@@ -220,6 +252,17 @@ class Benchmark(BaseEval):
     verbose : bool, int, optional
         Verbosity during estimation.
 
+    train_score : bool or int, default = True
+        whether to score estimators on the training folds. Pass an integer
+        to score on a random subsample of at most that many training rows.
+        If not ``True``, the results table reports the estimated prediction
+        time saved per fold (``saved_time``), extrapolated from the time
+        spent scoring the test fold (``test_pred_time``). ``pred_time`` is
+        the time spent scoring the training folds, and is not reported if
+        they are not scored.
+
+        .. versionadded:: 0.2.2
+
     **kwargs : optional
         Optional keyword argument to :class:`~mlens.parallel.base.BaseBackend`.
     """
@@ -302,7 +345,7 @@ class Benchmark(BaseEval):
 
         self._learners = make_learners(
             generator, self.indexer, scorer, error_score,
-            verbose=max(0, self.verbose - 14))
+            verbose=max(0, self.verbose - 14), train_score=self.train_score)
 
         job = set_job(estimators, preprocessing)
         self._fit(X, y, job)
@@ -392,14 +435,72 @@ class Evaluator(BaseEval):
                [case].[est].[draw].[fold]
 
         If ``verbose>=20``, prints to ``sys.stderr``, else ``sys.stdout``.
+
+    train_score : bool or int, default = True
+        whether to score estimators on the training folds. Pass an integer
+        to score on a random subsample of at most that many training rows.
+        If not ``True``, the results table reports the estimated prediction
+        time saved per fold (``saved_time``), extrapolated from the time
+        spent scoring the test fold (``test_pred_time``). ``pred_time`` is
+        the time spent scoring the training folds, and is not reported if
+        they are not scored.
+
+        .. versionadded:: 0.2.2
+
+    score_only : bool, default = False
+        whether to drop fitted estimators in the workers. If ``True``,
+        workers only return scores and fit and predict times, and no fitted
+        estimator is written to the estimation cache or loaded back into
+        memory.
+
+        .. versionadded:: 0.2.2
+
+    keep_top : int, optional
+        number of parameter draws per estimator to retain fitted fold
+        estimators for when ``score_only=True``. The best ``keep_top``
+        draws of each estimator are refitted on the cross-validation folds
+        after the evaluation and stored in :attr:`models_`. The stored
+        estimators are refits, not the scored estimators: unset
+        ``random_state`` parameters are fixed before the evaluation so that
+        refits reproduce the scored fits, at the cost of ``keep_top``
+        further cross-validated fits per estimator. Scores in
+        :attr:`results` are those of the evaluation. Raises a
+        ``ValueError`` if ``score_only=False``.
+
+        .. versionadded:: 0.2.2
+
+    warm_start : bool or list, default = False
+        whether to fit draws incrementally along a warm-startable
+        parameter. Draws of an estimator with a ``warm_start`` parameter
+        that differ only in one warm-startable parameter are ordered along
+        that parameter and fitted on each fold from the fitted state of the
+        previous draw, instead of from scratch. Each draw is scored as
+        usual. Draws are chained along ``n_estimators`` by default. Pass a
+        list of parameter names, in order of precedence, to chain along
+        other parameters. Draws are fitted in increasing order of the
+        parameter. The ``fit_time`` of a warm-started draw accumulates the
+        fit times along its chain, so that it is comparable to a draw
+        fitted from scratch.
+
+        For ensembles grown along ``n_estimators``, a warm-started draw is
+        identical to a draw fitted from scratch. Other parameters are not
+        equivalent: with ``warm_start=True``, an iterative solver runs a
+        further ``max_iter`` iterations from the previous draw's state, and
+        changing ``C`` or ``alpha`` only changes the solver's start point.
+
+        .. versionadded:: 0.2.2
     """
 
     def __init__(
             self, scorer, cv=2, shuffle=True, random_state=None,
             error_score=None, metrics=None, array_check=2, verbose=False,
-            **kwargs):
+            score_only=False, keep_top=None, warm_start=False, **kwargs):
         super(Evaluator, self).__init__(**kwargs)
 
+        if keep_top is not None and not score_only:
+            raise ValueError("keep_top requires score_only=True: fitted "
+                             "estimators of all draws are kept otherwise.")
+
         check_scorer(scorer)
         self.scorer = scorer
         self.scores_ = None
@@ -414,6 +515,9 @@ class Evaluator(BaseEval):
         self.array_check = array_check
         self.random_state = random_state
         self.verbose = verbose
+        self.score_only = score_only
+        self.keep_top = keep_top
+        self.warm_start = warm_start
         self._preprocessing = None
         self._transformers = None
         self._estimators = None
@@ -421,9 +525,10 @@ class Evaluator(BaseEval):
         self.n_iter = None
         self.params = None
         self.results = None
+        self.models_ = None
 
     def fit(self, X, y, estimators=None, param_dicts=None,
-            n_iter=2, preprocessing=None):
+            n_iter=2, preprocessing=None, **kwargs):
         """Fit
 
         Fit preprocessing if applicable and evaluate estimators if applicable.
@@ -496,6 +601,12 @@ class Evaluator(BaseEval):
 
                 preprocessing = {'case_name': transformer_list,}
 
+        **kwargs : optional
+            processor settings, i.e. ``hooks`` for event hooks (see
+            :class:`~mlens.parallel.hooks.Hooks`) or ``tracer``.
+
+            .. versionadded:: 0.2.2
+
         Returns
         -------
         self : instance
@@ -504,10 +615,43 @@ class Evaluator(BaseEval):
         """
         job = set_job(estimators, preprocessing)
         self._initialize(job, estimators, preprocessing, param_dicts, n_iter)
-        self._fit(X, y, job)
+        self._fit(X, y, job, **kwargs)
+        if 'evaluate' in job and self.score_only and self.keep_top:
+            self._retain(X, y, **kwargs)
         self._get_results()
         return self
 
+    def _retain(self, X, y, **kwargs):
+        """Refit the best draws of each estimator and store fold estimators"""
+        scores = self.raw_data['test_score-m']
+        groups = dict()
+        for learner in self._learners:
+            case_est, _ = parse_key(cat(learner.preprocess, learner.name))
+            groups.setdefault(case_est, list()).append(learner)
+
+        top = list()
+        for learners in groups.values():
+            learners.sort(key=lambda lr: _score(scores, lr), reverse=True)
+            top.extend(learners[:self.keep_top])
+
+        # Fresh learners keep the scores of the evaluation intact
+        retained = make_learners(
+            [(lr.preprocess, lr.name, lr.estimator, None, {}) for lr in top],
+            self.indexer, self.scorer, self.error_score,
+            verbose=max(0, self.verbose - 14), train_score=False)
+
+        learners = self._learners
+        try:
+            self._learners = retained
+            self._fit(X, y, 'evaluate', **kwargs)
+        finally:
+            self._learners = learners
+
+        self.models_ = _dict()
+        for learner in retained:
+            self.models_[cat(learner.preprocess, learner.name)] = [
+                est.estimator for est in learner._sublearners_]
+
     def _initialize(self, job, estimators, preprocessing, param_dicts, n_iter):
         """Set up generators for the job to be performed"""
         if preprocessing and isinstance(preprocessing, list):
@@ -527,14 +671,54 @@ class Evaluator(BaseEval):
             self.n_iter = n_iter
             self._draw_param_dicts(param_dicts)
 
+            estimators = _flatten(self._estimators)
+            if self.score_only and self.keep_top:
+                # Refits of the best draws must reproduce the scored fits
+                rng = np.random.RandomState(self.random_state)
+                estimators = [(p_name, l_name, _pin_random_state(est, rng))
+                              for p_name, l_name, est in estimators]
+
             generator = [
                 (p_name, l_name, est, i, params)
-                for p_name, l_name, est in _flatten(self._estimators)
+                for p_name, l_name, est in estimators
                 for i, params in enumerate(self.params[cat(p_name, l_name)])]
 
             self._learners = make_learners(
                 generator, self.indexer, self.scorer,
-                self.error_score, verbose=max(0, self.verbose - 14))
+                self.error_score, verbose=max(0, self.verbose - 14),
+                score_only=self.score_only, train_score=self.train_score)
+
+            if self.warm_start:
+                self._set_warm_start()
+
+    def _set_warm_start(self):
+        """Chain draws that differ only in a warm-startable parameter"""
+        params = WARM_START_PARAMS if self.warm_start is True \
+            else self.warm_start
+
+        chains = _dict()
+        for learner in self._learners:
+            if 'warm_start' not in learner.estimator.get_params(deep=False):
+                continue
+
+            case_est, draw = parse_key(cat(learner.preprocess, learner.name))
+            draw = self.params[case_est][int(draw)]
+            param = [p for p in params if p in draw]
+            if not param:
+                continue
+            param = param[0]
+
+            rest = tuple(sorted((k, repr(v)) for k, v in draw.items()
+                                if k != param))
+            chains.setdefault((case_est, param, rest), list()).append(
+                (draw[param], learner))
+
+        for (_, param, _), chain in chains.items():
+            if len(chain) < 2:
+                continue
+            chain.sort(key=lambda c: c[0])
+            learners = [learner for _, learner in chain]
+            learners[0].set_warm_start(param, learners[1:])
 
     def _format(self, estimators, param_dicts):
         """Ensure estimator object and param_dict object have right format."""
@@ -703,3 +887,582 @@ class Evaluator(BaseEval):
 
             tot = e * self.n_iter * c
             return int(e), int(p), int(c), int(tot)
+
+
+class _FoldSubset(FoldIndex):
+
+    """Fold index that generates the first ``n_subset`` folds only"""
+
+    def __init__(self, folds=2, X=None, raise_on_exception=True):
+        super(_FoldSubset, self).__init__(
+            folds=folds, X=X, raise_on_exception=raise_on_exception)
+        self.n_subset = None
+
+    def _gen_indices(self):
+        """Generate a subset of the K-Fold iterator."""
+        folds = super(_FoldSubset, self)._gen_indices()
+        for i, (tri, tei) in enumerate(folds):
+            if self.n_subset is not None and i >= self.n_subset:
+                return
+            yield tri, tei
+
+
+class HalvingEvaluator(Evaluator):
+
+    r"""Successive-halving model selection.
+
+    A version of the :class:`Evaluator` that spends less compute on
+    hopeless parameter draws. Each round cross-validates all surviving draws
+    on a resource budget, either a subsample of rows or a subset of the CV
+    folds, and keeps the top ``1 / factor`` share of draws of each
+    estimator by ``test_score-m``. The budget grows by ``factor`` each
+    round, and the final round evaluates the survivors on the full data
+    with all folds. If each estimator is down to a single draw before the
+    final budget is reached, the search skips directly to the final round.
+
+    The :attr:`results` table is built from the final round, as in the
+    :class:`Evaluator`. The :attr:`history_` table records the budget,
+    number of surviving draws and best score of each estimator in each
+    round.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    scorer : function
+        a scoring function that follows the Scikit-learn API. See
+        :class:`Evaluator`.
+
+    factor : int (default = 3)
+        halving factor. The number of draws is divided by, and the budget
+        multiplied by, ``factor`` each round.
+
+    resource : str (default = 'rows')
+        resource to allocate per round. One of ``'rows'`` (cross-validate
+        on a random subsample of rows) and ``'folds'`` (cross-validate on a
+        subset of the CV folds).
+
+    min_resources : int, optional
+        budget of the first round, in number of rows or folds. Defaults to
+        the budget that leaves a single draw per estimator in the final
+        round.
+
+    **kwargs : optional
+        optional arguments to :class:`Evaluator`.
+
+    Examples
+    --------
+    >>> from mlens.model_selection import HalvingEvaluator
+    >>> evl = HalvingEvaluator(scorer, cv=5, factor=3)
+    >>> evl.fit(X, y, estimators, param_dicts, n_iter=27)
+    >>> print(evl.history_)
+    """
+
+    def __init__(self, scorer, factor=3, resource='rows',
+                 min_resources=None, **kwargs):
+        super(HalvingEvaluator, self).__init__(scorer, **kwargs)
+        if self.warm_start:
+            raise ValueError("warm_start is not supported by the "
+                             "%s." % self.__class__.__name__)
+        if not isinstance(factor, int) or factor < 2:
+            raise ValueError(
+                "factor must be an integer larger than 1. Got %r." % factor)
+        if resource not in ['rows', 'folds']:
+            raise ValueError(
+                "resource must be one of 'rows' and 'folds'. "
+                "Got %r." % resource)
+
+        self.factor = factor
+        self.resource = resource
+        self.min_resources = min_resources
+        self.history_ = None
+
+        if resource == 'folds':
+            self.indexer = _FoldSubset(self.cv)
+
+    def fit(self, X, y, estimators=None, param_dicts=None,
+            n_iter=2, preprocessing=None, **kwargs):
+        """Fit
+
+        Run a successive-halving search over parameter draws. See
+        :func:`Evaluator.fit` for details on the parameters.
+
+        Returns
+        -------
+        self : instance
+            class instance with stored estimator evaluation results in
+            the ``results`` attribute and the per-round budget history in
+            the ``history_`` attribute.
+        """
+        job = set_job(estimators, preprocessing)
+        if 'evaluate' not in job:
+            return super(HalvingEvaluator, self).fit(
+                X, y, estimators, param_dicts, n_iter, preprocessing,
+                **kwargs)
+
+        X, y = check_inputs(X, y, self.array_check, n_jobs=self.n_jobs)
+        self._initialize(job, estimators, preprocessing, param_dicts, n_iter)
+
+        groups = _dict()
+        for learner in self._learners:
+            case_est, _ = parse_key(cat(learner.preprocess, learner.name))
+            groups.setdefault(case_est, list()).append(learner)
+
+        n_max = X.shape[0] if self.resource == 'rows' else self.cv
+        budgets = self._get_budgets(
+            n_max, max(len(v) for v in groups.values()))
+        order = np.random.RandomState(self.random_state).permutation(n_max)
+
+        history = list()
+        n_round = 0
+        r = 0
+        try:
+            while True:
+                budget = budgets[r]
+                n_round += 1
+                self._learners = [lr for v in groups.values() for lr in v]
+                if self.verbose:
+                    safe_print('Round %i: %i draws on %i %s' % (
+                        n_round, len(self._learners), budget, self.resource))
+
+                if self.resource == 'rows':
+                    idx = np.sort(order[:budget])
+                    self._fit(_take(X, idx), _take(y, idx), job, **kwargs)
+                else:
+                    self.indexer.n_subset = budget
+                    self._fit(X, y, job, **kwargs)
+
+                scores = self.raw_data['test_score-m']
+                for case_est, learners in groups.items():
+                    s = [_score(scores, lr) for lr in learners]
+                    history.append(('round-%i/%s' % (n_round, case_est), {
+                        'budget': budget,
+                        'draws': len(learners),
+                        'test_score-m': max(s)}))
+
+                if r == len(budgets) - 1:
+                    break
+
+                for case_est, learners in groups.items():
+                    n_keep = int(np.ceil(len(learners) / self.factor))
+                    learners = sorted(
+                        learners, key=lambda lr: _score(scores, lr),
+                        reverse=True)
+                    groups[case_est] = learners[:n_keep]
+
+                if all(len(v) == 1 for v in groups.values()):
+                    # Stop early: skip to the full budget
+                    r = len(budgets) - 1
+                else:
+                    r += 1
+        finally:
+            if self.resource == 'folds':
+                self.indexer.n_subset = None
+
+        if self.score_only and self.keep_top:
+            self._retain(X, y, **kwargs)
+        self._get_results()
+        self.history_ = Data(_history(history), decimals=3)
+        return self
+
+    def _get_budgets(self, n_max, n_draws):
+        """Budget per round, growing by factor up to the full budget"""
+        n_rounds = 1 + int(np.ceil(np.log(max(n_draws, 1)) /
+                                   np.log(self.factor)))
+
+        n_min = self.min_resources
+        if n_min is None:
+            n_min = n_max // self.factor ** (n_rounds - 1)
+
+        # Need at least two rows per fold
+        floor = 2 * self.cv if self.resource == 'rows' else 1
+        n_min = max(n_min, floor)
+
+        # Intermediate budgets must leave room to grow by factor
+        budgets = list()
+        budget = n_min
+        while budget * self.factor <= n_max:
+            budgets.append(int(budget))
+            budget *= self.factor
+        budgets.append(n_max)
+        return budgets
+
+
+def _group_data(records):
+    """Group score data shipped with sub-task records by learner"""
+    grouped = dict()
+    for record in records if records else []:
+        if isinstance(record, dict):
+            for name, data in record.get('data', ()):
+                grouped.setdefault(name, list()).append(data)
+    return grouped
+
+
+def _take(X, idx):
+    """Subsample rows of an array or data frame"""
+    if X is None:
+        return X
+    if hasattr(X, 'iloc'):
+        return X.iloc[idx]
+    return X[idx]
+
+
+def _pin_random_state(estimator, rng):
+    """Return a clone of the estimator with unset random states fixed"""
+    params = estimator.get_params(deep=True)
+    pins = dict((k, rng.randint(np.iinfo(np.int32).max))
+                for k in sorted(params)
+                if k.split('__')[-1] == 'random_state' and params[k] is None)
+    if not pins:
+        return estimator
+    return clone(estimator).set_params(**pins)
+
+
+def _score(scores, learner):
+    """Mean test score of learner, with failed fits ranked last"""
+    score = scores.get(cat(learner.preprocess, learner.name))
+    if score is None or np.isnan(score):
+        return -np.inf
+    return score
+
+
+def _history(history):
+    """Format round history as a data dictionary"""
+    data = _dict()
+    for name, values in history:
+        for key, val in values.items():
+            data.setdefault(key, _dict())[name] = val
+    return data
+
+
+class AsyncEvaluator(Evaluator):
+
+    r"""Asynchronous, barrier-free randomized search.
+
+    A version of the :class:`Evaluator` that keeps a fixed number of
+    (estimator, parameter draw, fold) fits in flight, and proposes a new
+    parameter draw as soon as a worker would otherwise go idle, instead of
+    evaluating a fixed set of draws in one parallel wave. New draws are
+    either sampled at random from the parameter distributions, or chosen
+    among a set of random candidates by a nearest-neighbour surrogate model
+    fitted on the scores of completed draws. Estimators are drawn for in
+    turn.
+
+    The search stops proposing draws once the fit budget (``max_fits``),
+    the wall-clock budget (``max_time``) or the number of draws per
+    estimator (``n_iter``) is exhausted. With a fit budget, a draw is only
+    started if all its folds fit in the budget. Once the wall-clock budget
+    is exhausted, no new fits are started and draws that have not been
+    fitted on all folds are discarded.
+
+    The :attr:`results` table is built as in the :class:`Evaluator`. The
+    :attr:`history_` table records the test score of each completed draw
+    and the time (in seconds since the search started) it completed.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    scorer : function
+        a scoring function that follows the Scikit-learn API. See
+        :class:`Evaluator`.
+
+    max_fits : int, optional
+        maximum number of fold fits.
+
+    max_time : int, float, optional
+        wall-clock budget in seconds.
+
+    n_in_flight : int, optional
+        number of fits to keep in flight. Defaults to the number of workers.
+
+    surrogate : str (default = 'random')
+        how to propose new draws. One of ``'random'`` (sample from the
+        parameter distributions) and ``'knn'`` (score ``n_candidates``
+        random candidates with a nearest-neighbour regression over
+        completed draws and pick the most promising candidate).
+
+    n_candidates : int (default = 50)
+        number of random candidates scored by the surrogate.
+
+    n_init : int (default = 3)
+        number of completed draws of an estimator before the surrogate is
+        used. Earlier draws are sampled at random.
+
+    **kwargs : optional
+        optional arguments to :class:`Evaluator`.
+
+    Examples
+    --------
+    >>> from mlens.model_selection import AsyncEvaluator
+    >>> evl = AsyncEvaluator(scorer, cv=5, max_time=600, surrogate='knn')
+    >>> evl.fit(X, y, estimators, param_dicts)
+    >>> print(evl.results)
+    """
+
+    def __init__(self, scorer, max_fits=None, max_time=None,
+                 n_in_flight=None, surrogate='random', n_candidates=50,
+                 n_init=3, **kwargs):
+        super(AsyncEvaluator, self).__init__(scorer, **kwargs)
+        if self.warm_start:
+            raise ValueError("warm_start is not supported by the "
+                             "%s." % self.__class__.__name__)
+        if surrogate not in ['random', 'knn']:
+            raise ValueError("surrogate must be one of 'random' and 'knn'. "
+                             "Got %r." % surrogate)
+        self.max_fits = max_fits
+        self.max_time = max_time
+        self.n_in_flight = n_in_flight
+        self.surrogate = surrogate
+        self.n_candidates = n_candidates
+        self.n_init = n_init
+        self.history_ = None
+        self.n_fits_ = None
+        self._param_dists = None
+        self._groups = None
+        self._scores = None
+        self._history = None
+        self._searching = False
+
+    def fit(self, X, y, estimators=None, param_dicts=None,
+            n_iter=None, preprocessing=None, **kwargs):
+        """Fit
+
+        Run an asynchronous search over parameter draws. See
+        :func:`Evaluator.fit` for details on the parameters.
+
+        Parameters
+        ----------
+        n_iter : int, optional
+            maximum number of parameter draws per estimator. At least one of
+            ``n_iter``, ``max_fits`` and ``max_time`` must be set.
+
+        Returns
+        -------
+        self : instance
+            class instance with stored estimator evaluation results in
+            the ``results`` attribute.
+        """
+        job = set_job(estimators, preprocessing)
+        if 'evaluate' not in job:
+            return super(AsyncEvaluator, self).fit(
+                X, y, estimators, param_dicts, 0, preprocessing, **kwargs)
+
+        if n_iter is None and self.max_fits is None and self.max_time is None:
+            raise ValueError("No search budget. Set at least one of n_iter, "
+                             "max_fits and max_time.")
+
+        # Set up estimators and parameter distributions, without draws
+        self._initialize(job, estimators, preprocessing,
+                         param_dicts if param_dicts else {}, 0)
+        self.n_iter = n_iter
+        self._learners = list()
+        self._groups = [(p_name, l_name, est)
+                        for p_name, l_name, est in _flatten(self._estimators)]
+        self._scores = dict()
+        for p_name, l_name, _ in self._groups:
+            self.params[cat(p_name, l_name)] = list()
+            self._scores[cat(p_name, l_name)] = list()
+        self._history = list()
+
+        self._searching = True
+        try:
+            self._fit(X, y, job, **kwargs)
+        finally:
+            self._searching = False
+
+        if self.score_only and self.keep_top:
+            self._retain(X, y, **kwargs)
+        self._get_results()
+        self.history_ = Data(_history(self._history), decimals=3)
+        return self
+
+    def _draw_param_dicts(self, param_dicts):
+        """Store parameter distributions for proposing draws"""
+        self._param_dists = param_dicts
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            super(AsyncEvaluator, self)._draw_param_dicts(param_dicts)
+
+    def _run(self, case, parallel, args):
+        """Process eval"""
+        if case != 'estimators' or not self._searching:
+            return super(AsyncEvaluator, self)._run(case, parallel, args)
+
+        t0 = now()
+        self._search(parallel, args)
+
+        if args.get('hooks') is not None:
+            args['hooks'].emit('layer_done', task=case, job=args['job'],
+                               duration=now() - t0)
+
+    def _search(self, parallel, args):
+        """Keep workers busy until the search budget is exhausted"""
+        n_in_flight = self.n_in_flight
+        if n_in_flight is None:
+            n_in_flight = effective_n_jobs(self.n_jobs, self.backend)
+
+        rng = np.random.RandomState(self.random_state)
+        ready = threading.Event()
+        counter = [0]
+        pending = deque()
+        running = list()
+        remaining = dict()
+        records = dict()
+        t0 = now()
+        n_fits = 0
+        stop = False
+
+        def callback(out):
+            """Wake up the driver"""
+            ready.set()
+
+        while True:
+            # Fill free slots with pending folds or new draws
+            while not stop and len(running) < n_in_flight:
+                if self.max_time is not None and now() - t0 >= self.max_time:
+                    stop = True
+                    break
+
+                if not pending:
+                    learner = self._propose(rng, counter, n_fits)
+                    if learner is None:
+                        stop = True
+                        break
+                    tasks = list(learner(args, 'main'))
+                    remaining[_key(learner)] = len(tasks)
+                    pending.extend((learner, task) for task in tasks)
+
+                learner, task = pending.popleft()
+                job = dispatch_task(parallel, task, callback)
+                running.append((job, learner))
+                n_fits += 1
+
+            if not running:
+                break
+
+            # Backends do not call back on failed tasks: poll as fallback
+            ready.wait(0.05)
+            ready.clear()
+
+            in_flight = list()
+            for job, learner in running:
+                if hasattr(job, 'ready') and not job.ready():
+                    in_flight.append((job, learner))
+                    continue
+
+                key = _key(learner)
+                records.setdefault(key, list()).extend(job.get())
+                remaining[key] -= 1
+                if not remaining[key]:
+                    self._complete(learner, args['dir'], records.pop(key),
+                                   now() - t0)
+            running = in_flight
+
+        # Discard draws cut short by the wall-clock budget
+        self._learners = [lr for lr in self._learners
+                          if not remaining.get(_key(lr))]
+        self.n_fits_ = n_fits
+
+    def _propose(self, rng, counter, n_fits):
+        """Propose a new draw for the next estimator with budget left"""
+        n_folds = self.indexer.folds
+        if self.max_fits is not None and n_fits + n_folds > self.max_fits:
+            return
+
+        for _ in range(len(self._groups)):
+            p_name, l_name, est = self._groups[counter[0] % len(self._groups)]
+            counter[0] += 1
+
+            key = cat(p_name, l_name)
+            dists = self._param_dists.get(key)
+            n_iter = self.n_iter if dists else 1
+            if n_iter is not None and len(self.params[key]) >= n_iter:
+                continue
+
+            params = self._suggest(key, dists, rng) if dists else {}
+            i = len(self.params[key])
+            self.params[key].append(params)
+
+            learner = make_learners(
+                [(p_name, l_name, est, i, params)], self.indexer,
+                self.scorer, self.error_score,
+                verbose=max(0, self.verbose - 14),
+                score_only=self.score_only, train_score=self.train_score)[0]
+            self._learners.append(learner)
+            return learner
+
+    def _suggest(self, key, dists, rng):
+        """Draw parameters, using the surrogate if enough draws completed"""
+        scores = self._scores[key]
+        n = 1
+        if self.surrogate == 'knn' and len(scores) >= self.n_init:
+            n = self.n_candidates
+
+        candidates = [{} for _ in range(n)]
+        for param, dist in sorted(dists.items()):
+            for i, draw in enumerate(dist.rvs(size=n, random_state=rng)):
+                candidates[i][param] = draw
+
+        if n == 1:
+            return candidates[0]
+
+        observed = [self.params[key][int(draw)] for draw, _ in scores]
+        return candidates[_knn_surrogate(
+            observed, [score for _, score in scores], candidates)]
+
+    def _complete(self, learner, path, records, t):
+        """Collect a draw fitted on all folds and record its score"""
+        if learner.score_only:
+            learner.collect(path, _group_data(records).get(_key(learner)))
+        else:
+            learner.collect(path)
+        case_est, draw = parse_key(_key(learner))
+        score = assemble_data(learner.raw_data)['test_score-m'][_key(learner)]
+
+        self._scores[case_est].append((draw, score))
+        self._history.append(('%s--%s' % (case_est, draw),
+                              {'test_score-m': score, 'completed': t}))
+        if self.verbose >= 2:
+            safe_print('%-30s %.3f (%.1fs)' % (_key(learner), score, t))
+
+
+def _key(learner):
+    """Data table key of an evaluation learner"""
+    return cat(learner.preprocess, learner.name)
+
+
+def _knn_surrogate(observed, scores, candidates, k=3):
+    """Index of the most promising candidate under a nearest-neighbour model.
+
+    Candidates are scored by the inverse-distance weighted mean score of
+    their ``k`` nearest completed draws, plus an exploration bonus that
+    grows with the distance to the nearest completed draw. Only numeric
+    parameters are used. Parameters are scaled by their standard deviation.
+    """
+    keys = [key for key in sorted(candidates[0])
+            if all(isinstance(p.get(key), (int, float, np.number))
+                   for p in list(observed) + list(candidates))]
+    if not keys:
+        return 0
+
+    obs = np.array([[p[key] for key in keys] for p in observed], dtype=float)
+    cand = np.array([[p[key] for key in keys] for p in candidates],
+                    dtype=float)
+    scale = np.vstack([obs, cand]).std(axis=0)
+    scale[scale == 0] = 1
+    obs /= scale
+    cand /= scale
+
+    scores = np.asarray(scores, dtype=float)
+    scores[np.isnan(scores)] = np.nanmin(scores) if \
+        not np.isnan(scores).all() else 0
+
+    dist = np.sqrt(((cand[:, None, :] - obs[None, :, :]) ** 2).sum(axis=2))
+    k = min(k, obs.shape[0])
+    idx = np.argsort(dist, axis=1)[:, :k]
+    rows = np.arange(cand.shape[0])[:, None]
+    weights = 1. / (dist[rows, idx] + 1e-12)
+    pred = (weights * scores[idx]).sum(axis=1) / weights.sum(axis=1)
+    bonus = dist.min(axis=1) * scores.std()
+    return int(np.argmax(pred + bonus))
@@ -3,13 +3,18 @@
 Test model selection.
 """
 import os
+import time
 import numpy as np
-from mlens.model_selection import Evaluator, benchmark
+from mlens.model_selection import (Evaluator, HalvingEvaluator,
+                                   AsyncEvaluator, benchmark)
 from mlens.metrics import mape, make_scorer
+from mlens.model_selection._base_functions import cat
+from mlens.externals.sklearn.base import BaseEstimator
 from mlens.utils.exceptions import FitFailedWarning
 from mlens.utils.dummy import OLS, Scale
 from mlens.testing import Data
 from scipy.stats import randint
+from sklearn.ensemble import RandomForestRegressor
 
 try:
     from contextlib import redirect_stdout, redirect_stderr
@@ -31,6 +36,27 @@ mape_scorer = make_scorer(mape, greater_is_better=False)
 bad_scorer = make_scorer(failed_score)
 
 
+class Trees(BaseEstimator):
+
+    """Warm-startable estimator with a fixed fit time per tree"""
+
+    def __init__(self, n_estimators=10, warm_start=False):
+        self.n_estimators = n_estimators
+        self.warm_start = warm_start
+
+    def fit(self, X, y):
+        n = self.n_estimators
+        if self.warm_start and hasattr(self, 'n_fitted_'):
+            n -= self.n_fitted_
+        time.sleep(0.002 * n)
+        self.n_fitted_ = self.n_estimators
+        self.mean_ = np.mean(y)
+        return self
+
+    def predict(self, X):
+        return np.full(X.shape[0], self.mean_)
+
+
 def test_check():
     """[Model Selection] Test check of valid estimator."""
     np.testing.assert_raises(ValueError, Evaluator, mape)
@@ -176,3 +202,256 @@ def test_bench_equality():
 
     np.testing.assert_approx_equal(out['test_score-m']['no.ols'],
                                    evl.results['test_score-m']['no.ols'])
+
+
+def test_halving_raises():
+    """[Model Selection] Test halving evaluator raises on bad params."""
+    np.testing.assert_raises(ValueError, HalvingEvaluator, mape_scorer,
+                             factor=1)
+    np.testing.assert_raises(ValueError, HalvingEvaluator, mape_scorer,
+                             resource='cols')
+
+
+def test_halving_budgets():
+    """[Model Selection] Test halving evaluator budgets."""
+    evl = HalvingEvaluator(mape_scorer, cv=2, factor=3)
+    assert evl._get_budgets(300, 9) == [33, 99, 300]
+    assert evl._get_budgets(300, 1) == [300]
+    assert evl._get_budgets(10, 9) == [10]
+
+    evl = HalvingEvaluator(mape_scorer, cv=5, resource='folds', factor=2,
+                           min_resources=2)
+    assert evl._get_budgets(5, 8) == [2, 5]
+
+
+def test_halving():
+    """[Model Selection] Test successive halving across resources."""
+    for resource in ['rows', 'folds']:
+        evl = HalvingEvaluator(mape_scorer, cv=4, factor=2, shuffle=False,
+                               resource=resource, random_state=100)
+
+        with open(os.devnull, 'w') as f, redirect_stdout(f):
+            evl.fit(X, y,
+                    estimators=[OLS()],
+                    param_dicts={'ols': {'offset': randint(1, 10)}},
+                    preprocessing={'pr': [Scale()], 'no': []},
+                    n_iter=4)
+
+        # Same table as the evaluator
+        assert sorted(evl.results['test_score-m']) == ['no.ols', 'pr.ols']
+        assert 'offset' in evl.results['params']['no.ols']
+
+        rounds = sorted(set(k.split('/')[0] for k in evl.history_['budget']))
+        budgets = [evl.history_['budget']['%s/no.ols' % r] for r in rounds]
+        draws = [evl.history_['draws']['%s/no.ols' % r] for r in rounds]
+        assert budgets == sorted(budgets)
+        assert budgets[-1] == (X.shape[0] if resource == 'rows' else 4)
+        assert draws[0] == 4
+        assert draws == sorted(draws, reverse=True)
+
+        # Final round is a full cross-validation of the best draw
+        best = evl.results['params']['no.ols']
+        ref = Evaluator(mape_scorer, cv=4, shuffle=False)
+        ref.fit(X, y, estimators=[OLS(**best)], param_dicts={},
+                preprocessing={'no': []})
+        np.testing.assert_approx_equal(
+            evl.results['test_score-m']['no.ols'],
+            ref.results['test_score-m']['no.ols'])
+        assert evl.indexer.folds == 4
+
+
+def test_async_raises():
+    """[Model Selection] Test async evaluator raises on bad params."""
+    np.testing.assert_raises(ValueError, AsyncEvaluator, mape_scorer,
+                             surrogate='gp')
+
+    evl = AsyncEvaluator(mape_scorer)
+    np.testing.assert_raises(ValueError, evl.fit, X, y, estimators=[OLS()],
+                             param_dicts={'ols': {'offset': randint(1, 10)}})
+
+
+def test_async():
+    """[Model Selection] Test async search with a fit budget."""
+    for backend in ['threading', 'multiprocessing']:
+        for surrogate in ['random', 'knn']:
+            evl = AsyncEvaluator(mape_scorer, cv=2, max_fits=16,
+                                 n_in_flight=3, surrogate=surrogate,
+                                 n_init=2, backend=backend, n_jobs=2,
+                                 random_state=100)
+            with open(os.devnull, 'w') as f, redirect_stdout(f):
+                evl.fit(X, y,
+                        estimators=[OLS()],
+                        param_dicts={'ols': {'offset': randint(1, 10)}},
+                        preprocessing={'pr': [Scale()], 'no': []})
+
+            assert evl.n_fits_ == 16
+            assert sorted(evl.results['test_score-m']) == ['no.ols', 'pr.ols']
+            assert 'offset' in evl.results['params']['no.ols']
+            assert len(evl.history_['test_score-m']) == 8
+            assert len(evl.params['no.ols']) == 4
+
+
+def test_async_n_iter():
+    """[Model Selection] Test async search stops at n_iter."""
+    evl = AsyncEvaluator(mape_scorer, cv=2, random_state=100)
+    evl.fit(X, y, estimators=[OLS()],
+            param_dicts={'ols': {'offset': randint(1, 10)}}, n_iter=3)
+    assert evl.n_fits_ == 6
+    assert len(evl.params['ols']) == 3
+
+    ref = Evaluator(mape_scorer, cv=2)
+    ref.fit(X, y, estimators=[OLS(**evl.results['params']['ols'])],
+            param_dicts={})
+    np.testing.assert_approx_equal(evl.results['test_score-m']['ols'],
+                                   ref.results['test_score-m']['ols'])
+
+
+def test_score_only():
+    """[Model Selection] Test score-only evaluation with top-k retention."""
+    for backend in ['threading', 'multiprocessing']:
+        results = list()
+        for keep_top in [None, 2]:
+            evl = Evaluator(mape_scorer, cv=2, shuffle=False,
+                            keep_top=keep_top, random_state=100,
+                            score_only=bool(keep_top), backend=backend)
+            evl.fit(X, y,
+                    estimators=[OLS()],
+                    param_dicts={'ols': {'offset': randint(1, 10)}},
+                    preprocessing={'pr': [Scale()], 'no': []},
+                    n_iter=4)
+            results.append(evl.results)
+
+        assert results[0]['test_score-m'] == results[1]['test_score-m']
+        assert results[0]['params'] == results[1]['params']
+
+        # Only the two best draws per estimator are retained
+        assert len(evl.models_) == 4
+        for key, models in evl.models_.items():
+            assert len(models) == 2
+            assert models[0].coef_ is not None
+        for learner in evl._learners:
+            assert learner._sublearners_ is None or \
+                cat(learner.preprocess, learner.name) in evl.models_
+
+    np.testing.assert_raises(ValueError, Evaluator, mape_scorer, keep_top=2)
+
+
+def test_keep_top_random_state():
+    """[Model Selection] Test retained models reproduce their scores."""
+    evl = Evaluator(mape_scorer, cv=2, score_only=True, keep_top=2,
+                    random_state=1)
+    evl.fit(X, y, estimators=[RandomForestRegressor()],
+            param_dicts={'randomforestregressor':
+                         {'n_estimators': randint(2, 10)}},
+            n_iter=4)
+
+    assert evl._learners[0].estimator.random_state is not None
+    scores = evl.raw_data['test_score-m']
+    folds = list(evl.indexer.generate())
+    for key, models in evl.models_.items():
+        score = np.mean([mape_scorer(m, X[i:j], y[i:j])
+                         for m, (_, (i, j)) in zip(models, folds)])
+        np.testing.assert_approx_equal(score, scores[key])
+
+
+def test_train_score():
+    """[Model Selection] Test skipping and subsampling train scoring."""
+    for train_score in [-1, 1.5, None, 'all']:
+        np.testing.assert_raises(ValueError, Evaluator, mape_scorer,
+                                 train_score=train_score)
+    Evaluator(mape_scorer, train_score=np.int64(5))
+
+    ref = Evaluator(mape_scorer, cv=2, shuffle=False, random_state=100)
+    ref.fit(X, y, estimators=[OLS()],
+            param_dicts={'ols': {'offset': randint(1, 10)}}, n_iter=2)
+    assert 'saved_time-m' not in ref.results
+    assert 'test_pred_time-m' not in ref.results
+
+    for train_score in [False, 0, 5, 1000]:
+        evl = Evaluator(mape_scorer, cv=2, shuffle=False, random_state=100,
+                        train_score=train_score)
+        evl.fit(X, y, estimators=[OLS()],
+                param_dicts={'ols': {'offset': randint(1, 10)}}, n_iter=2)
+
+        assert evl.results['test_score-m'] == ref.results['test_score-m']
+        assert evl.results['saved_time-m']['ols'] >= 0
+        assert evl.results['test_pred_time-m']['ols'] >= 0
+        if train_score in [False, 0]:
+            assert 'train_score-m' not in evl.results
+            assert 'pred_time-m' not in evl.results
+        else:
+            assert 'train_score-m' in evl.results
+            assert 'pred_time-m' in evl.results
+        if train_score == 1000:
+            np.testing.assert_approx_equal(
+                evl.results['train_score-m']['ols'],
+                ref.results['train_score-m']['ols'])
+
+
+def test_benchmark_train_score():
+    """[Model Selection] Test benchmark without train scoring."""
+    with open(os.devnull, 'w') as f, redirect_stdout(f):
+        out = benchmark(X, y, mape_scorer, 2, [OLS()], None,
+                        train_score=False)
+    assert 'train_score-m' not in out
+    assert 'saved_time-m' in out
+
+
+def test_warm_start():
+    """[Model Selection] Test warm-started draws match fits from scratch."""
+    np.testing.assert_raises(ValueError, HalvingEvaluator, mape_scorer,
+                             warm_start=True)
+    np.testing.assert_raises(ValueError, AsyncEvaluator, mape_scorer,
+                             warm_start=True)
+
+    Xf, yf = np.random.RandomState(1).rand(60, 3), np.arange(60) % 2
+
+    evals = list()
+    for warm_start in [False, True]:
+        for score_only in [False, True]:
+            evl = Evaluator(mape_scorer, cv=2, random_state=100,
+                            warm_start=warm_start, score_only=score_only)
+            evl.fit(Xf, yf,
+                    estimators=[RandomForestRegressor(random_state=0)],
+                    param_dicts={'randomforestregressor':
+                                 {'n_estimators': randint(1, 20)}},
+                    preprocessing={'pr': [Scale()], 'no': []},
+                    n_iter=4)
+            evals.append(evl)
+
+    ref = evals[0].raw_data['test_score-m']
+    for evl in evals[1:]:
+        scores = evl.raw_data['test_score-m']
+        assert sorted(scores) == sorted(ref)
+        for key in ref:
+            np.testing.assert_approx_equal(scores[key], ref[key])
+
+    # Draws are chained along n_estimators
+    learners = [lr for lr in evals[2]._learners if lr._warm_chain]
+    assert len(learners) == 2
+    for learner in learners:
+        values = [learner.estimator.n_estimators] + [
+            lr.estimator.n_estimators for lr in learner._warm_chain]
+        assert len(values) == 4
+        assert values == sorted(values)
+
+        # Warm starts are not set on the draws' estimators
+        assert not any(lr.estimator.warm_start
+                       for lr in [learner] + learner._warm_chain)
+
+
+def test_warm_start_fit_time():
+    """[Model Selection] Test warm-started draws report the full fit time."""
+    times = list()
+    for warm_start in [False, True]:
+        evl = Evaluator(mape_scorer, cv=2, random_state=100,
+                        warm_start=warm_start)
+        evl.fit(X, y, estimators=[Trees()],
+                param_dicts={'trees': {'n_estimators': randint(10, 60)}},
+                n_iter=4)
+        times.append(evl.raw_data['fit_time-m'])
+
+    assert [lr for lr in evl._learners if lr._warm_chain]
+    cold, warm = times
+    for key in cold:
+        assert warm[key] > 0.8 * cold[key]
@@ -16,6 +16,10 @@ from .learner import Learner, EvalLearner, Transformer, EvalTransformer
 from .layer import Layer
 from .handles import Group, make_group, Pipeline
 from .wrapper import run, get_backend
+from .tracing import Tracer
+from .hooks import Hooks, Metrics
+from .loaders import FileInput, register_loader
+from .columnar import ColumnarInput
 
 __all__ = ['ParallelProcessing',
            'ParallelEvaluation',
@@ -30,5 +34,11 @@ __all__ = ['ParallelProcessing',
            'make_group',
            'run',
            'get_backend',
-           'dump_array'
+           'dump_array',
+           'Tracer',
+           'Hooks',
+           'Metrics',
+           'FileInput',
+           'register_loader',
+           'ColumnarInput',
            ]
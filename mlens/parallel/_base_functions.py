@@ -9,13 +9,39 @@ Functions for base computations
 from __future__ import division
 
 import os
+import glob
+import numbers
 import warnings
+import threading
 from copy import deepcopy
-from scipy.sparse import issparse
+from contextlib import contextmanager
+from multiprocessing import cpu_count, current_process
+from scipy.sparse import issparse, isspmatrix_csr, csr_matrix
 import numpy as np
 
 from ..utils import pickle_load, pickle_save, load as _load
-from ..utils.exceptions import MetricWarning
+from ..utils.exceptions import MetricWarning, ParallelProcessingWarning
+from .storage import StoredArray
+from .columnar import is_columnar
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# Whether the missing threadpoolctl warning has been issued
+_THREADPOOL_WARNED = False
+
+
+# Cpus of each NUMA node
+NODE_PATH = '/sys/devices/system/node/node*/cpulist'
+
+# Cpus the current worker has been pinned to
+_PINNED = None
+
+# Estimator parameters that control estimator-level parallelism
+THREAD_PARAMS = ['n_jobs', 'nthread', 'n_threads', 'num_threads',
+                 'thread_count']
 
 
 def load(path, name, raise_on_exception=True):
@@ -137,11 +163,34 @@ def set_output_columns(
         obj.output_columns = col_dict
 
 
-def slice_array(x, y, idx, r=0):
-    """Build training array index and slice data."""
+def slice_array(x, y, idx, r=0, ordered=True):
+    """Build training array index and slice data.
+
+    If ``ordered=False``, rows may be returned in any order as long as
+    ``x`` and ``y`` are aligned. All rows of a permuted input are then
+    returned unpermuted, with ``y`` reordered to match, instead of gathered
+    into a permuted copy.
+    """
     if idx == 'all':
         idx = None
 
+    if isinstance(x, PermutedInput):
+        if not idx and not ordered and \
+                x.order.shape[0] == x.array.shape[0]:
+            # Full fit: only reorder the targets
+            if y is not None:
+                z = np.empty_like(y)
+                z[x.order] = y
+                y = z
+            x = x.array
+        else:
+            # Gather the rows of the fold from the unpermuted array
+            rows = fold_rows(idx, r) if idx else None
+            x = x.take(rows)
+            if rows is not None and y is not None:
+                y = y[rows]
+        idx = None
+
     if idx:
         # Check if the idx is a tuple and if so, whether it can be made
         # into a simple slice
@@ -151,7 +200,7 @@ def slice_array(x, y, idx, r=0):
                 # of the slice in question to be made
                 simple_slice = False
                 idx = np.hstack([np.arange(t0 - r, t1 - r) for t0, t1 in idx])
-                x = x[idx]
+                x = take_csr(x, idx) if isspmatrix_csr(x) else x[idx]
                 y = y[idx] if y is not None else y
             else:
                 # The tuple is of the form ((a, b),) and can be made
@@ -164,18 +213,265 @@ def slice_array(x, y, idx, r=0):
             simple_slice = True
 
         if simple_slice:
-            x = x[slice(idx[0] - r, idx[1] - r)]
+            if isspmatrix_csr(x):
+                x = slice_csr(x, idx[0] - r, idx[1] - r)
+            else:
+                x = x[slice(idx[0] - r, idx[1] - r)]
             y = y[slice(idx[0] - r, idx[1] - r)] if y is not None else y
 
     # Cast as ndarray to avoid passing memmaps to estimators
     if y is not None:
         y = y.view(type=np.ndarray)
-    if not issparse(x):
+    if isinstance(x, StoredArray):
+        # Decode the full array
+        x = x[...]
+    if not issparse(x) and not is_columnar(x):
+        # Columnar inputs are passed as views, see ColumnarInput
         x = x.view(type=np.ndarray)
 
     return x, y
 
 
+def n_rows(idx):
+    """Number of rows in an index of the form (a, b) or ((a, b), ...)"""
+    if isinstance(idx[0], tuple):
+        return sum(t1 - t0 for t0, t1 in idx)
+    return idx[1] - idx[0]
+
+
+def subsample_index(idx, n, seed=None):
+    """Draw a sorted random subsample of ``n`` rows from a fold index.
+
+    Parameters
+    ----------
+    idx : tuple
+        index of the form (a, b) or ((a, b), ...).
+
+    n : int
+        number of rows to draw.
+
+    seed : int, optional
+        seed for the draw.
+
+    Returns
+    -------
+    rows : array
+        sorted array of row indices.
+    """
+    if not isinstance(idx[0], tuple):
+        idx = (idx,)
+    rows = np.hstack([np.arange(t0, t1) for t0, t1 in idx])
+    rng = np.random.RandomState(seed)
+    return np.sort(rng.choice(rows, n, replace=False))
+
+
+def fold_rows(idx, r=0):
+    """Array of the rows in an index of the form (a, b) or ((a, b), ...)"""
+    if not isinstance(idx[0], tuple):
+        idx = (idx,)
+    return np.hstack([np.arange(t0 - r, t1 - r) for t0, t1 in idx])
+
+
+def take_rows(x, rows):
+    """Rows of an array, csr matrix, columnar or permuted input"""
+    if isinstance(x, PermutedInput):
+        return x.take(rows)
+    return take_csr(x, rows) if isspmatrix_csr(x) else x[rows]
+
+
+def contiguous(rows):
+    """Bounds ``(start, stop)`` of ascending consecutive rows, or None"""
+    rows = np.asarray(rows)
+    if rows.ndim != 1 or not rows.shape[0] or rows.dtype == bool:
+        return None
+    start, stop = int(rows[0]), int(rows[-1]) + 1
+    if stop - start != rows.shape[0] or \
+            (rows.shape[0] > 1 and not (np.diff(rows) == 1).all()):
+        return None
+    return start, stop
+
+
+def take_array(x, y, rows):
+    """Slice data on an array of row indices."""
+    x = take_rows(x, rows)
+    y = y[rows] if y is not None else y
+    if y is not None:
+        y = y.view(type=np.ndarray)
+    if not issparse(x) and not is_columnar(x):
+        x = x.view(type=np.ndarray)
+    return x, y
+
+
+class PermutedInput(object):
+
+    """Rows of an array in permuted order, without copying the array.
+
+    Shuffling a layer's input wraps it in a :class:`PermutedInput`. The
+    permutation is composed into the row indices of each fold, so that folds
+    are gathered directly from the unpermuted array, i.e. a memmap shared
+    between workers, instead of from a shuffled copy of the full array.
+    Rows that are stored consecutively in ``array`` are returned as a view,
+    so that an input reordered to make folds contiguous (see
+    :func:`~mlens.parallel.backend.reorder_array`) is sliced without copies.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    array : array-like, sparse matrix, columnar input
+        input array. A :class:`PermutedInput` is unwrapped and the
+        permutations composed.
+
+    order : array-like of int
+        row of ``array`` at each position of the permuted input.
+    """
+
+    def __init__(self, array, order):
+        order = np.asarray(order)
+        if isinstance(array, PermutedInput):
+            order = array.order[order]
+            array = array.array
+        self.array = array
+        self.order = order
+
+    def __repr__(self):
+        return '%s(shape=%r)' % (self.__class__.__name__, self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def shape(self):
+        """Shape of input"""
+        return (self.order.shape[0],) + tuple(self.array.shape[1:])
+
+    @property
+    def ndim(self):
+        """Number of dimensions"""
+        return self.array.ndim
+
+    @property
+    def dtype(self):
+        """Dtype of input"""
+        return self.array.dtype
+
+    def take(self, rows=None):
+        """Gather rows of the permuted input.
+
+        Parameters
+        ----------
+        rows : int, slice, array-like, optional
+            positions in the permuted input. Defaults to all rows.
+        """
+        order = self.order if rows is None else self.order[rows]
+        bounds = contiguous(order) if isinstance(order, np.ndarray) else None
+        if bounds is not None:
+            x = self.array
+            if isspmatrix_csr(x):
+                return slice_csr(x, *bounds)
+            return x[slice(*bounds)]
+        return take_rows(self.array, order)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.take(key[0])[(slice(None),) + key[1:]]
+        return self.take(key)
+
+    def __array__(self, dtype=None):
+        out = np.asarray(self.take())
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+
+def _ndarray(a):
+    """View of an array as a plain ndarray"""
+    return a.view(type=np.ndarray) if isinstance(a, np.ndarray) else a
+
+
+def slice_csr(x, start, stop):
+    """Rows ``start:stop`` of a csr matrix without copying.
+
+    The data and indices of the slice are views of those of ``x``, so that
+    slicing a memory-mapped matrix reads no data.
+
+    .. versionadded:: 0.2.2
+    """
+    start, stop, _ = slice(start, stop).indices(x.shape[0])
+    stop = max(start, stop)
+    a, b = x.indptr[start], x.indptr[stop]
+
+    # Set components directly: the constructor copies small views
+    out = csr_matrix((stop - start, x.shape[1]), dtype=x.dtype)
+    out.data = _ndarray(x.data[a:b])
+    out.indices = _ndarray(x.indices[a:b])
+    out.indptr = (np.asarray(x.indptr[start:stop + 1]) - a).astype(
+        x.indices.dtype)
+    out.has_sorted_indices = x.has_sorted_indices
+    return out
+
+
+def take_csr(x, rows):
+    """Rows of a csr matrix by an array of row indices.
+
+    Gathers the stored values of each row directly, without the format
+    conversions of fancy indexing.
+
+    .. versionadded:: 0.2.2
+    """
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        rows = np.flatnonzero(rows)
+    start, stop = x.indptr[rows], x.indptr[rows + 1]
+    lengths = stop - start
+    indptr = np.zeros(rows.shape[0] + 1, dtype=x.indptr.dtype)
+    np.cumsum(lengths, out=indptr[1:])
+    src = np.repeat(start - indptr[:-1], lengths) + np.arange(indptr[-1])
+    out = csr_matrix((x.data[src], x.indices[src], indptr),
+                     shape=(rows.shape[0], x.shape[1]), copy=False)
+    out.has_sorted_indices = x.has_sorted_indices
+    return out
+
+
+def hstack_csr(blocks, dtype=None):
+    """Stack sparse and dense blocks horizontally into a csr matrix.
+
+    Rows are concatenated in place from the csr structure of each block,
+    avoiding the coo and lil conversions of :func:`scipy.sparse.hstack`.
+    Zeros of dense blocks are not stored.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    blocks : list
+        sparse matrices and arrays of equal number of rows.
+
+    dtype : numpy dtype, optional
+        dtype of the output. Defaults to the common dtype of the blocks.
+    """
+    blocks = [csr_matrix(b) if not isspmatrix_csr(b) else b for b in blocks]
+    if dtype is None:
+        dtype = np.result_type(*[b.dtype for b in blocks])
+    n = blocks[0].shape[0]
+
+    lengths = [np.diff(b.indptr) for b in blocks]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.sum(lengths, axis=0), out=indptr[1:])
+
+    data = np.empty(indptr[-1], dtype=dtype)
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    offset = indptr[:-1].copy()
+    col = 0
+    for b, length in zip(blocks, lengths):
+        # Destination of each stored value: row offset plus rank in row
+        dst = np.repeat(offset - b.indptr[:-1], length) + \
+            np.arange(b.indptr[0], b.indptr[-1])
+        data[dst] = b.data[b.indptr[0]:b.indptr[-1]]
+        indices[dst] = b.indices[b.indptr[0]:b.indptr[-1]] + col
+        offset += length
+        col += b.shape[1]
+    return csr_matrix((data, indices, indptr), shape=(n, col))
+
+
 def assign_predictions(pred, p, tei, col, n):
     """Assign predictions to memmaped prediction array."""
     if tei == 'all':
@@ -271,3 +567,312 @@ def check_stack(new_items, stack):
         if item.name in names:
             raise ValueError("Name (%s) already exists in stack. "
                              "Rename before attempting to push." % item.name)
+
+
+def effective_n_jobs(n_jobs, backend=None):
+    """Number of workers that will run concurrently"""
+    if backend == 'sequential' or n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(cpu_count() + 1 + n_jobs, 1)
+    return max(n_jobs, 1)
+
+
+def check_threads(threads, n_jobs, backend=None):
+    """Resolve the thread budget of a task.
+
+    Parameters
+    ----------
+    threads : int, str, None
+        Requested budget. ``None`` leaves thread pools untouched,
+        ``'auto'`` splits the available cores evenly between the
+        ``n_jobs`` outer workers, and an integer sets an explicit cap.
+
+    n_jobs : int
+        Number of outer workers.
+
+    backend : str, optional
+        Backend of outer workers.
+
+    Returns
+    -------
+    threads : int, None
+        Number of threads each task may use.
+
+    Warns
+    -----
+    ParallelProcessingWarning
+        Once per process if a budget is set but ``threadpoolctl`` is not
+        installed, in which case only estimator parameters are capped.
+    """
+    global _THREADPOOL_WARNED
+    if threads is None:
+        return None
+    if threads == 'auto':
+        threads = max(cpu_count() // effective_n_jobs(n_jobs, backend), 1)
+    elif not isinstance(threads, numbers.Integral) or \
+            isinstance(threads, bool) or threads <= 0:
+        raise ValueError("threads must be one of None, 'auto' or a positive "
+                         "integer. Got %r" % (threads,))
+
+    if threadpool_limits is None and not _THREADPOOL_WARNED:
+        _THREADPOOL_WARNED = True
+        warnings.warn("threadpoolctl is not installed: BLAS and OpenMP "
+                      "thread pools will not be capped, only estimator "
+                      "parameters such as n_jobs. Install threadpoolctl "
+                      "to enforce the thread budget.",
+                      ParallelProcessingWarning)
+    return int(threads)
+
+
+def _get_thread_params(estimator):
+    """Find estimator parameters that set estimator-level parallelism"""
+    try:
+        params = estimator.get_params(deep=True)
+    except (AttributeError, TypeError):
+        return {}
+    return dict((k, v) for k, v in params.items()
+                if k.split('__')[-1] in THREAD_PARAMS)
+
+
+@contextmanager
+def limit_threads(threads, estimator=None):
+    """Context manager for capping the number of threads of a task.
+
+    Within the context, BLAS and OpenMP thread pools of the current process
+    are capped at ``threads``, and any estimator-level parallelism parameter
+    (i.e. ``n_jobs``) of ``estimator`` is set to ``threads``. Estimator
+    parameters are restored on exit.
+
+    Thread pools are process-wide. To avoid concurrent threads overwriting
+    each other's limits, thread pools are only capped when called from the
+    main thread of a process. With ``backend='threading'``, the processor
+    applies a joint cap before dispatching tasks. Capping thread pools
+    requires ``threadpoolctl``; otherwise only estimator parameters are
+    capped, since runtimes already running in a worker do not read
+    environment variables again.
+
+    Parameters
+    ----------
+    threads : int, None
+        Thread cap. If ``None``, the context is a no-op.
+
+    estimator : obj, optional
+        estimator whose ``n_jobs``-type parameters should be capped.
+    """
+    if not threads:
+        yield
+        return
+
+    params = _get_thread_params(estimator) if estimator is not None else {}
+    if params:
+        estimator.set_params(**dict((k, threads) for k in params))
+
+    main_thread = threading.current_thread().name == 'MainThread'
+    try:
+        if main_thread and threadpool_limits is not None:
+            with threadpool_limits(limits=threads):
+                yield
+        else:
+            yield
+    finally:
+        if params:
+            estimator.set_params(**params)
+
+
+def _parse_cpulist(cpulist):
+    """Parse a cpu list of the form '0-3,8,10-11'"""
+    cpus = list()
+    for part in cpulist.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            start, stop = part.split('-')
+            cpus.extend(range(int(start), int(stop) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def numa_nodes():
+    """List of cpus available to the process, grouped by NUMA node"""
+    if hasattr(os, 'sched_getaffinity'):
+        available = set(os.sched_getaffinity(0))
+    else:
+        available = set(range(cpu_count()))
+
+    def node_id(f):
+        """Node number of a sysfs node path"""
+        return int(os.path.basename(os.path.dirname(f))[4:])
+
+    nodes = list()
+    for f in sorted(glob.glob(NODE_PATH), key=node_id):
+        with open(f) as node:
+            cpus = [c for c in _parse_cpulist(node.read()) if c in available]
+        if cpus:
+            nodes.append(cpus)
+
+    if not nodes:
+        nodes = [sorted(available)]
+    return nodes
+
+
+def check_affinity(affinity, n_jobs, backend=None):
+    """Build a plan for pinning workers to cpus.
+
+    Parameters
+    ----------
+    affinity : str, list, None
+        Affinity policy. ``'compact'`` fills the cpus of one NUMA node before
+        moving on to the next, ``'scatter'`` distributes workers round-robin
+        across NUMA nodes. A list assigns worker ``i`` to the cpu (or
+        iterable of cpus) in position ``i``.
+
+    n_jobs : int
+        number of workers.
+
+    backend : str, optional
+        backend of workers.
+
+    Returns
+    -------
+    plan : list, None
+        list of ``(node, cpus)`` tuples, one per worker, or ``None`` if no
+        pinning should be done.
+    """
+    if affinity is None:
+        return None
+
+    if not hasattr(os, 'sched_setaffinity'):
+        warnings.warn("CPU affinity is not supported on this platform. "
+                      "Workers will not be pinned.", ParallelProcessingWarning)
+        return None
+
+    n = effective_n_jobs(n_jobs, backend)
+    nodes = numa_nodes()
+    node_of = dict((c, i) for i, cpus in enumerate(nodes) for c in cpus)
+
+    if affinity == 'compact':
+        cpus = [c for node in nodes for c in node]
+        plan = [cpus[i % len(cpus)] for i in range(n)]
+    elif affinity == 'scatter':
+        plan = list()
+        for i in range(n):
+            node = nodes[i % len(nodes)]
+            plan.append(node[(i // len(nodes)) % len(node)])
+    elif isinstance(affinity, (list, tuple)) and affinity:
+        plan = [affinity[i % len(affinity)] for i in range(n)]
+    else:
+        raise ValueError("affinity must be one of 'compact', 'scatter' or a "
+                         "list of cpus. Got %r" % (affinity,))
+
+    out = list()
+    for cpus in plan:
+        cpus = [cpus] if isinstance(cpus, int) else list(cpus)
+        out.append((node_of.get(cpus[0], 0), cpus))
+    return out
+
+
+def pin_worker(plan):
+    """Pin the current worker process according to an affinity plan.
+
+    Only worker processes are pinned. In the main process (i.e. with the
+    ``threading`` or ``sequential`` backends) this function is a no-op.
+
+    Parameters
+    ----------
+    plan : list, None
+        affinity plan. See :func:`check_affinity`.
+
+    Returns
+    -------
+    node : int, None
+        NUMA node of the worker.
+    """
+    global _PINNED
+    process = current_process()
+    # pylint: disable=protected-access
+    if not plan or not process._identity:
+        return None
+
+    # Pool workers are numbered consecutively from 1 as they are spawned
+    node, cpus = plan[(process._identity[-1] - 1) % len(plan)]
+    if _PINNED != cpus:
+        os.sched_setaffinity(0, cpus)
+        _PINNED = cpus
+    return node
+
+
+def write_replica(array, f, cpus):
+    """Write a replica of an array from a thread pinned to ``cpus``.
+
+    The page cache pages of a file are allocated on the NUMA node of the
+    cpu that first writes them. Writing from a thread pinned to a node's
+    cpus therefore places the replica in that node's memory.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    array : array-like
+        array to replicate.
+
+    f : str
+        file to write the replica to.
+
+    cpus : list
+        cpus of the NUMA node to place the replica on.
+    """
+    errors = list()
+
+    def write():
+        """Pin the thread, then write"""
+        try:
+            # pid 0 is the calling thread
+            os.sched_setaffinity(0, cpus)
+            np.save(f, array)
+        except Exception as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+def memmap_layout(array):
+    """Region of its file a memmap, or a view of one, covers.
+
+    Views of a memmap keep the file name and offset of the memmap. The
+    offset of the view's data in the file is found from the memmap the
+    view is taken from.
+    """
+    root = array
+    while not isinstance(root, np.memmap) or \
+            isinstance(root.base, np.ndarray):
+        # Strided views rebuilt by joblib wrap the memmap in a non-array
+        root = getattr(root, 'base', None)
+        if root is None:
+            return array.dtype.str, array.shape, array.strides, None
+    offset = root.offset + array.__array_interface__['data'][0] - \
+        root.__array_interface__['data'][0]
+    return array.dtype.str, array.shape, array.strides, offset
+
+
+def get_replica(array, replicas, node):
+    """Return the replica of a memmapped array local to a NUMA node.
+
+    Replicas are keyed on the file of the replicated array, and only
+    returned for arrays that cover the same region of the file, i.e. not
+    for views of the replicated array.
+    """
+    if not replicas or node is None:
+        return array
+    f = getattr(array, 'filename', None)
+    if f not in replicas:
+        return array
+    layout, files = replicas[f]
+    if memmap_layout(array) != layout:
+        return array
+    return np.load(files[node], mmap_mode='r')
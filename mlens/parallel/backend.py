@@ -16,37 +16,72 @@ from __future__ import with_statement, division
 
 import gc
 import os
+import atexit
 import shutil
 import subprocess
 import tempfile
+import threading
 import warnings
+import weakref
+import zlib
+from collections import OrderedDict
 
 from abc import ABCMeta, abstractmethod
 
 import numpy as np
-from scipy.sparse import issparse, hstack
-
+from scipy.sparse import issparse, isspmatrix_csr, csr_matrix
+
+from ._base_functions import (
+    check_threads, limit_threads, check_affinity, numa_nodes, write_replica,
+    memmap_layout, slice_csr, hstack_csr, take_csr, fold_rows, contiguous,
+    PermutedInput)
+from .tracing import span, nbytes, now
+from .hooks import check_hooks, EventParallel
+from .loaders import is_file, load_file
+from .storage import get_storage, StoredArray
+from .columnar import is_columnar
 from .. import config
 from ..externals.joblib import Parallel, dump, load
+from ..externals.joblib.pool import has_shareable_memory, reduce_memmap
 from ..utils import check_initialized
 from ..utils.exceptions import (ParallelProcessingError,
                                 ParallelProcessingWarning)
 from ..externals.sklearn.validation import check_random_state
 
 
+# Keyword arguments of estimation calls that configure the processor
+PROCESSOR_KWARGS = ['affinity', 'numa_replicas', 'tracer', 'hooks',
+                    'profile', 'keep_preds', 'reorder']
+
+# Retained predictions larger than this are memory-mapped
+KEEP_PREDS_MAX_NBYTES = 2 ** 27
+
+# In-memory inputs larger than this are dumped once to the input registry
+REGISTRY_MIN_NBYTES = 2 ** 20
+
+# Bytes of rows to copy at a time when reordering an input
+REORDER_BLOCK_NBYTES = 2 ** 26
+
+
 ###############################################################################
+def pop_processor_kwargs(kwargs):
+    """Pop processor settings from the keyword arguments of a call"""
+    return dict((k, kwargs.pop(k)) for k in PROCESSOR_KWARGS if k in kwargs)
+
+
 def _dtype(a, b=None):
     """Utility for getting a dtype"""
     return getattr(a, 'dtype', getattr(b, 'dtype', None))
 
 
-def dump_array(array, name, path):
+def dump_array(array, name, path, n_jobs=1):
     """Dump array for memmapping.
 
     Parameters
     ----------
-    array : array-like
-        Array to be persisted
+    array : array-like, str, :class:`~mlens.parallel.loaders.FileInput`
+        Array to be persisted. Arrays on file are loaded straight into a
+        memmap in the cache, see :func:`~mlens.parallel.loaders.load_file`.
 
     name : str
         Name of file
@@ -54,43 +89,35 @@ def dump_array(array, name, path):
     path : str
         Path to cache.
 
+    n_jobs : int (default = 1)
+        number of processes to parse files with.
+
     Returns
     -------
     f: array-like
         memory-mapped array.
     """
     # First check if the array is on file
-    if isinstance(array, str):
-        # Load file from disk. Need to dump if not memmaped already
-        if not array.split('.')[-1] in ['mmap', 'npy', 'npz']:
-            # Try loading the file assuming a csv-like format
-            array = _load(array)
-
-    if isinstance(array, str):
-        # If arr remains a string, it's pointing to an mmap file
-        f = array
-    else:
-        # Dump ndarray on disk
-        f = os.path.join(path, '%s.mmap' % name)
-        if os.path.exists(f):
-            os.unlink(f)
-        dump(array, f)
+    if is_file(array):
+        if isinstance(array, str) and array.split('.')[-1] in ['mmap', 'npy']:
+            # Memmap as is
+            return array
+
+        f = os.path.join(path, '%s.npy' % name)
+        array = load_file(array, out=f, n_jobs=n_jobs)
+        if getattr(array, 'filename', None) and \
+                _load_mmap(array.filename).shape == array.shape:
+            # Not a view, i.e. of a squeezed single column
+            return array.filename
+
+    # Dump ndarray on disk
+    f = os.path.join(path, '%s.mmap' % name)
+    if os.path.exists(f):
+        os.unlink(f)
+    dump(array, f)
     return f
 
 
-def _load(arr):
-    """Load array from file using default settings."""
-    if arr.split('.')[-1] in ['npy', 'npz']:
-        return np.load(arr)
-    else:
-        try:
-            return np.genfromtxt(arr)
-        except Exception as e:
-            raise IOError("Could not load X from %s, does not "
-                          "appear to be a valid ndarray. "
-                          "Details:\n%r" % (arr, e))
-
-
 def _load_mmap(f):
     """Load a mmap presumably dumped by joblib, otherwise try numpy."""
     try:
@@ -100,6 +127,469 @@ def _load_mmap(f):
         return np.load(f, mmap_mode='r')
 
 
+def file_backed(array):
+    """Return a memmap of an array backed by a file, or None.
+
+    Memmaps, arrays loaded with ``mmap_mode`` and views of these are backed
+    by a file that workers can map directly.
+    """
+    if not isinstance(array, np.ndarray) or not has_shareable_memory(array):
+        return None
+    if isinstance(array, np.memmap):
+        return array
+    # View of a memmap: rebuild as a memmap view on the same file
+    func, args = reduce_memmap(array)
+    return func(*args)
+
+
+class InputRegistry(object):
+
+    """Registry of dumped in-memory inputs.
+
+    Under multiprocessing, inputs are memory-mapped for workers. In-memory
+    arrays are dumped to file once and the dump is reused by later calls on
+    the same array, for as long as the array is alive and its content is
+    unchanged. Content is verified with a checksum on each call, which is
+    far cheaper than a new dump. Arrays already backed by a file are never
+    dumped (see :func:`file_backed`).
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    min_nbytes : int (default = 2 ** 20)
+        arrays smaller than this are not registered.
+    """
+
+    def __init__(self, min_nbytes=REGISTRY_MIN_NBYTES):
+        self.min_nbytes = min_nbytes
+        self.path = None
+        self._entries = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _eligible(self, array):
+        """Whether an array can be registered"""
+        return (type(array) is np.ndarray and
+                array.nbytes >= self.min_nbytes and
+                array.dtype != object and
+                array.flags['C_CONTIGUOUS'])
+
+    @staticmethod
+    def _checksum(array):
+        """Checksum of array content"""
+        return zlib.adler32(memoryview(array).cast('B')) \
+            if hasattr(memoryview, 'cast') else zlib.adler32(array.data)
+
+    def get(self, array, name='X'):
+        """Return a dump of the array.
+
+        Parameters
+        ----------
+        array : array-like
+            array to dump.
+
+        name : str
+            prefix of the dump file name.
+
+        Returns
+        -------
+        f : str, None
+            ``.npy`` file holding the array, or ``None`` if the array can
+            not be registered.
+
+        dumped : bool
+            whether the array was written to file in this call.
+        """
+        if not self._eligible(array):
+            return None, False
+
+        key = id(array)
+        checksum = (array.shape, array.dtype.str, self._checksum(array))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is array and \
+                    entry[2] == checksum:
+                return entry[1], False
+            if entry is not None:
+                self._drop(key)
+
+            if self.path is None:
+                self.path = tempfile.mkdtemp(prefix=config.get_prefix(),
+                                             dir=config.get_tmpdir())
+            fd, f = tempfile.mkstemp(
+                prefix='%s_' % name, suffix='.npy', dir=self.path)
+            with os.fdopen(fd, 'wb') as out:
+                np.save(out, array)
+
+            ref = weakref.ref(array, lambda _, k=key, f=f: self._drop(k, f))
+            self._entries[key] = (ref, f, checksum)
+        return f, True
+
+    def _drop(self, key, f=None):
+        """Remove an entry and its dump"""
+        entry = self._entries.get(key)
+        if entry is not None and (f is None or entry[1] == f):
+            del self._entries[key]
+        f = entry[1] if f is None and entry is not None else f
+        if f is not None and os.path.exists(f):
+            try:
+                os.unlink(f)
+            except OSError:
+                # Still mapped on some platforms
+                pass
+
+    def clear(self):
+        """Remove all dumps"""
+        with self._lock:
+            self._entries = dict()
+            if self.path is not None:
+                shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
+
+
+INPUT_REGISTRY = InputRegistry()
+atexit.register(INPUT_REGISTRY.clear)
+
+
+class KeptFiles(object):
+
+    """Registry of files of retained predictions.
+
+    Retained arrays that are memory-mapped (see ``keep_preds`` in
+    :class:`ParallelProcessing`) are written to a temporary directory shared
+    by all fits, or to a user-supplied directory. Files are removed when the
+    retained arrays they hold are released, i.e. replaced by a new fit, and
+    the temporary directory is removed at exit.
+
+    .. versionadded:: 0.2.2
+    """
+
+    def __init__(self):
+        self.path = None
+        self._files = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._files)
+
+    def save(self, array, prefix, path=None):
+        """Write an array to a new file and return a memmap of it.
+
+        Parameters
+        ----------
+        array : array-like
+            array to write.
+
+        prefix : str
+            prefix of the file name.
+
+        path : str, None
+            directory to write to. Defaults to the temporary directory.
+
+        Returns
+        -------
+        array : :class:`numpy.memmap`
+            read-only memmap of the file.
+        """
+        with self._lock:
+            if path is None:
+                if self.path is None:
+                    self.path = tempfile.mkdtemp(prefix=config.get_prefix(),
+                                                 dir=config.get_tmpdir())
+                path = self.path
+            elif not os.path.exists(path):
+                os.makedirs(path)
+
+            # Unique file names: earlier retained arrays may still be mapped
+            fd, f = tempfile.mkstemp(prefix=prefix, suffix='.npy', dir=path)
+            f = os.path.abspath(f)
+            self._files.add(f)
+        with os.fdopen(fd, 'wb') as out:
+            np.save(out, array)
+        return np.load(f, mmap_mode='r')
+
+    def release(self, arrays, retain=()):
+        """Remove the files of released retained arrays.
+
+        Parameters
+        ----------
+        arrays : list
+            released arrays. Arrays not written by :func:`save` are ignored.
+
+        retain : list
+            arrays still retained. Their files are not removed.
+        """
+        keep = set(_filename(a) for a in retain)
+        with self._lock:
+            for array in arrays:
+                f = _filename(array)
+                if f is None or f in keep or f not in self._files:
+                    continue
+                self._files.discard(f)
+                try:
+                    os.unlink(f)
+                except OSError:
+                    # Still mapped on some platforms
+                    pass
+
+    def clear(self):
+        """Remove the temporary directory"""
+        with self._lock:
+            if self.path is not None:
+                shutil.rmtree(self.path, ignore_errors=True)
+                self._files = set(
+                    f for f in self._files
+                    if not f.startswith(self.path + os.sep))
+            self.path = None
+
+
+def _filename(array):
+    """File backing a retained array, if any"""
+    if isinstance(array, StoredArray):
+        array = array.array
+    f = getattr(array, 'filename', None)
+    return os.path.abspath(f) if f is not None else None
+
+
+KEPT_FILES = KeptFiles()
+atexit.register(KEPT_FILES.clear)
+
+
+def as_csr(array):
+    """Convert sparse inputs to csr with sorted indices.
+
+    Folds are slices of rows, which are cheap to take from a csr matrix.
+    Other inputs are returned as is.
+
+    .. versionadded:: 0.2.2
+    """
+    if not issparse(array):
+        return array
+    if not isspmatrix_csr(array):
+        array = array.tocsr()
+    if not array.has_sorted_indices:
+        array = array.sorted_indices()
+    return array
+
+
+def share_array(array, name, path, n_jobs=1):
+    """Memory-map an input for workers, dumping only if necessary.
+
+    Arrays backed by a file are mapped as is. Large in-memory arrays are
+    dumped once to the :class:`InputRegistry`. Other inputs are dumped to
+    the cache with :func:`dump_array`. Sparse inputs are shared as csr
+    matrices with memory-mapped ``data``, ``indices`` and ``indptr``
+    arrays, which are passed to workers by file name. Columnar inputs are
+    shared with memory-mapped columns, see
+    :class:`~mlens.parallel.columnar.ColumnarInput`.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    array : array-like, str, :class:`~mlens.parallel.loaders.FileInput`
+        input to share.
+
+    name : str
+        name of input.
+
+    path : str
+        path to cache.
+
+    n_jobs : int (default = 1)
+        number of processes to parse files with.
+
+    Returns
+    -------
+    array : array-like
+        memory-mapped array.
+
+    dumped : bool
+        whether the input was written to file.
+    """
+    if isinstance(array, PermutedInput):
+        shared, dumped = share_array(array.array, name, path, n_jobs)
+        return PermutedInput(shared, array.order), dumped
+
+    if is_columnar(array):
+        return array.dump(path, name)
+
+    if issparse(array):
+        array = as_csr(array)
+        backed = [file_backed(a)
+                  for a in (array.data, array.indices, array.indptr)]
+        if all(a is not None for a in backed):
+            out = csr_matrix(tuple(backed), shape=array.shape, copy=False)
+            out.has_sorted_indices = True
+            return out, False
+        return _load_mmap(dump_array(array, name, path, n_jobs)), True
+
+    backed = file_backed(array)
+    if backed is not None:
+        return backed, False
+
+    f, dumped = INPUT_REGISTRY.get(array, name)
+    if f is not None:
+        return _load_mmap(f), dumped
+    return _load_mmap(dump_array(array, name, path, n_jobs)), True
+
+
+def _index_rows(idx):
+    """Rows of an index, or None for the full data"""
+    if idx is None or isinstance(idx, str):
+        return None
+    return fold_rows(idx)
+
+
+def index_sets(task):
+    """Row sets of the partitions and folds a task slices during a fit.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    task : obj
+        a task with fitted indexers, i.e. a :class:`Layer`.
+
+    Returns
+    -------
+    sets : list
+        lists of ``(role, rows)`` tuples per indexer, where ``role`` is one
+        of ``'partition'``, ``'train'`` and ``'test'``.
+    """
+    out = list()
+    for indexer in task._get_indexers():
+        sets = [('partition', _index_rows(idx))
+                for idx in indexer.partition()]
+        for tri, tei in indexer.generate():
+            sets.append(('train', _index_rows(tri)))
+            sets.append(('test', _index_rows(tei)))
+        out.append([(role, rows) for role, rows in sets
+                    if rows is not None and rows.shape[0]])
+    return out
+
+
+def _concatenate(blocks, n):
+    """Layout of disjoint blocks followed by remaining rows, or None"""
+    seen = np.zeros(n, dtype=bool)
+    order = list()
+    for rows in blocks:
+        if rows.max() >= n or seen[rows].any():
+            return None
+        seen[rows] = True
+        order.append(rows)
+    order.append(np.flatnonzero(~seen))
+    return np.hstack(order)
+
+
+def plan_layout(task, n):
+    """Plan a row layout that makes the folds of a task contiguous.
+
+    Candidate layouts place the rows of each partition, or of each test
+    fold, next to each other. A layout is scored by the number of rows of
+    partitions and folds that are stored as one ascending block, i.e. that
+    can be sliced as a view. The best layout is returned if it scores
+    higher than the input order.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    task : obj
+        a task with fitted indexers.
+
+    n : int
+        number of rows of the input.
+
+    Returns
+    -------
+    order : array, None
+        row of the input to store at each position, or None if the input
+        order is best.
+    """
+    groups = index_sets(task)
+    sets = [s for sub in groups for s in sub]
+    if not sets:
+        return None
+
+    def score(order):
+        pos = np.arange(n)
+        if order is not None:
+            pos[order] = np.arange(n)
+        return sum(rows.shape[0] for _, rows in sets
+                   if contiguous(pos[rows]) is not None)
+
+    best, best_score = None, score(None)
+    for role in ['partition', 'test']:
+        # Blocks in order of first occurrence
+        blocks = OrderedDict()
+        for r, rows in sets:
+            if r == role:
+                blocks.setdefault(rows.tobytes(), rows)
+        if len(blocks) < 2:
+            continue
+        order = _concatenate(list(blocks.values()), n)
+        if order is None:
+            continue
+        sc = score(order)
+        if sc > best_score:
+            best, best_score = order, sc
+    return best
+
+
+def reorder_array(array, order, path=None, name='X'):
+    """Store the rows of an input in a given order.
+
+    The input is presented in its original row order as a
+    :class:`~mlens.parallel._base_functions.PermutedInput` over the
+    reordered array, so that folds stored as one block are sliced as views.
+    Arrays are copied to file in blocks of rows if a path is given.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    array : array-like, sparse matrix
+        input to reorder.
+
+    order : array
+        row of the input to store at each position.
+
+    path : str, optional
+        directory to memory-map the reordered array to.
+
+    name : str
+        name of file.
+
+    Returns
+    -------
+    array : :class:`~mlens.parallel._base_functions.PermutedInput`
+        input over the reordered array.
+    """
+    if issparse(array):
+        out = take_csr(as_csr(array), order)
+        if path is not None:
+            out = _load_mmap(dump_array(out, name, path))
+    elif path is None:
+        out = np.asarray(array)[order]
+    else:
+        f = os.path.join(path, '%s_reordered.npy' % name)
+        out = np.lib.format.open_memmap(
+            f, mode='w+', dtype=array.dtype, shape=array.shape)
+        step = max(1, REORDER_BLOCK_NBYTES // max(1, array[:1].nbytes))
+        for i in range(0, order.shape[0], step):
+            out[i:i + step] = array[order[i:i + step]]
+        out.flush()
+        out = np.load(f, mmap_mode='r')
+
+    pos = np.empty_like(order)
+    pos[order] = np.arange(order.shape[0])
+    return PermutedInput(out, pos)
+
+
 def _set_path(job, path, threading):
     """Build path as a cache or list depending on whether using threading"""
     if path:
@@ -221,6 +711,11 @@ class Job(object):
 
         Permutes the indexing of ``predict_in`` and ``y`` arrays.
 
+        .. versionchanged:: 0.2.2
+            ``predict_in`` is wrapped in a
+            :class:`~mlens.parallel._base_functions.PermutedInput` instead of
+            copied, so that folds are gathered from the unshuffled array.
+
         Parameters
         ----------
         random_state : int, obj
@@ -228,7 +723,7 @@ class Job(object):
         """
         r = check_random_state(random_state)
         idx = r.permutation(self.y.shape[0])
-        self.predict_in = self.predict_in[idx]
+        self.predict_in = PermutedInput(self.predict_in, idx)
         self.y = self.y[idx]
 
     def subdir(self):
@@ -337,22 +832,82 @@ class BaseProcessor(object):
     verbose: bool, int, optional
         Level of verbosity of the
         :class:`~mlens.externals.joblib.parallel.Parallel` instance.
+
+    affinity : str, list, optional
+        CPU affinity policy for multiprocessing workers. One of
+        ``'compact'`` (fill one NUMA node before the next), ``'scatter'``
+        (distribute workers round-robin across NUMA nodes), or a list where
+        entry ``i`` is the cpu (or list of cpus) to pin worker ``i`` to.
+        Defaults to :func:`mlens.config.get_affinity`. Ignored by the
+        ``threading`` and ``sequential`` backends.
+
+    numa_replicas : bool, optional
+        whether to place one replica of the memory-mapped input array per
+        NUMA node, so that pinned workers read from a node-local copy.
+        Requires ``affinity`` to span more than one NUMA node. Defaults to
+        :func:`mlens.config.get_numa_replicas`.
+
+    tracer : :class:`~mlens.parallel.tracing.Tracer`, optional
+        tracer for recording spans of processing phases.
+
+    hooks : :class:`~mlens.parallel.hooks.Hooks`, callable, list, optional
+        event hooks to dispatch task, layer and cache events to. See
+        :class:`~mlens.parallel.hooks.Hooks` for the events emitted.
+
+    profile : bool (default = False)
+        whether to run each sub-task under :mod:`cProfile` inside the worker.
+        Profiles are merged per layer and per learner, and are accessible
+        through their ``profile`` attribute.
+
+    keep_preds : bool, str (default = False)
+        whether to retain the output of each layer, and the targets it is
+        aligned with, when fitting a stack. Retained arrays are stored in
+        :attr:`kept`. Arrays larger than 128 MB are memory-mapped to a
+        directory in :func:`mlens.config.get_tmpdir`. Pass a path to
+        memory-map all retained arrays to that directory. Files of retained
+        arrays are removed when an ensemble replaces them with a new fit
+        (see :class:`KeptFiles`).
+
+    reorder : bool (default = False)
+        whether to store the input of a layer in an order that makes its
+        partitions or test folds contiguous, so that they are sliced as views
+        instead of copied. Helps indexers with folds of several ranges, i.e.
+        :class:`~mlens.index.SubsetIndex` and
+        :class:`~mlens.index.ClusteredSubsetIndex`. The input is copied once
+        per layer fit, to the cache under multiprocessing. See
+        :func:`plan_layout`.
+
+        .. versionadded:: 0.2.2
     """
 
     __meta_class__ = ABCMeta
 
     __slots__ = ['caller', '__initialized__', '__threading__', 'job',
-                 'n_jobs', 'backend', 'verbose']
+                 'n_jobs', 'backend', 'verbose', 'affinity', 'numa_replicas',
+                 '_affinity', 'tracer', 'hooks', 'profile', 'keep_preds',
+                 'kept', 'reorder']
 
     @abstractmethod
-    def __init__(self, backend=None, n_jobs=None, verbose=None):
+    def __init__(self, backend=None, n_jobs=None, verbose=None,
+                 affinity=None, numa_replicas=None, tracer=None, hooks=None,
+                 profile=False, keep_preds=False, reorder=False):
         self.job = None
         self.__initialized__ = 0
 
         self.backend = config.get_backend() if not backend else backend
         self.n_jobs = -1 if not n_jobs else n_jobs
         self.verbose = False if not verbose else verbose
+        self.affinity = config.get_affinity() if not affinity else affinity
+        self.numa_replicas = config.get_numa_replicas() \
+            if numa_replicas is None else numa_replicas
         self.__threading__ = self.backend == 'threading'
+        self._affinity = None
+        self.tracer = tracer
+        self.hooks = check_hooks(hooks)
+        self.profile = profile
+        self.keep_preds = keep_preds
+        self.kept = None
+        self.reorder = reorder
 
     def __enter__(self):
         return self
@@ -421,6 +976,7 @@ class BaseProcessor(object):
         """
         job = Job(job, **kwargs)
         job = _set_path(job, path, self.__threading__)
+        self._set_tracer(job)
 
         # --- Prepare inputs
         for name, arr in zip(('X', 'y'), (X, y)):
@@ -430,24 +986,87 @@ class BaseProcessor(object):
             # Dump data in cache
             if self.__threading__:
                 # No need to memmap
-                f = None
-                if isinstance(arr, str):
-                    arr = _load(arr)
+                if is_file(arr):
+                    arr = load_file(arr)
+                arr = as_csr(arr)
             else:
-                f = dump_array(arr, name, job.dir)
+                with span(self.tracer, name, 'initialize') as s:
+                    shared, dumped = share_array(
+                        arr, name, job.dir, self.n_jobs)
+                    if dumped:
+                        s['bytes_written'] = nbytes(shared)
+                arr = shared
 
             # Store data for processing
-            if name == 'y' and arr is not None:
-                job.y = arr if self.__threading__ else _load_mmap(f)
+            if name == 'y':
+                job.y = arr
             elif name == 'X':
-                job.predict_in = arr \
-                    if self.__threading__ else _load_mmap(f)
+                job.predict_in = arr
 
+        self._set_affinity(job)
         self.job = job
         self.__initialized__ = 1
         gc.collect()
         return self
 
+    def _set_affinity(self, job):
+        """Build the worker pinning plan and any per-node input replicas"""
+        self._affinity = None
+        if self.__threading__ or self.backend == 'sequential':
+            return
+
+        plan = check_affinity(self.affinity, self.n_jobs, self.backend)
+        if not plan:
+            return
+
+        replicas = dict()
+        nodes = sorted(set(node for node, _ in plan))
+        f = getattr(job.predict_in, 'filename', None)
+        if self.numa_replicas and f is not None and len(nodes) > 1:
+            files = dict()
+            cpus = numa_nodes()
+            for node in nodes:
+                # Written from the node itself for node-local pages
+                files[node] = os.path.join(job.dir, 'X_node%i.npy' % node)
+                write_replica(job.predict_in, files[node], cpus[node])
+            replicas[f] = (memmap_layout(job.predict_in), files)
+
+        self._affinity = {'plan': plan, 'replicas': replicas}
+
+    def _set_tracer(self, job):
+        """Set up a trace sink for spans recorded in worker processes"""
+        if self.tracer is None or not isinstance(job.dir, str):
+            return
+        path = os.path.join(job.dir, 'trace')
+        if not os.path.exists(path):
+            os.mkdir(path)
+        self.tracer.path = path
+
+    def _args(self, **kwargs):
+        """Build the arguments dictionary passed to tasks"""
+        args = self.job.args(**kwargs)
+        args['n_jobs'] = self.n_jobs
+        args['affinity'] = self._affinity
+        args['tracer'] = self.tracer
+        args['hooks'] = self.hooks
+        args['profile'] = self.profile
+        return args
+
+    def _parallel(self):
+        """Get a Parallel instance for the job"""
+        tf = self.job.dir if not isinstance(self.job.dir, list) else None
+        kwargs = dict(n_jobs=self.n_jobs, temp_folder=tf, max_nbytes=None,
+                      mmap_mode='w+', verbose=self.verbose,
+                      backend=self.backend)
+        if self.hooks is None:
+            return Parallel(**kwargs)
+        return EventParallel(self.hooks, **kwargs)
+
+    def _emit(self, event, **info):
+        """Emit an event if hooks are set"""
+        if self.hooks is not None:
+            self.hooks.emit(event, **info)
+
     def __exit__(self, *args):
         self.clear()
 
@@ -458,6 +1077,10 @@ class BaseProcessor(object):
         self.job = None
         self.__initialized__ = 0
 
+        if self.tracer is not None:
+            self.tracer.collect()
+            self.tracer.path = None
+
         if job:
             path = job.dir
             path_handle = job.tmp
@@ -689,10 +1312,16 @@ class ParallelProcessing(BaseProcessor):
         return_final = out.pop('return_final', False)
         out = list() if return_names else None
 
-        tf = self.job.dir if not isinstance(self.job.dir, list) else None
-        with Parallel(n_jobs=self.n_jobs, temp_folder=tf, max_nbytes=None,
-                      mmap_mode='w+', verbose=self.verbose,
-                      backend=self.backend) as parallel:
+        keep = self.keep_preds and self.job.job == 'fit' and self.job.stack
+        self.kept = list() if keep else None
+
+        t0 = now()
+        if self.hooks is not None:
+            self._emit('job_started', job=self.job.job,
+                       n_layers=sum(1 for _ in caller))
+
+        with self._parallel() as parallel, \
+                span(self.tracer, 'process', 'process', job=self.job.job):
 
             for task in caller:
                 self.job.clear()
@@ -704,24 +1333,116 @@ class ParallelProcessing(BaseProcessor):
 
                 self.job.update()
 
+                if keep:
+                    self.kept.append(self._keep(task))
+
+        self._emit('job_done', job=self.job.job, duration=now() - t0)
+
         if return_final:
             out = self.get_preds(dtype=_dtype(task))
         return out
 
     def _partial_process(self, task, parallel, **kwargs):
         """Process given task"""
-        if self.job.job == 'fit' and getattr(task, 'shuffle', False):
-            self.job.shuffle(getattr(task, 'random_state', None))
+        with span(self.tracer, task.name, 'setup') as s:
+            if self.job.job == 'fit' and getattr(task, 'shuffle', False):
+                self.job.shuffle(getattr(task, 'random_state', None))
+
+            task.setup(self.job.predict_in, self.job.y, self.job.job)
 
-        task.setup(self.job.predict_in, self.job.y, self.job.job)
+            if self.reorder and self.job.job == 'fit':
+                self._reorder(task)
 
-        if not task.__no_output__:
-            self._gen_prediction_array(task, self.job.job, self.__threading__)
+            if not task.__no_output__:
+                self._gen_prediction_array(
+                    task, self.job.job, self.__threading__)
+                s['bytes_written'] = nbytes(self.job.predict_out)
 
-        task(self.job.args(**kwargs), parallel=parallel)
+        args = self._args(**kwargs)
+
+        # Threads share thread pools: cap them once for all tasks
+        threads = self._get_threads(task) if self.__threading__ else None
+        t0 = now()
+        try:
+            with span(self.tracer, task.name, 'run', job=self.job.job), \
+                    limit_threads(threads):
+                task(args, parallel=parallel)
+        except Exception as exc:
+            if not getattr(parallel, 'failed', None):
+                # Failed outside of sub-tasks, which report themselves
+                self._emit('task_failed', task=task.name, job=self.job.job,
+                           error=exc)
+            raise
+        self._emit('layer_done', task=task.name, job=self.job.job,
+                   duration=now() - t0)
 
         if not task.__no_output__ and getattr(task, 'n_feature_prop', 0):
-            self._propagate_features(task)
+            with span(self.tracer, task.name, 'propagate'):
+                self._propagate_features(task)
+
+        if getattr(task, 'sparse_output', False) and \
+                not issparse(self.job.predict_out):
+            self.job.predict_out = csr_matrix(np.asarray(self.job.predict_out))
+
+    def _reorder(self, task):
+        """Reorder the input of a task to make its folds contiguous"""
+        X = self.job.predict_in
+        if not (isinstance(X, np.ndarray) or isspmatrix_csr(X)):
+            # Shuffled, columnar and stored inputs are left as is
+            return
+
+        order = plan_layout(task, X.shape[0])
+        if order is None:
+            return
+
+        path = None if self.__threading__ else self.job.dir
+        with span(self.tracer, task.name, 'reorder') as s:
+            self.job.predict_in = reorder_array(X, order, path, task.name)
+            s['bytes_written'] = nbytes(self.job.predict_in.array)
+
+    def _keep(self, task):
+        """Retain the output of a fitted task and its aligned targets"""
+        out = list()
+        for name, array in (('P', self.job.predict_in), ('y', self.job.y)):
+            storage = None
+            if isinstance(array, StoredArray):
+                # Retain in storage format
+                storage, array = array.storage, array.array
+
+            if issparse(array):
+                array = array.copy()
+            elif isinstance(self.keep_preds, str) or \
+                    array.nbytes > KEEP_PREDS_MAX_NBYTES:
+                array = self._keep_mmap(array, task.name, name)
+            elif isinstance(array, np.memmap) and \
+                    not self._persistent(array):
+                # Backed by the cache, which is destroyed on clear
+                array = np.array(array)
+
+            if storage is not None:
+                array = StoredArray(array, storage)
+            out.append(array)
+        return tuple(out)
+
+    def _persistent(self, array):
+        """Whether a memmap outlives the cache"""
+        f = getattr(array, 'filename', None)
+        return f is not None and isinstance(self.job.dir, str) and \
+            not os.path.abspath(f).startswith(
+                os.path.abspath(self.job.dir) + os.sep)
+
+    def _keep_mmap(self, array, task_name, name):
+        """Memory-map a retained array to the retention directory"""
+        path = self.keep_preds if isinstance(self.keep_preds, str) else None
+        return KEPT_FILES.save(array, '%s_%s_' % (task_name, name), path)
+
+    def _get_threads(self, task):
+        """Get the largest thread budget requested by learners in task"""
+        budget = [check_threads(getattr(lr, 'threads', None),
+                                self.n_jobs, self.backend)
+                  for lr in getattr(task, 'learners', [task])]
+        budget = [b for b in budget if b is not None]
+        return max(budget) if budget else None
 
     def _propagate_features(self, task):
         """Propagate features from input array to output array."""
@@ -731,35 +1452,53 @@ class ParallelProcessing(BaseProcessor):
         n_in, n_out = p_in.shape[0], p_out.shape[0]
         r = int(n_in - n_out)
 
+        if isinstance(p_in, PermutedInput):
+            # Gather the propagated rows only
+            p_in, r = as_csr(p_in.take(slice(r, None))), 0
+
         if not issparse(p_in):
             # Simple item setting
             p_out[:, :task.n_feature_prop] = p_in[r:, task.propagate_features]
         else:
-            # Need to populate propagated features using scipy sparse hstack
-            self.job.predict_out = hstack([p_in[r:, task.propagate_features],
-                                           p_out[:, task.n_feature_prop:]]
-                                          ).tolil()
+            # Sparse propagated block followed by the prediction block
+            if r:
+                p_in = slice_csr(as_csr(p_in), r, n_in)
+            preds = np.asarray(p_out[:, task.n_feature_prop:])
+            self.job.predict_out = hstack_csr(
+                [p_in[:, task.propagate_features], preds], dtype=preds.dtype)
 
     def _gen_prediction_array(self, task, job, threading):
         """Generate prediction array either in-memory or persist to disk."""
         shape = task.shape(job)
+        storage = get_storage(_dtype(task))
+        dtype = storage.dtype if storage is not None else _dtype(task)
         if threading:
-            self.job.predict_out = np.empty(shape, dtype=_dtype(task))
+            # Zero-filled: routed predictions do not populate all cells
+            self.job.predict_out = np.zeros(shape, dtype=dtype)
         else:
             f = os.path.join(self.job.dir, '%s_out_array.mmap' % task.name)
             try:
                 self.job.predict_out = np.memmap(
-                    filename=f, dtype=_dtype(task), mode='w+', shape=shape)
+                    filename=f, dtype=dtype, mode='w+', shape=shape)
             except Exception as exc:
                 raise OSError(
                     "Cannot create prediction matrix of shape ("
                     "%i, %i), size %i MBs, for %s.\n Details:\n%r" %
-                    (shape[0], shape[1], 8 * shape[0] * shape[1] / (1024 ** 2),
-                     task.name, exc))
+                    (shape[0], shape[1],
+                     np.dtype(dtype).itemsize * shape[0] * shape[1] /
+                     (1024 ** 2), task.name, exc))
+
+        if storage is not None:
+            self.job.predict_out = StoredArray(self.job.predict_out, storage)
 
     def get_preds(self, dtype=None, order='C'):
         """Return prediction matrix.
 
+        The prediction array is returned without a copy if it is of the
+        requested dtype and order. Arrays held in a storage policy (see
+        :mod:`~mlens.parallel.storage`) are decoded to their compute dtype,
+        unless the storage dtype is requested.
+
         Parameters
         ----------
         dtype : numpy dtype object, optional
@@ -780,9 +1519,20 @@ class ParallelProcessing(BaseProcessor):
         if dtype is None:
             dtype = config.get_dtype()
 
-        if issparse(self.job.predict_out):
-            return self.job.predict_out
-        return np.asarray(self.job.predict_out, dtype=dtype, order=order)
+        P = self.job.predict_out
+        if issparse(P):
+            return P
+
+        if isinstance(P, StoredArray):
+            storage = get_storage(dtype)
+            if storage is not None:
+                dtype = storage.compute
+            if np.dtype(dtype) == P.array.dtype:
+                # Stored values requested
+                P = P.array
+            else:
+                P = P[...]
+        return np.asarray(P, dtype=dtype, order=order)
 
 
 ###############################################################################
@@ -827,11 +1577,20 @@ class ParallelEvaluation(BaseProcessor):
             job='fit', X=X, y=y, path=path, split=False, stack=False)
         check_initialized(self)
 
+        t0 = now()
+        n_layers = int('evaluate' in case) + int(
+            'preprocess' in case or bool(getattr(caller, '_transformers', 0)))
+        self._emit('job_started', job=case, n_layers=n_layers)
+
         # Use context manager to ensure same parallel job during entire process
-        tf = self.job.dir if not isinstance(self.job.dir, list) else None
-        with Parallel(n_jobs=self.n_jobs, temp_folder=tf, max_nbytes=None,
-                      mmap_mode='w+', verbose=self.verbose,
-                      backend=self.backend) as parallel:
+        with self._parallel() as parallel:
 
             caller.indexer.fit(self.job.predict_in, self.job.y, self.job.job)
-            caller(parallel, self.job.args(**kwargs), case)
+            try:
+                caller(parallel, self._args(**kwargs), case)
+            except Exception as exc:
+                if not getattr(parallel, 'failed', None):
+                    self._emit('task_failed', task=case, job=case, error=exc)
+                raise
+
+        self._emit('job_done', job=case, duration=now() - t0)
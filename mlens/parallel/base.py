@@ -171,7 +171,8 @@ class ProbaMixin(object):
 
     .. note::
        To use this mixin the instance inheriting it must set the ``proba``
-       and the ``_classes(=None)``attribute in ``__init__``.
+       and the ``_classes(=None)``attribute in ``__init__``. If the instance
+       sets ``drop_first=True``, the first class is not counted.
     """
 
     def _setup_2_multiplier(self, X, y, job=None):
@@ -181,6 +182,8 @@ class ProbaMixin(object):
     def _get_multiplier(self, X, y, alt=1):
         if self.proba:
             multiplier = self.classes_
+            if getattr(self, 'drop_first', False) and multiplier > 1:
+                multiplier -= 1
         else:
             multiplier = alt
         return multiplier
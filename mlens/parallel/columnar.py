@@ -0,0 +1,370 @@
+"""ML-Ensemble
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:license: MIT
+
+Columnar inputs. A DataFrame, Arrow table or mapping of columns is kept as
+a set of column arrays instead of being converted to one matrix. Folds are
+row views of the columns, and a block of rows and columns is materialized
+only when an estimator needs it. Column selections of
+:class:`~mlens.preprocessing.Subset` are pushed down to the columns, so
+that learners on different subsets of a wide frame only materialize their
+own columns. Materialized blocks are cached and shared between learners.
+"""
+from __future__ import division
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Bytes of materialized blocks to cache per input
+BLOCK_CACHE_NBYTES = 2 ** 28
+
+
+def is_columnar(arr):
+    """Check if an input is a :class:`ColumnarInput`"""
+    return getattr(arr, '__columnar__', False)
+
+
+def materialize(arr):
+    """Materialize columnar inputs as arrays. Other inputs are returned as is.
+
+    .. versionadded:: 0.2.2
+    """
+    if is_columnar(arr):
+        return arr.take()
+    return arr
+
+
+def _to_numpy(column):
+    """1d array of a pandas or Arrow column, without copying if possible"""
+    if isinstance(column, np.ndarray):
+        return column
+    if hasattr(column, 'chunks'):
+        # Arrow chunked array: zero-copy for single chunks without nulls
+        chunks = [c.to_numpy(zero_copy_only=False) for c in column.chunks]
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+    if hasattr(column, 'to_numpy'):
+        return column.to_numpy()
+    return np.asarray(getattr(column, 'values', column))
+
+
+def _columns(data):
+    """Names and 1d arrays of the columns of a frame, table or mapping"""
+    if hasattr(data, 'column_names') and hasattr(data, 'column'):
+        # Arrow table
+        names = list(data.column_names)
+        arrays = [data.column(i) for i in range(len(names))]
+    elif hasattr(data, 'columns') and hasattr(data, 'iloc'):
+        # DataFrame: numeric columns are views of the frame's blocks
+        names = list(data.columns)
+        arrays = [data.iloc[:, i] for i in range(len(names))]
+    elif isinstance(data, dict):
+        names = list(data)
+        arrays = [data[k] for k in names]
+    elif isinstance(data, (list, tuple)):
+        names = list(range(len(data)))
+        arrays = list(data)
+    else:
+        raise ValueError("Expected a DataFrame, Arrow table, dict or list "
+                         "of columns. Got %r." % type(data))
+    return names, [_to_numpy(a) for a in arrays]
+
+
+def _compose(outer, inner, n):
+    """Compose a row selection with a selection of its rows"""
+    if isinstance(inner, list):
+        inner = np.asarray(inner)
+    if isinstance(inner, np.ndarray) and inner.dtype == bool:
+        inner = np.flatnonzero(inner)
+
+    if outer is None or isinstance(outer, slice):
+        rows = range(n)[outer if outer is not None else slice(None)]
+        if isinstance(inner, slice):
+            rows = rows[inner]
+            return slice(rows.start, rows.stop if rows.stop >= 0 else None,
+                         rows.step)
+        if isinstance(inner, (int, np.integer)):
+            inner = slice(inner, inner + 1 if inner != -1 else None)
+            return _compose(outer, inner, n)
+        return np.arange(rows.start, rows.stop, rows.step)[inner]
+    return outer[inner]
+
+
+class BlockCache(object):
+
+    """Least recently used cache of materialized blocks.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    max_nbytes : int
+        bytes to hold. Least recently used blocks are evicted first.
+    """
+
+    def __init__(self, max_nbytes=BLOCK_CACHE_NBYTES):
+        self.max_nbytes = max_nbytes
+        self.nbytes = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def __contains__(self, key):
+        return key in self._blocks
+
+    def get(self, key):
+        """Get a block, or None"""
+        with self._lock:
+            block = self._blocks.pop(key, None)
+            if block is not None:
+                self._blocks[key] = block
+            return block
+
+    def put(self, key, block):
+        """Add a block"""
+        if block.nbytes > self.max_nbytes:
+            return
+        with self._lock:
+            if key in self._blocks:
+                return
+            self._blocks[key] = block
+            self.nbytes += block.nbytes
+            while self.nbytes > self.max_nbytes:
+                _, old = self._blocks.popitem(last=False)
+                self.nbytes -= old.nbytes
+
+
+class ColumnarInput(object):
+
+    """Input held as columns.
+
+    Wraps a DataFrame, Arrow table or mapping of columns without converting
+    it to a matrix. Numeric pandas columns and Arrow columns without nulls
+    are held as views of the input. Indexing rows returns a view, and
+    indexing rows and columns, or :func:`take`, materializes the block as
+    an array. Materialized blocks are read-only and cached, so that learners
+    that use the same rows and columns share the block.
+
+    Pass the wrapped input in place of ``X``. :class:`Subset` preprocessing
+    selects columns directly on the input, so that only the columns of the
+    subset are materialized. Other estimators are passed the materialized
+    block. Under multiprocessing, columns are memory-mapped one by one and
+    blocks are cached per task.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    data : DataFrame, Arrow table, dict, list
+        columns of the input. A dict or list must hold 1d arrays of equal
+        length.
+
+    names : list, optional
+        column names. Defaults to the names of the input.
+
+    dtype : numpy dtype, optional
+        dtype of materialized blocks. Defaults to the common dtype of the
+        columns.
+
+    cache_nbytes : int (default = 2 ** 28)
+        bytes of materialized blocks to cache.
+
+    Examples
+    --------
+    >>> from mlens.parallel import ColumnarInput
+    >>> from mlens.preprocessing import Subset
+    >>> ensemble.add({'a': [Subset(cols_a)], 'b': [Subset(cols_b)]},
+    ...              {'a': [est_1], 'b': [est_2]})
+    >>> ensemble.fit(ColumnarInput(df), y)
+    """
+
+    __columnar__ = True
+
+    def __init__(self, data, names=None, dtype=None,
+                 cache_nbytes=BLOCK_CACHE_NBYTES):
+        _names, arrays = _columns(data)
+        self.names = list(names) if names is not None else _names
+        self.arrays = arrays
+        self.rows = None
+
+        if len(self.names) != len(arrays):
+            raise ValueError("Got %i names for %i columns."
+                             % (len(self.names), len(arrays)))
+        if not arrays:
+            raise ValueError("Columnar input has no columns.")
+        if any(a.ndim != 1 for a in arrays):
+            raise ValueError("Columns must be one-dimensional.")
+        if len(set(a.shape[0] for a in arrays)) != 1:
+            raise ValueError("Columns must be of equal length. Got lengths "
+                             "%r." % sorted(set(a.shape[0] for a in arrays)))
+
+        self.dtype = np.dtype(dtype) if dtype is not None else \
+            np.result_type(*[a.dtype for a in arrays])
+        if self.dtype.kind not in 'biuf':
+            raise ValueError("Columnar inputs must be numeric. Got dtype %r."
+                             % self.dtype)
+        self.cache = BlockCache(cache_nbytes)
+
+    def __repr__(self):
+        return '%s(shape=%r)' % (self.__class__.__name__, self.shape)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['cache'] = self.cache.max_nbytes
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache = BlockCache(state['cache'])
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def shape(self):
+        """Shape of input"""
+        n = self.arrays[0].shape[0]
+        if self.rows is not None:
+            n = len(range(n)[self.rows]) if isinstance(self.rows, slice) \
+                else self.rows.shape[0]
+        return n, len(self.arrays)
+
+    @property
+    def ndim(self):
+        """Number of dimensions"""
+        return 2
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+            return self._view(rows).take(cols)
+        return self._view(key)
+
+    def __array__(self, dtype=None):
+        out = self.take()
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    def _view(self, rows):
+        """View of a selection of rows"""
+        # Not copy(): views share the cache, which pickling drops
+        out = self.__class__.__new__(self.__class__)
+        out.__dict__.update(self.__dict__)
+        out.rows = _compose(self.rows, rows, self.arrays[0].shape[0])
+        return out
+
+    def _positions(self, cols):
+        """Column positions of column names, positions, a slice or mask"""
+        n = len(self.arrays)
+        if cols is None:
+            return list(range(n))
+        if isinstance(cols, slice):
+            return list(range(n)[cols])
+        if not isinstance(cols, (list, tuple, np.ndarray)):
+            cols = [cols]
+        cols = np.asarray(cols) if not isinstance(cols, (list, tuple)) \
+            else cols
+        if isinstance(cols, np.ndarray) and cols.dtype == bool:
+            return np.flatnonzero(cols).tolist()
+
+        out = list()
+        for c in cols:
+            if isinstance(c, (int, np.integer)) and c not in self.names:
+                out.append(int(c) % n)
+            else:
+                try:
+                    out.append(self.names.index(c))
+                except ValueError:
+                    raise KeyError("Column %r not in input." % (c,))
+        return out
+
+    def _key(self):
+        """Cache key of the row selection"""
+        if self.rows is None:
+            return None
+        if isinstance(self.rows, slice):
+            return self.rows.start, self.rows.stop, self.rows.step
+        return self.rows.tobytes()
+
+    def take(self, cols=None):
+        """Materialize the rows of the view for a selection of columns.
+
+        Parameters
+        ----------
+        cols : list, slice, optional
+            column names or positions. Defaults to all columns.
+
+        Returns
+        -------
+        block : array of shape = [n_rows, n_cols]
+            read-only array of the selected rows and columns.
+        """
+        pos = self._positions(cols)
+        key = (self._key(), tuple(pos))
+        block = self.cache.get(key)
+        if block is not None:
+            return block
+
+        rows = self.rows if self.rows is not None else slice(None)
+        block = np.empty((self.shape[0], len(pos)), dtype=self.dtype)
+        for j, i in enumerate(pos):
+            block[:, j] = self.arrays[i][rows]
+
+        # Shared between learners
+        block.flags.writeable = False
+        self.cache.put(key, block)
+        return block
+
+    def check(self):
+        """Check that all values are finite.
+
+        Raises
+        ------
+        ValueError :
+            if any column holds NaN or infinite values.
+        """
+        rows = self.rows if self.rows is not None else slice(None)
+        for name, a in zip(self.names, self.arrays):
+            if a.dtype.kind == 'f' and not np.isfinite(a[rows]).all():
+                raise ValueError(
+                    "Input contains NaN or infinity in column %r." % (name,))
+
+    def dump(self, path, name='X'):
+        """Memory-map the columns of the view.
+
+        Columns already memory-mapped are mapped as is.
+
+        Parameters
+        ----------
+        path : str
+            directory to write the columns to.
+
+        name : str
+            prefix of column file names.
+
+        Returns
+        -------
+        shared : :class:`ColumnarInput`
+            input over memory-mapped columns.
+
+        dumped : bool
+            whether any column was written to file.
+        """
+        arrays = list()
+        dumped = False
+        for i, a in enumerate(self.arrays):
+            if self.rows is not None or not isinstance(a, np.memmap):
+                f = os.path.join(path, '%s_col_%i.npy' % (name, i))
+                np.save(f, a[self.rows] if self.rows is not None else a)
+                a = np.load(f, mmap_mode='r')
+                dumped = True
+            arrays.append(a)
+        if not dumped:
+            return self, False
+        return ColumnarInput(arrays, names=self.names, dtype=self.dtype,
+                             cache_nbytes=self.cache.max_nbytes), True
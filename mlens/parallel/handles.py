@@ -9,6 +9,7 @@ Handles for mlens.parallel.
 from .base import BaseEstimator
 from .learner import Learner, Transformer
 from ._base_functions import mold_objects, transform
+from .columnar import materialize
 from ..utils import format_name, check_instances
 from ..utils.formatting import _check_instances
 from ..externals.sklearn.base import clone, BaseEstimator as _BaseEstimator
@@ -62,6 +63,11 @@ class Pipeline(_BaseEstimator):
                               for tr_name, tr in self.pipeline]
 
         for tr_name, tr in self._pipeline:
+            if not getattr(tr, '_columnar', False):
+                # Columnar inputs are materialized unless the transformer
+                # selects from them directly
+                X = materialize(X)
+
             if fit:
                 tr.fit(X, y)
 
@@ -82,6 +88,7 @@ class Pipeline(_BaseEstimator):
             return False
         if not process:
             return self
+        X = materialize(X)
         if self.return_y:
             return X, y
         return X
@@ -0,0 +1,502 @@
+"""ML-Ensemble
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:license: MIT
+
+Event hooks for parallel estimation. Dispatches task, layer and cache events
+to user callbacks, and provides a metrics consumer that keeps counters,
+latency histograms and an estimate of the remaining time of a job.
+"""
+from __future__ import division
+
+import os
+import threading
+from multiprocessing import current_process
+from time import time
+
+import numpy as np
+
+from ..externals.joblib.parallel import (
+    Parallel, BatchCompletionCallBack, BatchedCalls)
+
+
+EVENTS = ['job_started',
+          'tasks_submitted',
+          'task_queued',
+          'task_started',
+          'task_finished',
+          'task_failed',
+          'layer_done',
+          'cache_hit',
+          'job_done',
+          ]
+
+LATENCY_BINS = [0.001, 0.01, 0.1, 1, 10, 60, 600]
+
+
+def task_record(name, job, started, **info):
+    """Record of a completed sub-task, returned to the main process.
+
+    Parameters
+    ----------
+    name : str
+        name of the sub-task.
+
+    job : str
+        job of the sub-task.
+
+    started : float
+        wall-clock time the worker started the sub-task.
+
+    **info : optional
+        additional data to ship with the record.
+    """
+    record = {'task': name,
+              'job': job,
+              'started': started,
+              'finished': time(),
+              'worker': '%s/%s' % (current_process().name,
+                                   threading.current_thread().name),
+              'pid': os.getpid(),
+              }
+    record.update(info)
+    return record
+
+
+def check_hooks(hooks):
+    """Check hooks argument and return a :class:`Hooks` instance or None"""
+    if hooks is None or isinstance(hooks, Hooks):
+        return hooks
+    if callable(hooks):
+        return Hooks(hooks)
+    if isinstance(hooks, (list, tuple)):
+        return Hooks(*hooks)
+    raise TypeError("hooks must be a callable, a list of callables or a "
+                    "Hooks instance. Got %r." % hooks)
+
+
+class Hooks(object):
+
+    """Event dispatcher.
+
+    Dispatches events of a parallel estimation to registered callbacks. A
+    callback is a callable that accepts the event name and a dictionary of
+    event data: ``callback(event, info)``. The ``info`` dictionary always
+    contains the ``event`` name and the wall-clock ``time`` of the event.
+
+    Events are emitted in the main process, in the order below.
+
+    - ``job_started``: a processor starts a job (``job``, ``n_layers``).
+
+    - ``tasks_submitted``: a batch of sub-tasks is submitted to the workers
+      (``n_tasks``). Sub-tasks are generated lazily, so a layer submits
+      several batches.
+
+    - ``task_queued``: a sub-task is dispatched to a worker (``task``).
+
+    - ``task_started``: a worker started a sub-task (``task``, ``worker``).
+      Since workers may run in other processes, the event is delivered on
+      completion of the sub-task, but ``time`` records the actual start.
+
+    - ``task_finished``: a sub-task completed (``task``, ``worker``,
+      ``duration``).
+
+    - ``task_failed``: a sub-task failed (``task``, ``job``, ``error``).
+      Sub-tasks that fail as part of a batch are all reported. A layer that
+      fails outside of its sub-tasks is reported under the layer name.
+
+    - ``layer_done``: a layer completed (``task``, ``job``, ``duration``).
+
+    - ``cache_hit``: fitted output was reused instead of being refitted
+      (``task``, ``job``): a fitted learner or pipeline when fitting with
+      ``refit=False``, the retained output of a learner in an ``update``
+      call, or an ensemble output read from a feature store.
+
+    - ``job_done``: a processor completed a job (``job``, ``duration``).
+
+    Pass hooks to a processor, to the ``fit``, ``predict`` and ``transform``
+    calls of an ensemble, or to :class:`~mlens.model_selection.Evaluator.fit`.
+    Any callable, or list of callables, is accepted in place of a
+    :class:`Hooks` instance.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    *callbacks : callable
+        callbacks to register.
+
+    Examples
+    --------
+    >>> from mlens.parallel import Hooks, Metrics
+    >>> metrics = Metrics()
+    >>> hooks = Hooks(metrics, lambda event, info: print(event))
+    >>> ensemble.fit(X, y, hooks=hooks)
+    >>> metrics.summary()
+    """
+
+    def __init__(self, *callbacks):
+        self.callbacks = list()
+        self._lock = threading.RLock()
+        for callback in callbacks:
+            self.register(callback)
+
+    def __getstate__(self):
+        """Callbacks run in the main process only"""
+        return {'callbacks': list()}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def register(self, callback):
+        """Register a callback.
+
+        Parameters
+        ----------
+        callback : callable
+            function of the form ``callback(event, info)``.
+
+        Returns
+        -------
+        callback : callable
+            the registered callback, so that the method can be used as a
+            decorator.
+        """
+        if not callable(callback):
+            raise TypeError("Callback %r is not callable." % callback)
+        self.callbacks.append(callback)
+        return callback
+
+    def emit(self, event, **info):
+        """Dispatch an event to all callbacks.
+
+        Parameters
+        ----------
+        event : str
+            name of event.
+
+        **info : optional
+            event data.
+        """
+        info['event'] = event
+        info.setdefault('time', time())
+        with self._lock:
+            for callback in self.callbacks:
+                callback(event, info)
+
+
+class Metrics(object):
+
+    """Metrics consumer.
+
+    Event hook that keeps event counters, a histogram of sub-task latencies,
+    task throughput and the number of cache hits, and estimates the
+    remaining time of the current job from the number of remaining tasks and
+    the observed throughput. Tasks of layers that are yet to be submitted
+    are extrapolated from the number of tasks in previous layers.
+
+    Counters, latencies and cache hits accumulate across jobs. Progress and
+    the remaining time are reset at the start of each job.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    bins : list, optional
+        upper bounds (in seconds) of the latency histogram bins. Defaults
+        to ``[0.001, 0.01, 0.1, 1, 10, 60, 600]``.
+    """
+
+    def __init__(self, bins=None):
+        self.bins = bins if bins is not None else LATENCY_BINS
+        self.counters = None
+        self.latencies = None
+        self.job = None
+        self.n_layers = None
+        self.n_submitted = None
+        self.n_finished = None
+        self._layer_tasks = None
+        self._current = None
+        self._t0 = None
+        self._t1 = None
+        self.reset()
+
+    def reset(self):
+        """Reset all metrics"""
+        self.counters = dict((event, 0) for event in EVENTS)
+        self.latencies = list()
+        self._reset_job()
+
+    def _reset_job(self, job=None, n_layers=None, t0=None):
+        """Reset progress metrics"""
+        self.job = job
+        self.n_layers = n_layers
+        self.n_submitted = 0
+        self.n_finished = 0
+        self._layer_tasks = list()
+        self._current = 0
+        self._t0 = t0
+        self._t1 = t0
+
+    def __call__(self, event, info):
+        self.counters[event] = self.counters.get(event, 0) + 1
+
+        if event == 'job_started':
+            self._reset_job(info.get('job'), info.get('n_layers'),
+                            info['time'])
+        elif event == 'tasks_submitted':
+            self.n_submitted += info['n_tasks']
+            self._current += info['n_tasks']
+        elif event == 'task_finished':
+            self.n_finished += 1
+            self.latencies.append(info['duration'])
+            self._t1 = info['time']
+        elif event == 'layer_done':
+            self._layer_tasks.append(self._current)
+            self._current = 0
+            self._t1 = info['time']
+
+        if self._t0 is None:
+            self._t0 = info['time']
+
+    @property
+    def cache_hits(self):
+        """Number of fitted learners reused"""
+        return self.counters['cache_hit']
+
+    @property
+    def histogram(self):
+        """Latency histogram as a list of ``(upper_bound, count)`` tuples"""
+        bounds = list(self.bins) + [np.inf]
+        idx = np.searchsorted(self.bins, self.latencies, side='left')
+        counts = np.bincount(idx, minlength=len(bounds))
+        return list(zip(bounds, counts.tolist()))
+
+    @property
+    def elapsed(self):
+        """Time elapsed in the current job"""
+        if self._t0 is None:
+            return 0.
+        return self._t1 - self._t0
+
+    @property
+    def throughput(self):
+        """Completed tasks per second in the current job"""
+        if not self.n_finished or not self.elapsed:
+            return None
+        return self.n_finished / self.elapsed
+
+    @property
+    def remaining(self):
+        """Estimated number of remaining tasks in the current job"""
+        remaining = self.n_submitted - self.n_finished
+        if self.n_layers is None:
+            return remaining
+
+        layers = self._layer_tasks if self._layer_tasks else [self._current]
+        per_layer = sum(layers) / len(layers)
+        left = self.n_layers - len(self._layer_tasks) - int(self._current > 0)
+        return remaining + int(round(max(left, 0) * per_layer))
+
+    @property
+    def progress(self):
+        """Estimated share of tasks completed in the current job"""
+        total = self.n_finished + self.remaining
+        if not total:
+            return None
+        return self.n_finished / total
+
+    @property
+    def eta(self):
+        """Estimated time remaining of the current job in seconds"""
+        throughput = self.throughput
+        if throughput is None:
+            return None
+        return self.remaining / throughput
+
+    def summary(self):
+        """Dictionary of metrics"""
+        latencies = self.latencies
+        return {'counters': dict(self.counters),
+                'cache_hits': self.cache_hits,
+                'tasks_finished': len(latencies),
+                'latency_mean': np.mean(latencies) if latencies else None,
+                'latency_max': max(latencies) if latencies else None,
+                'latency_histogram': self.histogram,
+                'throughput': self.throughput,
+                'progress': self.progress,
+                'remaining': self.remaining,
+                'eta': self.eta,
+                }
+
+
+def _emit_records(hooks, out):
+    """Emit start and finish events for the task records of a batch"""
+    # The sequential backend returns the batch output wrapped
+    for record in getattr(out, 'results', out):
+        if not isinstance(record, dict) or 'task' not in record:
+            continue
+        hooks.emit('task_started', time=record['started'],
+                   task=record['task'], job=record['job'],
+                   worker=record['worker'])
+        hooks.emit('task_finished', time=record['finished'],
+                   task=record['task'], job=record['job'],
+                   worker=record['worker'],
+                   duration=record['finished'] - record['started'])
+
+
+def _task_info(func):
+    """Name and job of a sub-task"""
+    return (getattr(func, 'name_index', getattr(func, 'name', None)),
+            getattr(func, 'job', None))
+
+
+def dispatch_task(parallel, func, callback=None):
+    """Dispatch a single sub-task to the workers of an open Parallel.
+
+    Used to keep a fixed number of sub-tasks in flight instead of mapping
+    over an iterable. If ``parallel`` is an :class:`EventParallel`, the same
+    events are emitted as for sub-tasks dispatched by a call.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    parallel : :class:`~mlens.externals.joblib.Parallel`
+        parallel instance with initialized workers, i.e. within its context.
+
+    func : callable
+        sub-task to run.
+
+    callback : callable, optional
+        function called in the main process with the output of the sub-task
+        once completed.
+
+    Returns
+    -------
+    job : obj
+        async result of the sub-task. Call ``get`` to retrieve the output.
+        Results of the sequential backend are ready on return and have no
+        ``ready`` method.
+    """
+    # Relies on the private backend API of joblib 0.11 (vendored as
+    # mlens.externals.joblib 0.11.1.dev0): Parallel._backend is set within
+    # the context of the Parallel and its apply_async runs a BatchedCalls
+    # batch. Revisit when the vendored joblib is updated.
+    # pylint: disable=protected-access
+    batch = BatchedCalls([(func, (), {})])
+    if not isinstance(parallel, EventParallel):
+        return parallel._backend.apply_async(batch, callback=callback)
+
+    hooks = parallel.hooks
+    name, job = _task_info(func)
+    hooks.emit('tasks_submitted', n_tasks=1)
+    hooks.emit('task_queued', task=name)
+
+    def cb(out):
+        """Emit task events before handing over the output"""
+        _emit_records(hooks, out)
+        if callback is not None:
+            callback(out)
+
+    try:
+        out = parallel._backend.apply_async(batch, callback=cb)
+    except BaseException as exc:
+        parallel._failed([name], [job], exc)
+        raise
+    return _EventJob(out, [name], [job], parallel)
+
+
+class _EventCallBack(BatchCompletionCallBack):
+
+    """Batch completion callback emitting sub-task events"""
+
+    def __call__(self, out):
+        _emit_records(self.parallel.hooks, out)
+        super(_EventCallBack, self).__call__(out)
+
+
+class EventParallel(Parallel):
+
+    """Parallel that emits events on sub-task dispatch and completion.
+
+    Sub-tasks of a batch that fails are reported with ``task_failed`` and
+    recorded in :attr:`failed`.
+
+    Parameters
+    ----------
+    hooks : :class:`Hooks`
+        hooks to emit events to.
+
+    **kwargs : optional
+        parameters of :class:`~mlens.externals.joblib.Parallel`.
+    """
+
+    def __init__(self, hooks, **kwargs):
+        super(EventParallel, self).__init__(**kwargs)
+        self.hooks = hooks
+        self.failed = list()
+
+    def __call__(self, iterable):
+        self.failed = list()
+        return super(EventParallel, self).__call__(iterable)
+
+    def _failed(self, names, jobs, exc):
+        """Emit failure events for the sub-tasks of a batch"""
+        for name, job in zip(names, jobs):
+            self.failed.append(name)
+            self.hooks.emit('task_failed', task=name, job=job, error=exc)
+
+    def _dispatch(self, batch):
+        """Queue the batch and emit submission and queue events"""
+        if self._aborting:
+            return
+
+        # Tasks are counted per batch: the iterable may be a generator that
+        # joblib consumes lazily (see ``pre_dispatch``)
+        self.hooks.emit('tasks_submitted', n_tasks=len(batch))
+        names, jobs = list(), list()
+        for func, _, _ in batch.items:
+            name, job = _task_info(func)
+            names.append(name)
+            jobs.append(job)
+            self.hooks.emit('task_queued', task=name)
+
+        self.n_dispatched_tasks += len(batch)
+        self.n_dispatched_batches += 1
+
+        cb = _EventCallBack(time(), len(batch), self)
+        try:
+            # The sequential backend runs the batch on submission
+            job = self._backend.apply_async(batch, callback=cb)
+        except BaseException as exc:
+            self._failed(names, jobs, exc)
+            raise
+        self._jobs.append(_EventJob(job, names, jobs, self))
+
+
+class _EventJob(object):
+
+    """Async result of a batch emitting failure events"""
+
+    def __init__(self, job, names, jobs, parallel):
+        self.job = job
+        self.names = names
+        self.jobs = jobs
+        self.parallel = parallel
+
+    def __getattr__(self, attr):
+        # Expose the interface of the wrapped result, i.e. ``ready``
+        if attr == 'job':
+            raise AttributeError(attr)
+        return getattr(self.job, attr)
+
+    def get(self, *args, **kwargs):
+        """Get the batch output"""
+        try:
+            return self.job.get(*args, **kwargs)
+        except BaseException as exc:
+            self.parallel._failed(self.names, self.jobs, exc)
+            raise
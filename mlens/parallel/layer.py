@@ -14,6 +14,8 @@ Layer module.
 from __future__ import division, print_function
 
 from .base import OutputMixin, IndexMixin, BaseStacker
+from .tracing import span
+from .profiling import collect_profiles, get_stats
 from ..utils import time, print_time, safe_print, format_name
 from ..utils.exceptions import NotFittedError
 from ..externals.joblib import delayed
@@ -23,6 +25,12 @@ from ..metrics import Data
 GLOBAL_LAYER_NAMES = list()
 
 
+def node_key(node):
+    """Key identifying a learner or transformer within a layer"""
+    return (node.__class__.__name__, getattr(node, 'preprocess', None),
+            node.name)
+
+
 class Layer(OutputMixin, IndexMixin, BaseStacker):
 
     r"""Layer of preprocessing pipes and estimators.
@@ -78,6 +86,7 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
             name=name, stack=stack, verbose=verbose, **kwargs)
 
         self.feature_span = None
+        self._profile_ = None
         self.shuffle = shuffle
         self.random_state = random_state
         self.propagate_features = propagate_features
@@ -86,6 +95,9 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
         if self.propagate_features:
             self.n_feature_prop = len(self.propagate_features)
 
+        # Retained output to reuse in the next fit, see Layer.reuse
+        self.__reuse__ = None
+
         # Protect stack against changes
         self.__static__.append('stack')
 
@@ -116,12 +128,18 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
                              "Add learners before calling" % self.name)
 
         job = args['job']
+        tracer = args.get('tracer')
+        records = list()
         _threading = self.backend == 'threading'
 
         if job != 'fit' and not self.__fitted__:
             raise NotFittedError(
                 "Layer instance (%s) not fitted." % self.name)
 
+        transformers, learners = self.transformers, self.learners
+        if job == 'fit' and self.__reuse__ is not None:
+            transformers, learners = self._reuse(args)
+
         if self.verbose:
             msg = "{:<30}"
             f = "stdout" if self.verbose < 10 else "stderr"
@@ -131,15 +149,17 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
                        file=f, end=e1)
             t0 = time()
 
-        if self.transformers:
+        if transformers:
             if self.verbose >= 2:
                 safe_print(msg.format('Preprocess pipelines ...'),
                            file=f, end=e2)
                 t1 = time()
 
-            parallel(delayed(subtransformer, not _threading)()
-                     for transformer in self.transformers
-                     for subtransformer in transformer(args, 'auxiliary'))
+            with span(tracer, self.name, 'transformers', job=job):
+                records.extend(parallel(
+                    delayed(subtransformer, not _threading)()
+                    for transformer in transformers
+                    for subtransformer in transformer(args, 'auxiliary')))
 
             if self.verbose >= 2:
                 print_time(t1, 'done', file=f)
@@ -148,21 +168,161 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
             safe_print(msg.format('Learners ...'), file=f, end=e2)
             t1 = time()
 
-        parallel(delayed(sublearner, not _threading)()
-                 for learner in self.learners
-                 for sublearner in learner(args, 'main'))
+        with span(tracer, self.name, 'learners', job=job):
+            records.extend(parallel(
+                delayed(sublearner, not _threading)()
+                for learner in learners
+                for sublearner in learner(args, 'main')))
 
         if self.verbose >= 2:
             print_time(t1, 'done', file=f)
 
+        if args.get('profile'):
+            self._set_profile(records)
+
         if job == 'fit':
-            self.collect()
+            with span(tracer, self.name, 'collect'):
+                self.collect()
 
         if self.verbose:
             msg = "done" if self.verbose == 1 \
                 else (msg + " {}").format(self.name, "done")
             print_time(t0, msg, file=f)
 
+    def reuse(self, preds, spans):
+        """Reuse retained output in the next fit.
+
+        On the next ``fit`` call, learners fitted with their current
+        parameters are not refitted: their columns of the retained output
+        are written to the output array instead. Fitted preprocessing
+        pipelines are reused by learners that need fitting. The next fit
+        must be on the input the output was retained for.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        preds: array-like
+            retained output of the layer.
+
+        spans: list
+            list of ``(key, feature_span)`` tuples of the learners the
+            output was retained for, as returned by :func:`spans`.
+        """
+        self.__reuse__ = (preds, dict(spans))
+
+    @property
+    def spans(self):
+        """Output columns of each learner as ``(key, feature_span)``"""
+        return [(node_key(lr), lr.feature_span) for lr in self.learners]
+
+    def adopt(self, layer):
+        """Take over fitted learners and transformers of another layer.
+
+        Learners and transformers are matched by name, and adopt the fitted
+        estimators of the match if parameters are identical. See
+        :func:`~mlens.parallel.learner.BaseNode.adopt`.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        layer: obj
+            fitted layer.
+        """
+        nodes = dict((node_key(n), n)
+                     for n in layer.learners + layer.transformers)
+        for node in self.learners + self.transformers:
+            match = nodes.get(node_key(node))
+            if match is not None and match is not node:
+                node.adopt(match)
+
+    def changed(self, spans):
+        """Check if the output would change on a refit.
+
+        Parameters
+        ----------
+        spans: list
+            list of ``(key, feature_span)`` tuples the output was
+            retained for.
+
+        Returns
+        -------
+        changed: bool
+            ``True`` if learners were added, removed or reordered, or any
+            learner or preprocessing pipeline needs fitting.
+        """
+        if [k for k, _ in spans] != [node_key(lr) for lr in self.learners]:
+            return True
+        stale = [tr.name for tr in self.transformers if not tr.__current__]
+        return any(not lr.__current__ or lr.preprocess in stale
+                   for lr in self.learners)
+
+    def prune(self, keys):
+        """Remove learners from the layer.
+
+        Learners that are kept remain fitted. Preprocessing pipelines no
+        longer used by any learner, and groups left without learners, are
+        removed with the learners.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        keys: list
+            keys of the learners to keep, as in :func:`spans`.
+        """
+        keys = set(keys)
+        if not any(node_key(lr) in keys for lr in self.learners):
+            raise ValueError("Cannot remove all learners of layer %s."
+                             % self.name)
+
+        stack = list()
+        for group in self.stack:
+            group.learners = [
+                lr for lr in group.learners if node_key(lr) in keys]
+            if not group.learners:
+                continue
+            need = [lr.preprocess for lr in group.learners]
+            group.transformers = [
+                tr for tr in group.transformers if tr.name in need]
+            stack.append(group)
+        self.stack = stack
+
+    def _reuse(self, args):
+        """Write reused output and return instances to fit"""
+        preds, spans = self.__reuse__
+        self.__reuse__ = None
+
+        P = args['main']['P']
+        stale = [tr for tr in self.transformers if not tr.__fitted__]
+        skip = [tr.name for tr in stale]
+
+        learners = list()
+        for lr in self.learners:
+            mi, mx = lr.feature_span
+            span = spans.get(node_key(lr))
+            if (span is None or span[1] - span[0] != mx - mi or
+                    lr.preprocess in skip or not lr.__fitted__):
+                learners.append(lr)
+                continue
+            P[:, mi:mx] = preds[:, span[0]:span[1]]
+            if args.get('hooks') is not None:
+                args['hooks'].emit('cache_hit', task=lr.name, job='fit')
+
+        # Fitted pipelines are loaded from the cache by learners
+        need = [lr.preprocess for lr in learners]
+        for tr in self.transformers:
+            if tr not in stale and tr.name in need:
+                tr.seed(args['dir'])
+        return stale, learners
+
+    def _set_profile(self, records):
+        """Merge profiles of sub-tasks per layer and per learner"""
+        self._profile_, nodes = collect_profiles(records)
+        for node in self.transformers + self.learners:
+            node._profile_ = nodes.get(node.name)
+
     def collect(self, path=None):
         """Collect cache estimators"""
         for transformer in self.transformers:
@@ -198,6 +358,12 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
             mx = start_index
             self.feature_span = (mi, mx)
 
+    @property
+    def sparse_output(self):
+        """Whether the layer outputs a sparse matrix"""
+        return any(getattr(idx, 'route', None) == 'sparse'
+                   for idx in self.indexers)
+
     @property
     def indexers(self):
         """Check indexer"""
@@ -218,6 +384,18 @@ class Layer(OutputMixin, IndexMixin, BaseStacker):
         """Cross validated scores"""
         return Data(self.raw_data)
 
+    @property
+    def profile(self):
+        """Merged profile of sub-tasks in the last profiled job.
+
+        .. versionadded:: 0.2.2
+
+        Returns a :class:`pstats.Stats` instance, or ``None`` if no job was
+        run with ``profile=True``. Profiles per learner and transformer are
+        available through their ``profile`` attribute.
+        """
+        return get_stats(self._profile_)
+
     @property
     def raw_data(self):
         """Cross validated scores"""
@@ -16,14 +16,22 @@ from __future__ import print_function, division
 import warnings
 from copy import deepcopy
 from abc import ABCMeta, abstractmethod
+import numpy as np
 
 from ._base_functions import (
     slice_array, set_output_columns, assign_predictions, score_predictions,
-    replace, save, load, prune_files, check_params)
+    replace, save, load, prune_files, check_params, check_threads,
+    limit_threads, pin_worker, get_replica, n_rows, subsample_index,
+    take_array)
 from .base import OutputMixin, ProbaMixin, IndexMixin, BaseEstimator
+from .tracing import span, nbytes, now
+from .hooks import task_record
+from .profiling import Profiler, collect_profiles, get_stats
+from .columnar import materialize
 
 from ..metrics import Data
 from ..utils import safe_print, print_time, format_name, assert_valid_pipeline
+from ..utils.feature_store import describe
 from ..utils.exceptions import (NotFittedError, FitFailedWarning,
                                 ParallelProcessingError, NotInitializedError)
 
@@ -99,16 +107,24 @@ class SubLearner(object):
 
         self.path = parent._path
         self.attr = parent.attr
+        self.drop_first = getattr(parent, 'drop_first', False)
         self.preprocess = parent.preprocess
         self.scorer = parent.scorer
         self.raise_on_exception = parent.raise_on_exception
         self.verbose = parent.verbose
+        self.threads = getattr(parent, '_threads', None)
+        self.affinity = parent._affinity
+        self.tracer = parent._tracer
+        self.profile = parent._profile
+        self.node = parent.name
+        self._queued = now()
 
         if not parent.__no_output__:
             self.output_columns = parent.output_columns[index[0]]
 
         self.score_ = None
         self.fit_time_ = None
+        self._estimator_time = None
         self.pred_time_ = None
 
         self.name = parent.cache_name
@@ -122,7 +138,17 @@ class SubLearner(object):
 
     def __call__(self):
         """Launch job"""
-        return getattr(self, self.job)()
+        t0 = now()
+        with span(self.tracer, self.name_index, 'task',
+                  job=self.job, queued=self._queued), \
+                Profiler(self.profile) as profiler:
+            if self.affinity:
+                node = pin_worker(self.affinity['plan'])
+                self.in_array = get_replica(
+                    self.in_array, self.affinity['replicas'], node)
+            getattr(self, self.job)()
+        return task_record(self.name_index, self.job, t0, node=self.node,
+                           profile=profiler.stats)
 
     def fit(self, path=None):
         """Fit sub-learner"""
@@ -143,7 +169,8 @@ class SubLearner(object):
                              out_index=self.out_index,
                              data=self.data)
 
-        save(path, self.name_index, o)
+        with span(self.tracer, self.name_index, 'save'):
+            save(path, self.name_index, o)
 
         if self.verbose:
             msg = "{:<30} {}".format(self.name_index, "done")
@@ -169,21 +196,33 @@ class SubLearner(object):
 
     def _fit(self, transformers):
         """Sub-routine to fit sub-learner"""
-        xtemp, ytemp = slice_array(self.in_array, self.targets, self.in_index)
+        with span(self.tracer, self.name_index, 'slice') as s:
+            xtemp, ytemp = slice_array(
+                self.in_array, self.targets, self.in_index, ordered=False)
+            s['bytes_read'] = nbytes(xtemp, ytemp)
 
         # Transform input (triggers copying)
         t0 = time()
         if transformers:
-            xtemp, ytemp = transformers.transform(xtemp, ytemp)
+            with span(self.tracer, self.name_index, 'transform'):
+                xtemp, ytemp = transformers.transform(xtemp, ytemp)
+        xtemp = materialize(xtemp)
 
         # Fit estimator
-        self.estimator.fit(xtemp, ytemp)
-        self.fit_time_ = time() - t0
+        t1 = time()
+        with span(self.tracer, self.name_index, 'fit'), \
+                limit_threads(self.threads, self.estimator):
+            self.estimator.fit(xtemp, ytemp)
+        t2 = time()
+        self.fit_time_ = t2 - t0
+        self._estimator_time = t2 - t1
 
     def _load_preprocess(self, path):
         """Load preprocessing pipeline"""
         if self.preprocess is not None:
-            obj = load(path, self.preprocess_index, self.raise_on_exception)
+            with span(self.tracer, self.name_index, 'load'):
+                obj = load(
+                    path, self.preprocess_index, self.raise_on_exception)
             return obj.estimator
         return
 
@@ -192,18 +231,31 @@ class SubLearner(object):
         n = self.in_array.shape[0]
         # For training, use ytemp to score predictions
         # During test time, ytemp is None
-        xtemp, ytemp = slice_array(self.in_array, self.targets, self.out_index)
+        with span(self.tracer, self.name_index, 'slice') as s:
+            xtemp, ytemp = slice_array(
+                self.in_array, self.targets, self.out_index)
+            s['bytes_read'] = nbytes(xtemp, ytemp)
         t0 = time()
 
         if transformers:
-            xtemp, ytemp = transformers.transform(xtemp, ytemp)
-        predictions = getattr(self.estimator, self.attr)(xtemp)
+            with span(self.tracer, self.name_index, 'transform'):
+                xtemp, ytemp = transformers.transform(xtemp, ytemp)
+        xtemp = materialize(xtemp)
+        with span(self.tracer, self.name_index, 'predict'), \
+                limit_threads(self.threads, self.estimator):
+            predictions = getattr(self.estimator, self.attr)(xtemp)
 
         self.pred_time_ = time() - t0
 
         # Assign predictions to matrix
-        assign_predictions(self.out_array, predictions,
-                           self.out_index, self.output_columns, n)
+        out = predictions
+        if self.drop_first and out.ndim > 1 and out.shape[1] > 1:
+            # Columns sum to one: the first class is implied by the others
+            out = out[:, 1:]
+        with span(self.tracer, self.name_index, 'assign') as s:
+            assign_predictions(self.out_array, out,
+                               self.out_index, self.output_columns, n)
+            s['bytes_written'] = nbytes(out)
 
         # Score predictions if applicable
         if score_preds:
@@ -239,6 +291,11 @@ class SubTransformer(object):
 
         self.path = parent._path
         self.verbose = parent.verbose
+        self.affinity = parent._affinity
+        self.tracer = parent._tracer
+        self.profile = parent._profile
+        self.node = parent.name
+        self._queued = now()
         self.name = parent.cache_name
         self.name_index = '.'.join(
             [self.name] + [str(i) for i in index])
@@ -248,7 +305,17 @@ class SubTransformer(object):
 
     def __call__(self):
         """Launch job"""
-        return getattr(self, self.job)()
+        t0 = now()
+        with span(self.tracer, self.name_index, 'task',
+                  job=self.job, queued=self._queued), \
+                Profiler(self.profile) as profiler:
+            if self.affinity:
+                node = pin_worker(self.affinity['plan'])
+                self.in_array = get_replica(
+                    self.in_array, self.affinity['replicas'], node)
+            getattr(self, self.job)()
+        return task_record(self.name_index, self.job, t0, node=self.node,
+                           profile=profiler.stats)
 
     def predict(self):
         """Dump transformers for prediction"""
@@ -262,13 +329,18 @@ class SubTransformer(object):
         """Run a transformation"""
         t0 = time()
         n = self.in_array.shape[0]
-        xtemp, ytemp = slice_array(
-            self.in_array, self.targets, self.out_index)
+        with span(self.tracer, self.name_index, 'slice') as s:
+            xtemp, ytemp = slice_array(
+                self.in_array, self.targets, self.out_index)
+            s['bytes_read'] = nbytes(xtemp, ytemp)
 
-        xtemp, ytemp = self.estimator.transform(xtemp, ytemp)
+        with span(self.tracer, self.name_index, 'transform'):
+            xtemp, ytemp = self.estimator.transform(xtemp, ytemp)
 
-        assign_predictions(
-            self.out_array, xtemp, self.out_index, self.output_columns, n)
+        with span(self.tracer, self.name_index, 'assign') as s:
+            assign_predictions(
+                self.out_array, xtemp, self.out_index, self.output_columns, n)
+            s['bytes_written'] = nbytes(xtemp)
 
         if self.verbose:
             msg = "{:<30} {}".format(self.name_index, "done")
@@ -279,11 +351,14 @@ class SubTransformer(object):
         """Fit transformers"""
         path = path if path else self.path
         t0 = time()
-        xtemp, ytemp = slice_array(
-            self.in_array, self.targets, self.in_index)
+        with span(self.tracer, self.name_index, 'slice') as s:
+            xtemp, ytemp = slice_array(
+                self.in_array, self.targets, self.in_index, ordered=False)
+            s['bytes_read'] = nbytes(xtemp, ytemp)
 
         t0_f = time()
-        self.estimator.fit(xtemp, ytemp)
+        with span(self.tracer, self.name_index, 'fit'):
+            self.estimator.fit(xtemp, ytemp)
         self.transform_time_ = time() - t0_f
 
         if self.out_array is not None:
@@ -295,7 +370,8 @@ class SubTransformer(object):
                              in_index=self.in_index,
                              out_index=self.out_index,
                              data=self.data)
-        save(path, self.name_index, o)
+        with span(self.tracer, self.name_index, 'save'):
+            save(path, self.name_index, o)
         if self.verbose:
             f = "stdout" if self.verbose < 10 else "stderr"
             msg = "{:<30} {}".format(self.name_index, "done")
@@ -322,10 +398,27 @@ class EvalSubLearner(SubLearner):
             in_array=in_array, out_array=None,
             targets=targets, index=index)
         self.error_score = parent.error_score
+        self.score_only = parent.score_only
+        self.train_score = parent.train_score
         self.train_score_ = None
         self.test_score_ = None
         self.train_pred_time_ = None
         self.test_pred_time_ = None
+        self.saved_time_ = None
+
+        # Learners fitted incrementally from this sub-learner's state
+        self.warm_param = parent._warm_param
+        self.chain = [(lr.cache_name, lr.estimator.get_params()[
+            self.warm_param]) for lr in parent._warm_chain]
+        self._data = list()
+
+    def __call__(self):
+        """Launch job"""
+        record = super(EvalSubLearner, self).__call__()
+        if self.score_only:
+            # Fitted estimators are dropped with the sub-learner
+            record['data'] = self._data
+        return record
 
     def fit(self, path=None):
         """Evaluate sub-learner"""
@@ -334,51 +427,109 @@ class EvalSubLearner(SubLearner):
             raise ValueError("Cannot generate CV-scores without a scorer")
         t0 = time()
         transformers = self._load_preprocess(path)
+        if self.chain:
+            # Warm starts are set on this fold's copy only
+            warm_start = self.estimator.get_params()['warm_start']
+            self.estimator.set_params(warm_start=False)
         self._fit(transformers)
         self._predict(transformers)
-
-        o = IndexedEstimator(estimator=self.estimator,
-                             name=self.name_index,
-                             index=self.index,
-                             in_index=self.in_index,
-                             out_index=self.out_index,
-                             data=self.data)
-        save(path, self.name_index, o)
+        if self.chain:
+            self.estimator.set_params(warm_start=warm_start)
+        self._save(path, self.name, bool(self.chain))
+
+        fit_time = self.fit_time_
+        for name, value in self.chain:
+            # Continue fitting from the previous draw's state
+            self.estimator.set_params(
+                **{self.warm_param: value, 'warm_start': True})
+            self._fit(transformers)
+
+            # Time to fit the draw from scratch: the input is transformed
+            # once, and the estimator is fitted along the chain
+            fit_time += self._estimator_time
+            self.fit_time_ = fit_time
+            self._predict(transformers)
+            self.estimator.set_params(warm_start=warm_start)
+            self._save(path, name, name != self.chain[-1][0])
 
         if self.verbose:
             f = "stdout" if self.verbose else "stderr"
             msg = "{:<30} {}".format(self.name_index, "done")
             print_time(t0, msg, file=f)
 
+    def _save(self, path, name, copy):
+        """Save fitted estimator, or only its data if scoring only"""
+        name_index = '.'.join([name] + [str(i) for i in self.index])
+        self._data.append((name, (name_index, self.data)))
+        if self.score_only:
+            return
+
+        estimator = deepcopy(self.estimator) if copy else self.estimator
+        o = IndexedEstimator(estimator=estimator,
+                             name=name_index,
+                             index=self.index,
+                             in_index=self.in_index,
+                             out_index=self.out_index,
+                             data=self.data)
+        with span(self.tracer, name_index, 'save'):
+            save(path, name_index, o)
+
     def _predict(self, transformers, score_preds=None):
         """Sub-routine to with sublearner"""
-        # Train set
-        self.train_score_, self.train_pred_time_ = self._score_preds(
-            transformers, self.in_index)
-
         # Validation set
         self.test_score_, self.test_pred_time_ = self._score_preds(
             transformers, self.out_index)
 
+        # Train set
+        n_train = n_rows(self.in_index)
+        n_score = n_train
+        if self.train_score is not True:
+            n_score = min(int(self.train_score), n_train)
+
+        if n_score == n_train:
+            index = self.in_index
+        elif n_score:
+            index = subsample_index(self.in_index, n_score, self.index[-1])
+        else:
+            index = None
+
+        if index is not None:
+            self.train_score_, self.train_pred_time_ = self._score_preds(
+                transformers, index)
+
+        # Estimate the time saved from the test set scoring rate
+        n_test = n_rows(self.out_index)
+        rate = self.test_pred_time_ / n_test if n_test else 0
+        self.saved_time_ = rate * (n_train - n_score)
+
     def _score_preds(self, transformers, index):
         # Train scores
-        xtemp, ytemp = slice_array(self.in_array, self.targets, index)
+        with span(self.tracer, self.name_index, 'slice') as s:
+            if isinstance(index, np.ndarray):
+                xtemp, ytemp = take_array(self.in_array, self.targets, index)
+            else:
+                xtemp, ytemp = slice_array(self.in_array, self.targets, index)
+            s['bytes_read'] = nbytes(xtemp, ytemp)
         if transformers:
-            xtemp, ytemp = transformers.transform(xtemp, ytemp)
+            with span(self.tracer, self.name_index, 'transform'):
+                xtemp, ytemp = transformers.transform(xtemp, ytemp)
+        xtemp = materialize(xtemp)
 
         t0 = time()
 
-        if self.error_score is not None:
-            try:
+        with span(self.tracer, self.name_index, 'score'), \
+                limit_threads(self.threads, self.estimator):
+            if self.error_score is not None:
+                try:
+                    scores = self.scorer(self.estimator, xtemp, ytemp)
+                except Exception as exc:  # pylint: disable=broad-except
+                    warnings.warn(
+                        "Scoring failed. Setting error score %r."
+                        "Details:\n%r" % (self.error_score, exc),
+                        FitFailedWarning)
+                    scores = self.error_score
+            else:
                 scores = self.scorer(self.estimator, xtemp, ytemp)
-            except Exception as exc:  # pylint: disable=broad-except
-                warnings.warn(
-                    "Scoring failed. Setting error score %r."
-                    "Details:\n%r" % (self.error_score, exc),
-                    FitFailedWarning)
-                scores = self.error_score
-        else:
-            scores = self.scorer(self.estimator, xtemp, ytemp)
         pred_time = time() - t0
 
         return scores, pred_time
@@ -390,8 +541,10 @@ class EvalSubLearner(SubLearner):
                'train_score': self.train_score_,
                'fit_time': self.fit_time_,
                'pred_time': self.train_pred_time_,
-               # 'test_pred_time': self.train_pred_time_,
                }
+        if self.train_score is not True:
+            out['test_pred_time'] = self.test_pred_time_
+            out['saved_time'] = self.saved_time_
         return out
 
 
@@ -408,12 +561,14 @@ class Cache(object):
 
     def __call__(self, path=None):
         """Cache estimator to path"""
+        t0 = now()
         path = path if path else self.path
         save(path, self.name, self.obj)
         if self.verbose:
             msg = "{:<30} {}".format(self.name, "cached")
             f = "stdout" if self.verbose < 10 - 3 else "stderr"
             safe_print(msg, file=f)
+        return task_record(self.name, 'cache', t0)
 
 
 ###############################################################################
@@ -437,6 +592,11 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
 
         # Variables
         self._path = None
+        self._threads = None
+        self._affinity = None
+        self._tracer = None
+        self._profile = False
+        self._profile_ = None
         self._data_ = None
         self._times_ = None
         self._learner_ = None
@@ -466,6 +626,12 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
         """Caller for producing jobs"""
         job = args['job']
         self._path = args['dir']
+        self._affinity = args.get('affinity')
+        self._tracer = args.get('tracer')
+        self._profile = args.get('profile', False)
+        self._threads = check_threads(
+            getattr(self, 'threads', None), args.get('n_jobs', self.n_jobs),
+            self.backend)
         _threading = self.backend == 'threading'
 
         if not self.__indexer__:
@@ -479,6 +645,8 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
         if job == 'fit':
             if self.__fitted__ and args.pop('refit', False):
                 # Check refit
+                if args.get('hooks') is not None:
+                    args['hooks'].emit('cache_hit', task=self.name, job=job)
                 if self.__no_output__:
                     return
                 args['job'] = 'transform'
@@ -492,8 +660,11 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
         if not parallel:
             return generator
 
-        parallel(delayed(subtask, not _threading)()
-                 for subtask in generator)
+        records = parallel(delayed(subtask, not _threading)()
+                           for subtask in generator)
+
+        if self._profile:
+            self._profile_ = collect_profiles(records)[0]
 
         if self.__collect__:
             self.collect()
@@ -516,13 +687,24 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
             iterator of learners of sub-learners to predict with.
             One of ``self.learner_`` and ``self.sublearners_``.
         """
+        # Routed prediction: partitions only predict their observations
+        routes = None
+        if job == 'predict' and getattr(self.indexer, 'route', None):
+            routes = self.indexer.routes()
+
         for estimator in generator:
+            out_index = estimator.out_index
+            if routes is not None:
+                out_index = routes[estimator.index[0]]
+                if out_index is None:
+                    continue
+
             yield self.__subtype__(
                 job=job,
                 parent=self,
                 estimator=estimator.estimator,
                 in_index=estimator.in_index,
-                out_index=estimator.out_index,
+                out_index=out_index,
                 in_array=X,
                 out_array=P,
                 index=estimator.index,
@@ -669,6 +851,60 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
         self._times_ = None
         self._path = None
 
+    def seed(self, path):
+        """Save fitted estimators to a cache.
+
+        Makes the fitted estimators of the instance available to dependent
+        instances in a new estimation cache, i.e. fitted preprocessing
+        pipelines to learners, without refitting.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        path: str, list
+            path to cache.
+        """
+        seen = set()
+        for o in self._return_attr('_learner_') + self._sublearners_:
+            if o.name not in seen:
+                save(path, o.name, o)
+                seen.add(o.name)
+
+    def adopt(self, node):
+        """Take over the fitted estimators of an identical instance.
+
+        The fitted estimators and data of ``node`` are shared if it has the
+        same parameters as the instance, and was fitted with its current
+        parameters. Parameters that do not affect predictions, such as
+        ``verbose``, and generated names are ignored.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        node: obj
+            fitted instance of the same class.
+
+        Returns
+        -------
+        adopted: bool
+            whether the fitted estimators were adopted.
+        """
+        if node.__class__ is not self.__class__ or not node.__current__ or \
+                describe(node) != describe(self):
+            return False
+
+        # Share the estimator: equal, but generated names may differ
+        self.estimator = node.estimator
+        self._learner_ = node._learner_
+        self._sublearners_ = node._sublearners_
+        self._data_ = node._data_
+        self._times_ = node._times_
+        self.cache_name = node.cache_name
+        self._store_static_params()
+        return True
+
     def set_indexer(self, indexer):
         """Set indexer and auxiliary attributes
 
@@ -720,9 +956,17 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
         """Set the output_columns attribute"""
         # pylint: disable=unused-argument
         multiplier = self._get_multiplier(X, y)
-        target = self._partitions * multiplier + n_left_concats
+        compact = getattr(self.indexer, 'route', None) == 'compact'
+        partitions = self._partitions if not compact else 1
+        target = partitions * multiplier + n_left_concats
         set_output_columns(
-            [self], self._partitions, multiplier, n_left_concats, target)
+            [self], partitions, multiplier, n_left_concats, target)
+
+        if compact:
+            # All partitions write to the same columns
+            self.output_columns = dict(
+                (i, n_left_concats) for i in
+                range(max(self._partitions, self.indexer.partitions)))
 
         mi = n_left_concats
         mx = max([i for i in self.output_columns.values()]) + multiplier
@@ -736,8 +980,14 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
     @property
     def __fitted__(self):
         """Fit status"""
-        if (not self._learner_ or not self._sublearners_ or
-                not self.indexer.__fitted__):
+        if not self.indexer.__fitted__:
+            return False
+        return self.__current__
+
+    @property
+    def __current__(self):
+        """Whether fitted estimators exist for the current parameters"""
+        if not self._learner_ or not self._sublearners_:
             return False
 
         # Check estimator param overlap
@@ -792,6 +1042,17 @@ class BaseNode(OutputMixin, IndexMixin, BaseEstimator):
         out = self._return_attr('_times_')
         return Data(out)
 
+    @property
+    def profile(self):
+        """Merged profile of sub-tasks in the last profiled job.
+
+        .. versionadded:: 0.2.2
+
+        Returns a :class:`pstats.Stats` instance, or ``None`` if no job was
+        run with ``profile=True``.
+        """
+        return get_stats(self._profile_)
+
 
 class Learner(ProbaMixin, BaseNode):
 
@@ -831,6 +1092,25 @@ class Learner(ProbaMixin, BaseNode):
     verbose : bool, int (default = False)
         whether to report completed fits.
 
+    threads : int, str, optional
+        thread budget of each sub-learner. Caps BLAS and OpenMP thread pools
+        and sets estimator-level parallelism (i.e. ``n_jobs``) during fit and
+        predict. Set to ``'auto'`` to split the available cores evenly
+        between the processor's workers, or pass an integer for a fixed
+        budget. If ``None``, thread pools are left untouched. Capping
+        BLAS and OpenMP thread pools requires ``threadpoolctl``
+        (``pip install mlens[threads]``); without it only estimator-level
+        parallelism is capped and a warning is issued once.
+
+    drop_first : bool (default = False)
+        whether to drop the probability column of the first class when
+        ``proba=True``. Class probabilities sum to one, so the column is
+        implied by the others: the learner outputs ``n_classes - 1``
+        columns, i.e. the probability of the positive class in a binary
+        problem. Scoring uses all columns.
+
+        .. versionadded:: 0.2.2
+
     **kwargs : bool (default=True)
         Optional ParallelProcessing arguments. See :class:`BaseParallel`.
     """
@@ -838,20 +1118,23 @@ class Learner(ProbaMixin, BaseNode):
     __subtype__ = SubLearner
 
     def __init__(self, estimator, indexer=None, name=None, preprocess=None,
-                 attr=None, scorer=None, proba=False, **kwargs):
+                 attr=None, scorer=None, proba=False, threads=None,
+                 drop_first=False, **kwargs):
         super(Learner, self).__init__(
             name=format_name(name, 'learner', GLOBAL_LEARNER_NAMES),
             estimator=estimator, indexer=indexer, **kwargs)
 
         self._classes = None
         self.proba = proba
+        self.drop_first = drop_first
+        self.threads = threads
         self._scorer = scorer
         self.preprocess = preprocess
         self.n_pred = self._partitions
         self.attr = attr if attr else self._predict_attr
 
-        # Protect preprocess against later changes
-        self.__static__.append('preprocess')
+        # Protect preprocess and output width against later changes
+        self.__static__.extend(['preprocess', 'drop_first'])
 
     @property
     def scorer(self):
@@ -975,12 +1258,29 @@ class EvalLearner(Learner):
 
     raise_on_exception : bool (default=True)
         whether to warn on non-fatal exceptions or raise an error.
+
+    score_only : bool (default=False)
+        whether to drop fitted estimators in the worker and only return
+        scores and times. If ``True``, the learner has no fitted sub-learners
+        and data is collected from the sub-task records instead of the cache.
+
+        .. versionadded:: 0.2.2
+
+    train_score : bool, int (default=True)
+        whether to score predictions on the training folds. Pass an integer
+        to score on a random subsample of at most that many training rows.
+        If not ``True``, the estimated prediction time saved is recorded
+        as ``saved_time``, and the time spent scoring the test fold as
+        ``test_pred_time``.
+
+        .. versionadded:: 0.2.2
     """
 
     __subtype__ = EvalSubLearner
 
     def __init__(self, estimator, preprocess, name, attr, scorer,
-                 error_score=None, verbose=False, **kwargs):
+                 error_score=None, verbose=False, score_only=False,
+                 train_score=True, **kwargs):
         super(EvalLearner, self).__init__(
             estimator=estimator, preprocess=preprocess,
             name=name, attr=attr, scorer=scorer, verbose=verbose, **kwargs)
@@ -989,6 +1289,69 @@ class EvalLearner(Learner):
         self.__only_all__ = False
         self.output_columns = {0: 0}     # For compatibility with SubLearner
         self.error_score = error_score
+        self.score_only = score_only
+        self.train_score = train_score
+        self._warm_param = None
+        self._warm_chain = list()
+        self._warm_head = None
+
+    def set_warm_start(self, param, learners):
+        """Fit a chain of learners incrementally from this learner.
+
+        The learners in the chain must differ from this learner only in the
+        warm-startable parameter ``param``. Each sub-learner first fits this
+        learner's estimator, then sets ``param`` to the next learner's value
+        and refits with ``warm_start=True``, so that every draw in the chain
+        is fitted and scored from the fitted state of the previous draw.
+        ``warm_start`` is only set on the sub-learner's copy of the
+        estimator, and is reset before the copy is saved.
+
+        .. versionadded:: 0.2.2
+
+        Parameters
+        ----------
+        param : str
+            name of the warm-startable parameter.
+
+        learners : list
+            learners to fit in order after this learner.
+        """
+        self._warm_param = param
+        self._warm_chain = learners
+        for learner in learners:
+            learner._warm_head = self
+            learner.cache_name = '%s.%s' % (
+                learner.preprocess,
+                learner.name) if learner.preprocess else learner.name
+
+    def collect(self, path=None, data=None):
+        """Load fitted estimator from cache, or data from sub-task records
+
+        Parameters
+        ----------
+        path: str, list, optional
+            path to cache.
+
+        data: list, optional
+            list of ``(name, data)`` tuples shipped with the sub-task
+            records. Required if ``score_only=True``.
+        """
+        if not self.score_only:
+            return super(EvalLearner, self).collect(path)
+
+        if self.__collect__:
+            self.clear()
+            self._data_ = sorted(data) if data else list()
+            self.__collect__ = False
+
+    @property
+    def raw_data(self):
+        """List of data collected from each sub-learner during fitting."""
+        if self.score_only:
+            if self._data_ is None:
+                raise NotFittedError("Instance not fitted.")
+            return self._data_
+        return super(EvalLearner, self).raw_data
 
     def gen_fit(self, X, y, P=None, refit=True):
         """Generator for fitting learner on given data"""
@@ -1004,6 +1367,10 @@ class EvalLearner(Learner):
             raise ValueError("Cannot run cross-validation without an indexer")
 
         self.__collect__ = True
+        if self._warm_head is not None:
+            # Fitted by the head of the warm-start chain
+            return
+
         for i, (train_index, test_index) in enumerate(
                 self.indexer.generate()):
             # Note that we bump index[1] by 1 to have index[1] start at 1
@@ -0,0 +1,451 @@
+"""ML-Ensemble
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:license: MIT
+
+File loaders for inputs passed as file paths. Text files are parsed chunk by
+chunk, in parallel, straight into a preallocated memory-mapped array in the
+estimation cache. Columnar formats are read with column projection where the
+library is installed. Loaders for other formats can be registered.
+"""
+from __future__ import division
+
+import io
+import os
+
+import numpy as np
+
+from ..externals.joblib import Parallel, delayed, load
+
+try:
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+except ImportError:
+    pq = feather = None
+
+
+# Bytes per parsed chunk of a text file
+CHUNK_SIZE = 2 ** 24
+
+LOADERS = dict()
+
+
+def register_loader(ext, loader=None):
+    """Register a file loader.
+
+    A loader is a callable ``loader(f, out=None, columns=None, n_jobs=1,
+    **kwargs)`` that returns the array in file ``f``. If ``out`` is a file
+    path, the loader should write the array to ``out`` as a ``.npy`` file
+    and return it memory-mapped, so that the input is never held in memory
+    twice.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    ext : str, list
+        file extension(s) to use the loader for, i.e. ``'csv'``.
+
+    loader : callable, optional
+        loader. If not passed, returns a decorator.
+
+    Examples
+    --------
+    >>> from mlens.parallel.loaders import register_loader
+    >>> @register_loader('h5')
+    ... def load_h5(f, out=None, columns=None, n_jobs=1, **kwargs):
+    ...     ...
+    """
+    if loader is None:
+        return lambda func: register_loader(ext, func)
+    if isinstance(ext, str):
+        ext = [ext]
+    for e in ext:
+        LOADERS[e.lower().lstrip('.')] = loader
+    return loader
+
+
+def get_loader(f):
+    """Get the loader of a file by its extension, defaulting to text"""
+    ext = os.path.splitext(f)[1].lower().lstrip('.')
+    return LOADERS.get(ext, load_text)
+
+
+class FileInput(object):
+
+    """Input array on file.
+
+    Pass in place of an array to a processor, to set the columns to read or
+    arguments of the loader. Plain file paths are read with default
+    settings.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    path : str
+        path to file.
+
+    columns : list, optional
+        columns to read, by position or by name. Names require a text file
+        header or a columnar format.
+
+    loader : callable, optional
+        loader to use. Defaults to the loader registered for the file
+        extension, see :func:`register_loader`.
+
+    **kwargs : optional
+        arguments to the loader, i.e. ``delimiter`` for text files.
+
+    Examples
+    --------
+    >>> from mlens.parallel.loaders import FileInput
+    >>> X = FileInput('train.parquet', columns=['a', 'b', 'c'])
+    >>> with ParallelProcessing('multiprocessing', 4) as manager:
+    ...     manager.map(learner, 'fit', X, y)
+    """
+
+    def __init__(self, path, columns=None, loader=None, **kwargs):
+        self.path = path
+        self.columns = columns
+        self.loader = loader
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return '%s(path=%r, columns=%r)' % (
+            self.__class__.__name__, self.path, self.columns)
+
+    def load(self, out=None, n_jobs=1):
+        """Load the array.
+
+        Parameters
+        ----------
+        out : str, optional
+            ``.npy`` file to write the array to. If passed, the array is
+            returned memory-mapped.
+
+        n_jobs : int (default = 1)
+            number of processes to parse with, where the loader supports it.
+        """
+        loader = self.loader if self.loader is not None else \
+            get_loader(self.path)
+        return loader(self.path, out=out, columns=self.columns,
+                      n_jobs=n_jobs, **self.kwargs)
+
+
+def is_file(arr):
+    """Check if an input is on file"""
+    return isinstance(arr, (str, FileInput))
+
+
+def load_file(arr, out=None, n_jobs=1):
+    """Load an input on file.
+
+    ``.npy``, ``.npz`` and ``.mmap`` files are read as is. Other files are
+    read by the loader registered for their extension. See
+    :func:`register_loader`.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    arr : str, :class:`FileInput`
+        input on file.
+
+    out : str, optional
+        ``.npy`` file to write the array to. If passed, the array is
+        returned memory-mapped. Not used for files that can be
+        memory-mapped as is.
+
+    n_jobs : int (default = 1)
+        number of processes to parse with, where the loader supports it.
+
+    Returns
+    -------
+    array : array-like
+        loaded array.
+    """
+    if not isinstance(arr, FileInput):
+        arr = FileInput(arr)
+    if arr.loader is None and arr.columns is None:
+        ext = os.path.splitext(arr.path)[1].lower()
+        if ext == '.npy':
+            return np.load(arr.path, mmap_mode='r' if out else None)
+        if ext == '.npz':
+            return np.load(arr.path)
+        if ext == '.mmap':
+            return load(arr.path, mmap_mode='r')
+    try:
+        return arr.load(out, n_jobs)
+    except ImportError:
+        raise
+    except Exception as e:
+        raise IOError("Could not load array from %s. Details:\n%r"
+                      % (arr.path, e))
+
+
+def _allocate(out, shape, dtype):
+    """Preallocate output array, memory-mapped if ``out`` is a file"""
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if os.path.exists(out):
+        os.unlink(out)
+    return np.lib.format.open_memmap(out, 'w+', dtype=dtype, shape=shape)
+
+
+def _select(names, columns):
+    """Column indices of column names or positions"""
+    if columns is None:
+        return None
+    out = list()
+    for c in columns:
+        if isinstance(c, str):
+            if names is None or c not in names:
+                raise ValueError("Column %r not found. Columns: %r."
+                                 % (c, names))
+            c = names.index(c)
+        out.append(c)
+    return out
+
+
+###############################################################################
+def _split(line, delimiter):
+    """Split a line of text"""
+    return line.split(delimiter) if delimiter else line.split()
+
+
+def _is_numeric(fields):
+    """Check if all fields of a line are numbers"""
+    try:
+        [float(v) for v in fields if v.strip()]
+    except ValueError:
+        return False
+    return True
+
+
+def _chunks(f, start, end, chunk_size):
+    """Byte ranges of chunks of whole lines"""
+    ranges = list()
+    with open(f, 'rb') as fh:
+        while start < end:
+            stop = min(start + chunk_size, end)
+            if stop < end:
+                fh.seek(stop)
+                fh.readline()
+                stop = min(fh.tell(), end)
+            ranges.append((start, stop))
+            start = stop
+    return ranges
+
+
+def _n_rows(data):
+    """Number of non-blank lines in a chunk of whole lines"""
+    n = data.count(b'\n') + int(not data.endswith(b'\n'))
+    if b'\n\n' in data or b'\n\r\n' in data or data[:1] in (b'\n', b'\r'):
+        n = len([l for l in data.split(b'\n') if l.strip()])
+    return n
+
+
+def _count(f, start, stop):
+    """Number of rows in a chunk of whole lines"""
+    with open(f, 'rb') as fh:
+        fh.seek(start)
+        data = fh.read(stop - start)
+    return _n_rows(data)
+
+
+def _parse(f, start, stop, n_cols, delimiter, dtype):
+    """Parse a chunk of whole lines into a 2d array"""
+    with open(f, 'rb') as fh:
+        fh.seek(start)
+        data = fh.read(stop - start)
+
+    text = data if not delimiter else data.replace(delimiter.encode(), b' ')
+    arr = np.fromstring(text, dtype=dtype, sep=' ')
+    n_rows = _n_rows(data)
+    if arr.shape[0] == n_rows * n_cols:
+        return arr.reshape(n_rows, n_cols)
+
+    # Missing values
+    arr = np.genfromtxt(io.BytesIO(data), delimiter=delimiter, dtype=dtype)
+    return arr.reshape(-1, n_cols)
+
+
+def _parse_into(f, start, stop, row, n_cols, delimiter, dtype, columns, out):
+    """Parse a chunk into rows of a memory-mapped ``.npy`` file"""
+    arr = _parse(f, start, stop, n_cols, delimiter, dtype)
+    if columns is not None:
+        arr = arr[:, columns]
+    target = np.load(out, mmap_mode='r+')
+    target[row:row + arr.shape[0]] = arr
+    target.flush()
+    del target
+    return arr.shape[0]
+
+
+def load_text(f, out=None, columns=None, n_jobs=1, delimiter=None,
+              dtype=np.float64, chunk_size=CHUNK_SIZE):
+    """Load a delimited text file.
+
+    The file is split into chunks of whole lines that are parsed
+    independently into a preallocated array. If ``out`` is passed, chunks
+    are parsed in parallel processes directly into a memory-mapped array,
+    and the input is never held in memory in full. A header line is
+    detected and skipped. Missing values are read as ``nan``.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    f : str
+        path to file.
+
+    out : str, optional
+        ``.npy`` file to write the array to.
+
+    columns : list, optional
+        columns to keep, by position or by header name.
+
+    n_jobs : int (default = 1)
+        number of processes to parse with. Only used if ``out`` is passed.
+
+    delimiter : str, optional
+        column delimiter. Detected from the first line if not passed, and
+        defaults to whitespace.
+
+    dtype : data-type (default = float64)
+        data type of the array.
+
+    chunk_size : int
+        bytes per chunk.
+
+    Returns
+    -------
+    array : array-like
+        loaded array.
+    """
+    with open(f, 'rb') as fh:
+        first = fh.readline().decode()
+        body = fh.tell()
+        fh.seek(0, os.SEEK_END)
+        end = fh.tell()
+
+        # Ignore trailing blank lines
+        while end > 0:
+            fh.seek(max(end - 1, 0))
+            if fh.read(1) not in (b'\n', b'\r', b' ', b'\t'):
+                break
+            end -= 1
+
+    if delimiter is None:
+        delimiter = next((d for d in (',', '\t', ';') if d in first), None)
+
+    fields = _split(first.strip(), delimiter)
+    names = None
+    start = 0
+    if not _is_numeric(fields):
+        names = [n.strip().strip('"\'') for n in fields]
+        start = body
+    n_cols = len(fields)
+
+    columns = _select(names, columns)
+    ranges = _chunks(f, start, end, chunk_size)
+    rows = [_count(f, mi, mx) for mi, mx in ranges]
+    offsets = np.cumsum([0] + rows[:-1]).tolist()
+    shape = (sum(rows), n_cols if columns is None else len(columns))
+
+    array = _allocate(out, shape, dtype)
+    if out is not None and n_jobs != 1 and len(ranges) > 1:
+        # Workers write to the memmap
+        del array
+        Parallel(n_jobs=n_jobs, backend='multiprocessing')(
+            delayed(_parse_into)(f, mi, mx, row, n_cols, delimiter, dtype,
+                                 columns, out)
+            for (mi, mx), row in zip(ranges, offsets))
+        return _squeeze(np.load(out, mmap_mode='r'))
+
+    for (mi, mx), row in zip(ranges, offsets):
+        arr = _parse(f, mi, mx, n_cols, delimiter, dtype)
+        if columns is not None:
+            arr = arr[:, columns]
+        array[row:row + arr.shape[0]] = arr
+
+    if out is not None:
+        array.flush()
+        del array
+        return _squeeze(np.load(out, mmap_mode='r'))
+    return _squeeze(array)
+
+
+def _squeeze(array):
+    """Single columns as 1d arrays, as returned by np.genfromtxt"""
+    return array[:, 0] if array.shape[1] == 1 else array
+
+
+def load_columnar(f, out=None, columns=None, n_jobs=1, dtype=np.float64,
+                  fmt=None):
+    """Load a Parquet or Feather file.
+
+    Only the requested columns are read. Files are memory-mapped by Arrow,
+    and columns are copied one at a time into a preallocated array.
+    Requires ``pyarrow``.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    f : str
+        path to file.
+
+    out : str, optional
+        ``.npy`` file to write the array to.
+
+    columns : list, optional
+        columns to read, by position or by name.
+
+    n_jobs : int (default = 1)
+        number of threads Arrow may use.
+
+    dtype : data-type (default = float64)
+        data type of the array.
+
+    fmt : str, optional
+        one of ``'parquet'`` and ``'feather'``. Inferred from the file
+        extension if not passed.
+
+    Returns
+    -------
+    array : array-like
+        loaded array.
+    """
+    if pq is None:
+        raise ImportError("Reading %s requires pyarrow." % f)
+    if fmt is None:
+        fmt = 'parquet' if f.lower().endswith(('parquet', 'pq')) \
+            else 'feather'
+
+    if fmt == 'parquet':
+        names = pq.read_schema(f).names
+        columns = [names[c] if not isinstance(c, str) else c
+                   for c in columns] if columns is not None else None
+        table = pq.read_table(f, columns=columns, memory_map=True,
+                              use_threads=n_jobs != 1)
+    else:
+        table = feather.read_table(f, columns=columns, memory_map=True)
+
+    array = _allocate(out, (table.num_rows, table.num_columns), dtype)
+    for i, col in enumerate(table.columns):
+        array[:, i] = col.to_pandas().values if not hasattr(col, 'to_numpy') \
+            else col.to_numpy()
+    del table
+
+    if out is not None:
+        array.flush()
+        del array
+        return _squeeze(np.load(out, mmap_mode='r'))
+    return _squeeze(array)
+
+
+register_loader(['csv', 'tsv', 'txt', 'dat'], load_text)
+register_loader(['parquet', 'pq', 'feather', 'arrow'], load_columnar)
@@ -0,0 +1,140 @@
+"""ML-Ensemble
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:license: MIT
+
+Opt-in profiling of sub-tasks. Sub-tasks run under :mod:`cProfile` inside
+the worker, ship their raw profile back with the task result, and profiles
+are merged into one :class:`pstats.Stats` view per layer and per learner.
+"""
+from __future__ import division
+
+import cProfile
+import pstats
+
+
+class _RawStats(object):
+
+    """Carrier of raw profile statistics accepted by :class:`pstats.Stats`"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        """Stats are already created"""
+        pass
+
+
+class Profiler(object):
+
+    """Context manager running a block under :mod:`cProfile`.
+
+    Parameters
+    ----------
+    enabled : bool (default = True)
+        whether to profile. If ``False``, the context is a no-op.
+
+    Attributes
+    ----------
+    stats : dict, None
+        raw profile statistics of the block, as recorded by
+        :class:`pstats.Stats`. Raw statistics can be pickled and are used to
+        ship profiles from workers to the main process.
+    """
+
+    __slots__ = ['enabled', 'stats', '_profile']
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stats = None
+        self._profile = None
+
+    def __enter__(self):
+        if self.enabled:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.enabled:
+            self._profile.disable()
+            self._profile.create_stats()
+            self.stats = self._profile.stats
+            self._profile = None
+        return False
+
+
+def merge_stats(stats):
+    """Merge raw profile statistics.
+
+    Parameters
+    ----------
+    stats : list
+        list of raw profile statistics.
+
+    Returns
+    -------
+    merged : dict, None
+        merged raw statistics, or ``None`` if no profile was recorded.
+    """
+    out = None
+    for s in stats:
+        if not s:
+            continue
+        s = pstats.Stats(_RawStats(dict(s)))
+        if out is None:
+            out = s
+        else:
+            out.add(s)
+    if out is None:
+        return None
+    return out.stats
+
+
+def get_stats(stats):
+    """Build a :class:`pstats.Stats` view of raw profile statistics.
+
+    Parameters
+    ----------
+    stats : dict, None
+        raw profile statistics, as returned by :func:`merge_stats`.
+
+    Returns
+    -------
+    stats : :class:`pstats.Stats`, None
+        profile view, or ``None`` if no profile was recorded.
+    """
+    if not stats:
+        return None
+    return pstats.Stats(_RawStats(dict(stats)))
+
+
+def collect_profiles(records):
+    """Merge profiles shipped with sub-task results.
+
+    Parameters
+    ----------
+    records : list
+        sub-task results. Profiled sub-tasks return a record with the raw
+        profile (``profile``) and the name of the learner or transformer
+        that generated the sub-task (``node``).
+
+    Returns
+    -------
+    merged : dict, None
+        merged raw statistics across all sub-tasks.
+
+    nodes : dict
+        merged raw statistics per learner or transformer.
+    """
+    records = [r for r in records
+               if isinstance(r, dict) and r.get('profile')]
+
+    nodes = dict()
+    for record in records:
+        nodes.setdefault(record['node'], list()).append(record['profile'])
+
+    merged = merge_stats([r['profile'] for r in records])
+    nodes = dict((k, merge_stats(v)) for k, v in nodes.items())
+    return merged, nodes
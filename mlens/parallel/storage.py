@@ -0,0 +1,254 @@
+"""ML-Ensemble
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:license: MIT
+
+Compact storage of prediction arrays. A storage policy stores predictions in
+a narrow data type, i.e. half precision floats or quantized integers, and
+decodes to ``float32`` on read, so that estimators always compute at full
+precision.
+"""
+from __future__ import division
+
+import numpy as np
+
+COMPUTE_DTYPE = np.float32
+
+
+class Storage(object):
+
+    """Base class for storage policies.
+
+    A storage policy is passed as the ``dtype`` of a layer. Prediction
+    arrays are allocated with the storage :attr:`dtype`, predictions are
+    encoded on write and decoded to :attr:`compute` on read.
+
+    .. versionadded:: 0.2.2
+    """
+
+    dtype = None
+    compute = COMPUTE_DTYPE
+
+    def __repr__(self):
+        return '%s()' % self.__class__.__name__
+
+    def __eq__(self, other):
+        return repr(self) == repr(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(repr(self))
+
+    def encode(self, values, cols=None):
+        """Encode values for storage.
+
+        Parameters
+        ----------
+        values : array-like
+            values to store.
+
+        cols : int, slice, array-like, optional
+            columns the values are written to.
+        """
+        return np.asarray(values).astype(self.dtype)
+
+    def decode(self, values, cols=None):
+        """Decode stored values.
+
+        Parameters
+        ----------
+        values : array-like
+            stored values.
+
+        cols : int, slice, array-like, optional
+            columns the values were read from.
+        """
+        return np.asarray(values).astype(self.compute)
+
+
+class Float16Storage(Storage):
+
+    """Half precision storage with single precision compute.
+
+    Halves the memory of ``float32`` prediction arrays, at a relative
+    precision of about ``1e-3`` and a range of about ``6.5e4``.
+
+    .. versionadded:: 0.2.2
+    """
+
+    dtype = np.dtype(np.float16)
+
+
+class BFloat16Storage(Storage):
+
+    """Brain float storage with single precision compute.
+
+    Stores the upper 16 bits of ``float32`` values (rounded to nearest
+    even) as ``uint16``. Halves the memory of ``float32`` prediction arrays
+    while keeping the range of ``float32``, at a relative precision of
+    about ``4e-3``.
+
+    .. versionadded:: 0.2.2
+    """
+
+    dtype = np.dtype(np.uint16)
+
+    def encode(self, values, cols=None):
+        bits = np.asarray(values, dtype=np.float32).view(np.uint32)
+        # Round to nearest even
+        bits = bits + (np.uint32(0x7FFF) + ((bits >> 16) & np.uint32(1)))
+        return (bits >> 16).astype(np.uint16)
+
+    def decode(self, values, cols=None):
+        bits = np.asarray(values, dtype=np.uint32) << 16
+        return bits.view(np.float32)
+
+
+class QuantizedStorage(Storage):
+
+    """Affine quantized storage with single precision compute.
+
+    Maps values in the range ``[low, high]`` linearly onto the integers of
+    an unsigned integer type. Values outside the range are clipped. The
+    range can be set per column. The default range suits probabilities:
+    ``uint8`` storage quarters the memory of ``float32`` probabilities at
+    a maximum error of ``0.002``.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    dtype : str (default = 'uint8')
+        storage type. One of ``'uint8'`` and ``'uint16'``.
+
+    low : float, array-like (default = 0.)
+        lower bound of values, per column if an array.
+
+    high : float, array-like (default = 1.)
+        upper bound of values, per column if an array.
+
+    Examples
+    --------
+    >>> from mlens.ensemble import SuperLearner
+    >>> from mlens.parallel.storage import QuantizedStorage
+    >>> ensemble = SuperLearner()
+    >>> ensemble.add(classifiers, proba=True, dtype=QuantizedStorage())
+    """
+
+    def __init__(self, dtype='uint8', low=0., high=1.):
+        if np.dtype(dtype) not in (np.uint8, np.uint16):
+            raise ValueError("dtype must be one of 'uint8', 'uint16'. "
+                             "Got %r." % dtype)
+        self.dtype = np.dtype(dtype)
+        self.low = np.asarray(low, dtype=COMPUTE_DTYPE)
+        self.high = np.asarray(high, dtype=COMPUTE_DTYPE)
+        if np.any(self.high <= self.low):
+            raise ValueError("high must be greater than low.")
+
+    def __repr__(self):
+        return '%s(dtype=%r, low=%r, high=%r)' % (
+            self.__class__.__name__, self.dtype.name,
+            self.low.tolist(), self.high.tolist())
+
+    def _params(self, cols):
+        """Offset and scale of columns"""
+        low, high = self.low, self.high
+        if cols is not None:
+            low = low[cols] if low.ndim else low
+            high = high[cols] if high.ndim else high
+        scale = (high - low) / np.iinfo(self.dtype).max
+        return low, scale
+
+    def encode(self, values, cols=None):
+        low, scale = self._params(cols)
+        q = np.rint((np.asarray(values, dtype=COMPUTE_DTYPE) - low) / scale)
+        return np.clip(q, 0, np.iinfo(self.dtype).max).astype(self.dtype)
+
+    def decode(self, values, cols=None):
+        low, scale = self._params(cols)
+        return np.asarray(values, dtype=COMPUTE_DTYPE) * scale + low
+
+
+def get_storage(dtype):
+    """Get the storage policy of a dtype, or None for plain numpy dtypes.
+
+    Parameters
+    ----------
+    dtype : obj
+        a :class:`Storage` instance, ``'bfloat16'``, or a numpy dtype.
+    """
+    if isinstance(dtype, Storage):
+        return dtype
+    if isinstance(dtype, str) and dtype == 'bfloat16':
+        return BFloat16Storage()
+    return None
+
+
+class StoredArray(object):
+
+    """Prediction array held in a storage policy.
+
+    Wraps the stored array. Indexing decodes to the compute dtype, and item
+    assignment encodes, so that the array can be read and written as a
+    regular ``float32`` array.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    array : array-like
+        stored array, i.e. a memmap.
+
+    storage : :class:`Storage`
+        storage policy.
+    """
+
+    def __init__(self, array, storage):
+        self.array = array
+        self.storage = storage
+
+    def __repr__(self):
+        return '%s(shape=%r, storage=%r)' % (
+            self.__class__.__name__, self.shape, self.storage)
+
+    @property
+    def shape(self):
+        """Shape of array"""
+        return self.array.shape
+
+    @property
+    def ndim(self):
+        """Number of dimensions"""
+        return self.array.ndim
+
+    @property
+    def dtype(self):
+        """Dtype of decoded values"""
+        return np.dtype(self.storage.compute)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the stored array"""
+        return self.array.nbytes
+
+    def _cols(self, key):
+        """Columns selected by an index"""
+        if isinstance(key, tuple) and len(key) > 1 and self.ndim > 1:
+            return key[1]
+        return None
+
+    def __getitem__(self, key):
+        return self.storage.decode(self.array[key], self._cols(key))
+
+    def __setitem__(self, key, value):
+        self.array[key] = self.storage.encode(value, self._cols(key))
+
+    def __array__(self, dtype=None):
+        out = self.storage.decode(self.array)
+        return out if dtype is None else out.astype(dtype, copy=False)
+
+    def __len__(self):
+        return self.shape[0]
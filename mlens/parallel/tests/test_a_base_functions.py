@@ -3,7 +3,262 @@
 Test base functions used by sublearners
 """
 import os
+import shutil
+import tempfile
+import warnings
 import numpy as np
+from scipy.sparse import random as sparse_random, hstack
+from multiprocessing import cpu_count
+from mlens.parallel import ParallelProcessing, Learner
+from mlens.parallel import _base_functions as bf
 from mlens.parallel._base_functions import slice_array,  assign_predictions
+from mlens.parallel._base_functions import (
+    check_threads, limit_threads, check_affinity, numa_nodes, get_replica,
+    write_replica, memmap_layout, slice_csr, take_csr, hstack_csr,
+    PermutedInput)
+from mlens.parallel.backend import Job, plan_layout, reorder_array
+from mlens.externals.joblib.pool import reduce_memmap
+from mlens.ensemble import Subsemble
+from mlens.index import FoldIndex
+from mlens.utils.dummy import OLS
+from mlens.externals.sklearn.base import BaseEstimator
+from mlens.utils.exceptions import ParallelProcessingWarning
 
-# TODO: Write tests
+
+class Threaded(BaseEstimator):
+
+    """Estimator with estimator-level parallelism"""
+
+    def __init__(self, n_jobs=1):
+        self.n_jobs = n_jobs
+
+
+def test_check_threads():
+    """[Parallel | Functions] test thread budget resolution"""
+    assert check_threads(None, -1) is None
+    assert check_threads(3, -1) == 3
+    assert check_threads('auto', 1) == cpu_count()
+    assert check_threads('auto', -1) == 1
+    assert check_threads('auto', cpu_count(), 'sequential') == cpu_count()
+    assert check_threads(np.int64(3), -1) == 3
+    np.testing.assert_raises(ValueError, check_threads, 0, 1)
+    np.testing.assert_raises(ValueError, check_threads, 'max', 1)
+    np.testing.assert_raises(ValueError, check_threads, True, 1)
+
+
+def test_check_threads_warning():
+    """[Parallel | Functions] test missing threadpoolctl warns once"""
+    limits, warned = bf.threadpool_limits, bf._THREADPOOL_WARNED
+    bf.threadpool_limits, bf._THREADPOOL_WARNED = None, False
+    try:
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            assert check_threads(None, 1) is None
+            assert check_threads(2, 1) == 2
+            assert check_threads('auto', 1) == cpu_count()
+        assert len(w) == 1
+        assert issubclass(w[0].category, ParallelProcessingWarning)
+    finally:
+        bf.threadpool_limits, bf._THREADPOOL_WARNED = limits, warned
+
+
+def test_limit_threads():
+    """[Parallel | Functions] test thread caps are set and restored"""
+    est = Threaded(n_jobs=-1)
+    env = os.environ.get('OMP_NUM_THREADS')
+    with limit_threads(2, est):
+        assert est.n_jobs == 2
+        assert os.environ.get('OMP_NUM_THREADS') == env
+    assert est.n_jobs == -1
+
+    with limit_threads(None, est):
+        assert est.n_jobs == -1
+
+
+def test_check_affinity():
+    """[Parallel | Functions] test worker affinity plans"""
+    cpus = [c for node in numa_nodes() for c in node]
+    assert check_affinity(None, 2) is None
+
+    for policy in ['compact', 'scatter']:
+        plan = check_affinity(policy, 3)
+        assert len(plan) == 3
+        assert all(c in cpus for _, pinned in plan for c in pinned)
+
+    plan = check_affinity([cpus[0], cpus], 3)
+    assert [pinned for _, pinned in plan] == [[cpus[0]], cpus, [cpus[0]]]
+    np.testing.assert_raises(ValueError, check_affinity, 'spread', 2)
+
+
+def test_get_replica():
+    """[Parallel | Functions] test replica lookup of memmapped inputs"""
+    X = np.arange(12, dtype=np.float64).reshape(4, 3)
+    tmp = tempfile.mkdtemp()
+    f = os.path.join(tmp, 'X.npy')
+    np.save(f, X)
+    try:
+        X = np.load(f, mmap_mode='r')
+        g = os.path.join(tmp, 'X_node0_full.npy')
+        np.save(g, X)
+        replicas = {X.filename: (memmap_layout(X), {0: g})}
+        assert get_replica(X, replicas, None) is X
+        Z = get_replica(X, replicas, 0)
+        assert Z.filename == os.path.abspath(g)
+        np.testing.assert_array_equal(Z, X)
+
+        # Views are not swapped for the full replica
+        for V in [X[:2], X[1:3], X[::-1], X[:, :2]]:
+            W = get_replica(V, replicas, 0)
+            assert W.shape == V.shape
+            np.testing.assert_array_equal(W, V)
+
+        # Layouts are kept when arrays are sent to workers
+        for V in [X, X[1:3], X[:, 1:]]:
+            func, args = reduce_memmap(V)
+            assert memmap_layout(func(*args)) == memmap_layout(V)
+
+        # Views replicated in their own right are
+        V = X[1:3]
+        h = os.path.join(tmp, 'X_node0_view.npy')
+        np.save(h, V)
+        W = get_replica(V, {V.filename: (memmap_layout(V), {0: h})}, 0)
+        assert W.filename == os.path.abspath(h)
+        np.testing.assert_array_equal(W, V)
+        del X, Z, V, W
+
+        # Replicas are written from a pinned thread
+        cpus = numa_nodes()[0]
+        before = os.sched_getaffinity(0)
+        f = os.path.join(tmp, 'X_node0.npy')
+        write_replica(np.arange(3.), f, cpus)
+        np.testing.assert_array_equal(np.load(f), np.arange(3.))
+        assert os.sched_getaffinity(0) == before
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_affinity_fit():
+    """[Parallel | Processor] test fit with pinned workers"""
+    X = np.arange(60, dtype=np.float64).reshape(20, 3) ** 0.5
+    y = X.sum(axis=1)
+
+    preds = list()
+    for backend, affinity in [('threading', None),
+                              ('multiprocessing', 'compact'),
+                              ('multiprocessing', 'scatter')]:
+        lr = Learner(OLS(), indexer=FoldIndex(2), name='lr')
+        with ParallelProcessing(backend, 2, affinity=affinity,
+                                numa_replicas=True) as mgr:
+            preds.append(mgr.map(lr, 'fit', X, y, return_preds=True))
+
+    np.testing.assert_array_almost_equal(preds[0], preds[1])
+    np.testing.assert_array_almost_equal(preds[0], preds[2])
+
+
+def test_csr_functions():
+    """[Parallel | Functions] test csr slicing and stacking"""
+    X = sparse_random(40, 8, density=0.3, format='csr', random_state=0)
+    Z = X.toarray()
+
+    S = slice_csr(X, 10, 25)
+    np.testing.assert_array_equal(S.toarray(), Z[10:25])
+    assert np.may_share_memory(S.data, X.data)
+    assert slice_csr(X, 5, 5).shape == (0, 8)
+
+    rows = np.array([3, 0, 39, 3])
+    np.testing.assert_array_equal(take_csr(X, rows).toarray(), Z[rows])
+
+    D = np.arange(80, dtype=np.float32).reshape(40, 2)
+    H = hstack_csr([X[:, [1, 4]], D, X])
+    np.testing.assert_array_equal(
+        H.toarray(), hstack([X[:, [1, 4]], D, X]).toarray())
+
+    # Slices of stacked blocks
+    H = hstack_csr([slice_csr(X, 20, 40), D[20:]], dtype=np.float32)
+    assert H.dtype == np.float32
+    np.testing.assert_array_equal(
+        H.toarray(), np.hstack([Z[20:], D[20:]]).astype(np.float32))
+
+
+def test_permuted_input():
+    """[Parallel | Base] test folds of permuted inputs are gathered by index"""
+    X = np.arange(40.).reshape(10, 4)
+    y = np.arange(10.)
+    idx = np.random.RandomState(0).permutation(10)
+    P = PermutedInput(X, idx)
+    assert P.shape == (10, 4)
+    np.testing.assert_array_equal(np.asarray(P), X[idx])
+    np.testing.assert_array_equal(P[3:, [0, 2]], X[idx][3:, [0, 2]])
+
+    # Fold indices are composed with the permutation
+    for fold in [(2, 7), ((0, 2), (5, 10))]:
+        x, z = slice_array(P, y[idx], fold)
+        ref = slice_array(X[idx], y[idx], fold)
+        np.testing.assert_array_equal(x, ref[0])
+        np.testing.assert_array_equal(z, ref[1])
+
+    S = sparse_random(10, 4, density=0.5, format='csr', random_state=0)
+    np.testing.assert_array_equal(
+        slice_array(PermutedInput(S, idx), None, (1, 6))[0].toarray(),
+        S.toarray()[idx][1:6])
+
+    # Full fits skip the permuted copy and realign the targets instead
+    x, z = slice_array(P, y[idx], 'all', ordered=False)
+    assert np.shares_memory(x, X)
+    np.testing.assert_array_equal(z, y)
+    x, z = slice_array(P, y[idx], 'all')
+    np.testing.assert_array_equal(x, X[idx])
+    np.testing.assert_array_equal(z, y[idx])
+    x, z = slice_array(P, y[idx], (2, 7), ordered=False)
+    np.testing.assert_array_equal(x, X[idx][2:7])
+    np.testing.assert_array_equal(z, y[idx][2:7])
+
+    # Repeated shuffles compose without copying the array
+    job = Job('fit', False, False)
+    job.predict_in, job.y = X, y
+    job.shuffle(1)
+    job.shuffle(2)
+    assert job.predict_in.array is X
+    np.testing.assert_array_equal(X[job.predict_in.order], np.asarray(
+        job.predict_in))
+    np.testing.assert_array_equal(job.y, y[job.predict_in.order])
+
+
+def test_reorder():
+    """[Parallel | Base] test reordered folds are sliced as views"""
+    X = np.random.RandomState(0).rand(60, 3)
+    y = X.sum(axis=1)
+
+    def build(backend):
+        ens = Subsemble(partitions=3, folds=4, backend=backend)
+        ens.add([OLS(0), OLS(1)], propagate_features=[1])
+        ens.add_meta(OLS())
+        return ens
+
+    # Test folds span all partitions: store them as blocks
+    ens = build('threading').fit(X, y)
+    order = plan_layout(ens.layer_1, 60)
+    assert order is not None
+    R = reorder_array(X, order)
+    np.testing.assert_array_equal(np.asarray(R), X)
+
+    tei = list(ens.layer_1.indexers[0].generate())[0][1]
+    assert len(tei) == 3
+    x, z = slice_array(R, y, tei)
+    ref = slice_array(X, y, tei)
+    assert np.shares_memory(x, R.array)
+    np.testing.assert_array_equal(x, ref[0])
+    np.testing.assert_array_equal(z, ref[1])
+
+    S = sparse_random(60, 3, density=0.5, format='csr', random_state=0)
+    rows = np.hstack([np.arange(a, b) for a, b in tei])
+    x = slice_array(reorder_array(S, order), None, tei)[0]
+    np.testing.assert_array_equal(x.toarray(), S.toarray()[rows])
+
+    for backend in ['threading', 'multiprocessing']:
+        ref = build(backend).fit(X, y, return_preds=True)
+        ens = build(backend)
+        P = ens.fit(X, y, return_preds=True, reorder=True)
+        np.testing.assert_array_equal(P, ref)
+        np.testing.assert_array_equal(
+            ens.predict(X), build(backend).fit(X, y).predict(X))
@@ -51,3 +51,10 @@ def test_transform_prep_proba():
     """[Parallel | Learner | Full | Proba | Prep] test transform"""
     args = get_learner('transform', 'full', True, True)
     run_learner(*args)
+
+
+def test_predict_threads():
+    """[Parallel | Learner | Full | No Proba | No Prep] test thread budget"""
+    args = get_learner('predict', 'full', False, False)
+    args[1].threads = 1
+    run_learner(*args)
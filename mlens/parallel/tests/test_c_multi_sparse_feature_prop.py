@@ -110,3 +110,11 @@ def test_shuffle():
     z = ens4.fit(X, y, return_preds=True)
 
     np.testing.assert_array_equal(h.astype(np.float32), z)
+
+
+def test_sparse_multiprocessing():
+    """[Parallel] Test sparse feature propagation with multiprocessing."""
+    out_1 = ens3.fit(csr_matrix(X), y, return_preds=True)
+    out_2 = ens3.fit(csr_matrix(X).tocsc(), y, return_preds=True,
+                     backend='multiprocessing')
+    np.testing.assert_allclose(out_1.toarray(), out_2.toarray())
@@ -0,0 +1,92 @@
+"""ML-ENSEMBLE
+
+Test columnar inputs.
+"""
+import pickle
+
+import numpy as np
+
+from mlens.parallel import ColumnarInput
+from mlens.parallel.columnar import BlockCache, materialize
+from mlens.preprocessing import Subset
+from mlens.ensemble import SuperLearner
+from mlens.utils import check_inputs
+from mlens.utils.dummy import OLS
+
+X = np.random.RandomState(0).rand(60, 6)
+y = X[:, :3].sum(axis=1)
+COLS = dict(('c%i' % i, X[:, i].copy()) for i in range(6))
+
+
+def test_columnar_input():
+    """[Parallel | Columnar] test row views and column blocks"""
+    C = ColumnarInput(COLS)
+    assert C.shape == (60, 6)
+    np.testing.assert_array_equal(np.asarray(C), X)
+    np.testing.assert_array_equal(materialize(C), X)
+
+    # Rows are views, blocks are materialized on indexing columns
+    V = C[10:20][2:5]
+    assert V.shape == (3, 6)
+    np.testing.assert_array_equal(V.take(['c1', 'c4']), X[12:15][:, [1, 4]])
+    np.testing.assert_array_equal(C[::-1][2:5].take(), X[::-1][2:5])
+    np.testing.assert_array_equal(C[5:][[0, 3]].take([0]), X[5:][[0, 3], :1])
+    np.testing.assert_array_equal(C[4:8, [5, 0]], X[4:8][:, [5, 0]])
+
+    # Blocks are cached, shared across views and read-only
+    B = C[10:20].take(['c1'])
+    assert C[10:20].take([1]) is B
+    assert not B.flags.writeable
+    assert len(pickle.loads(pickle.dumps(C)).cache) == 0
+
+    np.testing.assert_raises(KeyError, C.take, ['x'])
+    np.testing.assert_raises(ValueError, ColumnarInput, {'a': np.arange(3),
+                                                         'b': np.arange(4)})
+    np.testing.assert_raises(ValueError, ColumnarInput,
+                             {'a': np.array(['a', 'b'])})
+
+
+def test_block_cache():
+    """[Parallel | Columnar] test block cache evicts least recently used"""
+    cache = BlockCache(max_nbytes=16)
+    a, b, c = np.zeros(1), np.ones(1), np.ones(1) * 2
+    cache.put('a', a)
+    cache.put('b', b)
+    assert cache.get('a') is a
+    cache.put('c', c)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    cache.put('d', np.zeros(3))
+    assert 'd' not in cache
+
+
+def test_check_columnar():
+    """[Parallel | Columnar] test input checks do not convert"""
+    C = ColumnarInput(COLS)
+    Z, z = check_inputs(C, y, 2)
+    assert Z is C
+    np.testing.assert_array_equal(z, y)
+
+    Z = dict(COLS, c9=np.full(60, np.nan))
+    np.testing.assert_raises(ValueError, check_inputs, ColumnarInput(Z), y, 2)
+
+
+def test_fit_columnar():
+    """[Parallel | Columnar] test subsets are pushed down to columns"""
+    def build(backend, a, b):
+        ens = SuperLearner(folds=3, backend=backend)
+        ens.add({'a': [OLS(0)], 'b': [OLS(1)]},
+                {'a': [Subset(a)], 'b': [Subset(b)]})
+        ens.add_meta(OLS())
+        return ens
+
+    ref = build('threading', [0, 1], [2, 5]).fit(X, y, return_preds=True)
+    for backend in ['threading', 'multiprocessing']:
+        C = ColumnarInput(COLS)
+        ens = build(backend, ['c0', 'c1'], ['c2', 'c5'])
+        P = ens.fit(C, y, return_preds=True)
+        np.testing.assert_array_almost_equal(P, ref)
+
+        if backend == 'threading':
+            # Only the columns of subsets were materialized
+            blocks = set(key[1] for key in C.cache._blocks)
+            assert blocks == set([(0, 1), (2, 5)])
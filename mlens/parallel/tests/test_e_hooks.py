@@ -0,0 +1,185 @@
+"""ML-Ensemble
+
+Test of event hooks and metrics consumer
+"""
+import shutil
+import tempfile
+
+import numpy as np
+from mlens.testing import Data
+from mlens.ensemble import SuperLearner
+from mlens.model_selection import Evaluator, AsyncEvaluator
+from mlens.metrics import mape, make_scorer
+from mlens.parallel import Hooks, Metrics, Learner
+from mlens.parallel import run as _run
+from mlens.parallel.hooks import check_hooks
+from mlens.utils import FeatureStore
+from mlens.utils.dummy import OLS, Scale
+from scipy.stats import randint
+
+
+data = Data('stack', False, True, True)
+X, y = data.get_data((25, 4), 3)
+
+
+class Failing(OLS):
+
+    """Estimator that fails to fit"""
+
+    def fit(self, X, y):
+        raise ValueError("This fails.")
+
+
+def _ensemble(backend):
+    """Two layer ensemble with preprocessing"""
+    ens = SuperLearner(folds=2, backend=backend, n_jobs=2)
+    ens.add([OLS(), OLS(offset=1)], preprocessing=[Scale()])
+    ens.add_meta(OLS())
+    return ens
+
+
+def test_check_hooks():
+    """[Parallel | Hooks] test check hooks"""
+    assert check_hooks(None) is None
+    hooks = Hooks()
+    assert check_hooks(hooks) is hooks
+    assert check_hooks(Metrics()).callbacks
+    assert len(check_hooks([Metrics(), Metrics()]).callbacks) == 2
+    np.testing.assert_raises(TypeError, check_hooks, 'metrics')
+    np.testing.assert_raises(TypeError, Hooks, 1)
+
+
+def test_events():
+    """[Parallel | Hooks] test event sequence across backends"""
+    for backend in ['sequential', 'threading', 'multiprocessing']:
+        events = list()
+        metrics = Metrics()
+        ens = _ensemble(backend)
+        ens.fit(X, y, hooks=[metrics, lambda e, i: events.append((e, i))])
+
+        # 2 learners x 3 fits, 1 preprocessing x 3 fits, 1 meta learner
+        assert metrics.counters['task_finished'] == 10
+        assert metrics.counters['task_queued'] == 10
+        assert metrics.counters['task_started'] == 10
+        assert metrics.counters['layer_done'] == 2
+        assert metrics.counters['task_failed'] == 0
+        assert events[0][0] == 'job_started'
+        assert events[0][1]['n_layers'] == 2
+        assert events[-1][0] == 'job_done'
+
+        for event, info in events:
+            if event == 'task_finished':
+                assert info['duration'] >= 0
+                assert info['task'] is not None
+
+        assert metrics.progress == 1
+        assert metrics.remaining == 0
+        assert metrics.eta == 0
+
+        # Sub-tasks are submitted in batches as they are generated
+        assert metrics.counters['tasks_submitted'] > 2
+        assert metrics.n_submitted == 10
+
+        # Predicting with fitted preprocessing is not a cache hit
+        ens.predict(X, hooks=metrics)
+        assert metrics.counters['job_started'] == 2
+        assert metrics.cache_hits == 0
+
+
+def test_cache_hit():
+    """[Parallel | Hooks] test cache hits on reused output"""
+    ens = _ensemble('threading')
+    ens.fit(X, y, keep_preds=True)
+
+    events = list()
+    ens.update(X, y, hooks=lambda e, i: events.append((e, i)))
+    hits = [i['task'] for e, i in events if e == 'cache_hit']
+    assert len(hits) == 3
+    assert not [e for e, _ in events if e == 'task_finished']
+
+    # Feature store entries
+    path = tempfile.mkdtemp()
+    try:
+        for n_hits in [0, 2]:
+            metrics = Metrics()
+            ens = SuperLearner(model_selection=True,
+                               feature_store=FeatureStore(path))
+            ens.add([OLS()])
+            ens.fit(X, y, hooks=metrics).transform(X, y, hooks=metrics)
+            assert metrics.cache_hits == n_hits
+    finally:
+        shutil.rmtree(path)
+
+
+def test_failed():
+    """[Parallel | Hooks] test task failed event"""
+    for backend in ['sequential', 'threading', 'multiprocessing']:
+        events = list()
+        metrics = Metrics()
+        lr = Learner(Failing(), indexer=data.indexer, name='lr')
+        np.testing.assert_raises(
+            ValueError, _run, lr, 'fit', X, y, backend=backend,
+            hooks=[metrics, lambda e, i: events.append((e, i))])
+        assert metrics.counters['task_failed'] >= 1
+        assert metrics.counters['layer_done'] == 0
+
+        # Reported per sub-task, not for the learner
+        for event, info in events:
+            if event == 'task_failed':
+                assert info['task'].startswith('lr.')
+                assert info['job'] == 'fit'
+
+
+def test_evaluator():
+    """[Parallel | Hooks] test hooks on evaluator"""
+    metrics = Metrics()
+    evl = Evaluator(make_scorer(mape, greater_is_better=False), cv=2)
+    evl.fit(X, y, estimators=[OLS()],
+            param_dicts={'ols': {'offset': randint(1, 10)}},
+            preprocessing={'pr': [Scale()]}, n_iter=2, hooks=metrics)
+
+    assert metrics.counters['layer_done'] == 2
+    assert metrics.counters['task_finished'] == 2 + 2 * 2
+    assert metrics.n_layers == 2
+
+
+def test_async_evaluator():
+    """[Parallel | Hooks] test hooks on asynchronous evaluator"""
+    for backend in ['sequential', 'threading', 'multiprocessing']:
+        metrics = Metrics()
+        evl = AsyncEvaluator(make_scorer(mape, greater_is_better=False),
+                             cv=2, max_fits=6, backend=backend, n_jobs=2)
+        evl.fit(X, y, estimators=[OLS()],
+                param_dicts={'ols': {'offset': randint(1, 10)}},
+                preprocessing={'pr': [Scale()]}, hooks=metrics)
+
+        assert evl.n_fits_ == 6
+        assert metrics.counters['layer_done'] == 2
+        assert metrics.counters['task_queued'] == 2 + 6
+        assert metrics.counters['task_started'] == 2 + 6
+        assert metrics.counters['task_finished'] == 2 + 6
+
+
+def test_eta():
+    """[Parallel | Hooks] test metrics progress and eta"""
+    metrics = Metrics(bins=[1, 10])
+    metrics('job_started', {'time': 0, 'job': 'fit', 'n_layers': 3})
+    metrics('tasks_submitted', {'time': 0, 'n_tasks': 4})
+    for t in [1, 2, 3, 4]:
+        metrics('task_finished', {'time': t, 'duration': 0.5 * t})
+    metrics('layer_done', {'time': 4})
+    metrics('tasks_submitted', {'time': 4, 'n_tasks': 4})
+    for t in [5, 6]:
+        metrics('task_finished', {'time': t, 'duration': 5})
+
+    # 2 tasks left in the current layer, 4 extrapolated for the last layer
+    assert metrics.remaining == 6
+    assert metrics.throughput == 1
+    assert metrics.eta == 6
+    assert metrics.progress == 0.5
+    assert metrics.histogram == [(1, 2), (10, 4), (np.inf, 0)]
+
+    metrics('job_started', {'time': 10, 'job': 'predict', 'n_layers': 1})
+    assert metrics.remaining == 0
+    assert metrics.eta is None
+    assert metrics.counters['task_finished'] == 6
@@ -0,0 +1,202 @@
+"""ML-ENSEMBLE
+
+Test file loaders and shared inputs.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy.sparse import csc_matrix, isspmatrix_csr
+
+from mlens.parallel import (
+    ParallelProcessing, Learner, FileInput, register_loader, dump_array)
+from mlens.parallel.loaders import (
+    load_file, load_text, load_columnar, LOADERS)
+from mlens.parallel.backend import file_backed, share_array, InputRegistry
+from mlens.index import FoldIndex
+from mlens.utils.dummy import OLS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    run_pyarrow = True
+except ImportError:
+    run_pyarrow = False
+
+X = np.arange(60, dtype=np.float64).reshape(20, 3) ** 0.5
+y = X.sum(axis=1)
+
+
+def test_load_text():
+    """[Parallel | Loaders] test loading text files"""
+    tmp = tempfile.mkdtemp()
+    try:
+        f = os.path.join(tmp, 'X.csv')
+        np.savetxt(f, X, delimiter=',', header='a,b,c', comments='')
+        np.testing.assert_array_almost_equal(load_file(f), X)
+
+        g = os.path.join(tmp, 'X.txt')
+        np.savetxt(g, X)
+        np.testing.assert_array_almost_equal(load_file(g), X)
+
+        # Chunked parallel parse into memmap with column projection
+        out = os.path.join(tmp, 'out.npy')
+        Z = load_file(FileInput(f, columns=['c', 0], chunk_size=64),
+                      out=out, n_jobs=2)
+        assert isinstance(Z, np.memmap)
+        np.testing.assert_array_almost_equal(Z, X[:, [2, 0]])
+        del Z
+
+        # Missing values and blank lines
+        with open(g, 'w') as fh:
+            fh.write('1,2\n3,\n\n5,6\n\n')
+        np.testing.assert_array_equal(
+            load_file(g), np.array([[1, 2], [3, np.nan], [5, 6]]))
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_register_loader():
+    """[Parallel | Loaders] test registering a loader"""
+    tmp = tempfile.mkdtemp()
+    try:
+        @register_loader('dummy')
+        def load_dummy(f, out=None, columns=None, n_jobs=1):
+            return X
+
+        f = os.path.join(tmp, 'X.dummy')
+        assert dump_array(f, 'X', tmp) == os.path.join(tmp, 'X.mmap')
+        np.testing.assert_array_equal(load_file(f), X)
+    finally:
+        LOADERS.pop('dummy', None)
+        shutil.rmtree(tmp)
+
+
+def test_fit_file():
+    """[Parallel | Loaders] test fit from files"""
+    tmp = tempfile.mkdtemp()
+    try:
+        f = os.path.join(tmp, 'X.csv')
+        g = os.path.join(tmp, 'y.csv')
+        np.savetxt(f, X, delimiter=',')
+        np.savetxt(g, y)
+
+        # Single columns load as 1d arrays
+        assert load_text(g).shape == y.shape
+        assert load_text(g, os.path.join(tmp, 'y.npy')).shape == y.shape
+
+        preds = list()
+        for backend in ['threading', 'multiprocessing']:
+            for inp in [X, f, FileInput(f, chunk_size=64)]:
+                lr = Learner(OLS(), indexer=FoldIndex(2), name='lr')
+                with ParallelProcessing(backend, 2) as mgr:
+                    mgr.initialize('fit', inp, g, None, stack=False,
+                                   split=False)
+                    assert mgr.job.y.shape == y.shape
+                with ParallelProcessing(backend, 2) as mgr:
+                    preds.append(
+                        mgr.map(lr, 'fit', inp, g, return_preds=True))
+
+        for p in preds[1:]:
+            np.testing.assert_array_almost_equal(p, preds[0])
+    finally:
+        shutil.rmtree(tmp)
+
+
+if run_pyarrow:
+    def test_fit_columnar():
+        """[Parallel | Loaders] test fit from columnar files"""
+        tmp = tempfile.mkdtemp()
+        try:
+            f = os.path.join(tmp, 'X.parquet')
+            g = os.path.join(tmp, 'y.parquet')
+            pq.write_table(pa.Table.from_arrays(
+                [pa.array(X[:, i]) for i in range(3)], ['a', 'b', 'c']), f)
+            pq.write_table(pa.Table.from_arrays([pa.array(y)], ['y']), g)
+
+            # Single columns load as 1d arrays
+            assert load_columnar(g).shape == y.shape
+            assert load_columnar(
+                g, os.path.join(tmp, 'y.npy')).shape == y.shape
+            np.testing.assert_array_equal(
+                load_columnar(f, columns=['c', 0]), X[:, [2, 0]])
+
+            preds = list()
+            for inp in [X, f]:
+                lr = Learner(OLS(), indexer=FoldIndex(2), name='lr')
+                with ParallelProcessing('threading', 2) as mgr:
+                    preds.append(
+                        mgr.map(lr, 'fit', inp, g, return_preds=True))
+            np.testing.assert_array_almost_equal(preds[1], preds[0])
+        finally:
+            shutil.rmtree(tmp)
+
+
+def test_file_backed():
+    """[Parallel | Loaders] test file-backed inputs are not dumped"""
+    tmp = tempfile.mkdtemp()
+    try:
+        f = os.path.join(tmp, 'X.npy')
+        np.save(f, X)
+        Z = np.load(f, mmap_mode='r')
+        assert file_backed(X) is None
+        assert file_backed(Z) is Z
+
+        # Views of memmaps are mapped on the same file
+        V = file_backed(np.asarray(Z)[5:])
+        assert isinstance(V, np.memmap) and V.filename == Z.filename
+        np.testing.assert_array_equal(V, X[5:])
+
+        A, dumped = share_array(Z, 'X', tmp)
+        assert A is Z and not dumped
+        del Z, V, A
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_share_sparse():
+    """[Parallel | Loaders] test sparse inputs are shared as csr memmaps"""
+    tmp = tempfile.mkdtemp()
+    try:
+        S = csc_matrix(X)
+        A, dumped = share_array(S, 'X', tmp)
+        assert dumped and isspmatrix_csr(A)
+        assert all(file_backed(a) is not None
+                   for a in (A.data, A.indices, A.indptr))
+        np.testing.assert_array_equal(A.toarray(), X)
+
+        B, dumped = share_array(A, 'X', tmp)
+        assert not dumped
+        np.testing.assert_array_equal(B.toarray(), X)
+        del A, B
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_input_registry():
+    """[Parallel | Loaders] test input registry reuses dumps"""
+    registry = InputRegistry(min_nbytes=0)
+    try:
+        Z = X.copy()
+        f, dumped = registry.get(Z)
+        assert dumped
+        np.testing.assert_array_equal(np.load(f), Z)
+        assert registry.get(Z) == (f, False)
+
+        # Modified content is dumped again
+        Z[0, 0] = -1
+        g, dumped = registry.get(Z)
+        assert dumped and g != f
+        np.testing.assert_array_equal(np.load(g), Z)
+        assert not os.path.exists(f)
+
+        # Dumps are removed with the array
+        del Z
+        assert len(registry) == 0
+        assert not os.path.exists(g)
+
+        # Non-contiguous arrays are not registered
+        assert registry.get(X[:, :2]) == (None, False)
+    finally:
+        registry.clear()
@@ -0,0 +1,74 @@
+"""ML-Ensemble
+
+Test of sub-task profiling
+"""
+import pickle
+import pstats
+from mlens.testing import Data
+from mlens.ensemble import SuperLearner
+from mlens.parallel import Learner
+from mlens.parallel import run as _run
+from mlens.parallel.profiling import Profiler, merge_stats, get_stats
+from mlens.utils.dummy import OLS, Scale
+
+
+data = Data('stack', False, True, True)
+X, y = data.get_data((25, 4), 3)
+
+
+def _work():
+    """Function to profile"""
+    return sum(range(100))
+
+
+def test_merge():
+    """[Parallel | Profiling] test merging raw profiles"""
+    with Profiler() as p1:
+        _work()
+    with Profiler() as p2:
+        _work()
+        _work()
+    with Profiler(False) as p3:
+        _work()
+
+    assert p3.stats is None
+    merged = merge_stats([p1.stats, p2.stats, p3.stats])
+    stats = get_stats(merged)
+    assert isinstance(stats, pstats.Stats)
+
+    calls = [v[1] for k, v in stats.stats.items() if k[2] == '_work']
+    assert calls == [3]
+    assert merge_stats([None]) is None
+    assert get_stats(None) is None
+
+
+def test_learner():
+    """[Parallel | Profiling] test learner profile"""
+    lr = Learner(OLS(), indexer=data.indexer, name='lr')
+    _run(lr, 'fit', X, y)
+    assert lr.profile is None
+
+    _run(lr, 'predict', X, profile=True)
+    assert isinstance(lr.profile, pstats.Stats)
+
+
+def test_ensemble():
+    """[Parallel | Profiling] test profiles per layer and learner"""
+    for backend in ['threading', 'multiprocessing']:
+        ens = SuperLearner(backend=backend)
+        ens.add([OLS(), OLS(offset=1)], preprocessing=[Scale()])
+        ens.add_meta(OLS())
+        ens.fit(X, y)
+        assert ens.profile == dict()
+
+        ens.fit(X, y, profile=True)
+        assert sorted(ens.profile) == [
+            'layer-1', 'layer-1/ols-1', 'layer-1/ols-2', 'layer-1/pr',
+            'layer-2', 'layer-2/ols']
+
+        fits = [v[1] for k, v in ens.profile['layer-1/ols-1'].stats.items()
+                if k[2] == 'fit' and k[0].endswith('dummy.py')]
+        assert fits == [data.indexer.folds + 1]
+
+        # Profiles are stored as raw statistics, so ensembles can be pickled
+        pickle.loads(pickle.dumps(ens))
@@ -0,0 +1,58 @@
+"""ML-ENSEMBLE
+
+Test compact storage of prediction arrays.
+"""
+import numpy as np
+
+from mlens.parallel import ParallelProcessing
+from mlens.parallel.storage import (
+    Float16Storage, BFloat16Storage, QuantizedStorage, StoredArray,
+    get_storage)
+from mlens.testing.dummy import get_layer
+
+
+def test_storage():
+    """[Parallel | Storage] test encoding precision"""
+    x = np.linspace(-100, 100, 1001, dtype=np.float32)
+    for storage, rtol in [(Float16Storage(), 1e-3), (BFloat16Storage(), 4e-3)]:
+        y = storage.decode(storage.encode(x))
+        assert y.dtype == np.float32
+        np.testing.assert_allclose(y, x, rtol=rtol, atol=1e-6)
+
+    p = np.linspace(0, 1, 1001, dtype=np.float32)
+    for dtype in ['uint8', 'uint16']:
+        storage = QuantizedStorage(dtype)
+        q = storage.encode(p)
+        assert q.dtype == np.dtype(dtype)
+        step = 1. / np.iinfo(dtype).max
+        np.testing.assert_allclose(storage.decode(q), p, atol=step / 2 + 1e-7)
+
+    # Per-column ranges and clipping
+    storage = QuantizedStorage(low=[0, -10], high=[1, 10])
+    A = StoredArray(np.zeros((3, 2), dtype=np.uint8), storage)
+    A[:, 0] = [0., 0.5, 2.]
+    A[:, 1] = [-10., 0., 10.]
+    np.testing.assert_allclose(
+        A[...], [[0., -10.], [0.5, 0.], [1., 10.]], atol=0.05)
+    np.testing.assert_allclose(A[1], [0.5, 0.], atol=0.05)
+
+    assert get_storage('bfloat16') == BFloat16Storage()
+    assert get_storage(np.float32) is None
+
+
+def test_layer_storage():
+    """[Parallel | Storage] test accuracy of layers with compact storage"""
+    cases = [('full', False, Float16Storage(), 1e-3, 0),
+             ('stack', False, BFloat16Storage(), 4e-3, 0),
+             ('stack', True, QuantizedStorage(), 0, 1 / 510.),
+             ('subsemble', True, QuantizedStorage('uint16'), 0, 1e-4)]
+    for case, proba, storage, rtol, atol in cases:
+        for backend in ['threading', 'multiprocessing']:
+            _, layer, X, y, F, _ = get_layer(
+                'fit', backend, case, proba, False)
+            layer.dtype = storage
+            with ParallelProcessing(backend, 2) as mgr:
+                P = mgr.map(layer, 'fit', X, y, return_preds=True)
+                assert P.dtype == np.float32
+                assert mgr.job.predict_out.nbytes < F.size * 4
+            np.testing.assert_allclose(P, F, rtol=rtol, atol=atol)
@@ -0,0 +1,79 @@
+"""ML-Ensemble
+
+Test of task-level tracing
+"""
+import os
+import json
+import shutil
+import tempfile
+from mlens.testing import Data
+from mlens.parallel import Group, Learner, Transformer, Pipeline, Tracer
+from mlens.parallel import run as _run
+from mlens.utils.dummy import OLS, Scale
+
+
+data = Data('stack', False, True, True)
+X, y = data.get_data((25, 4), 3)
+
+
+def _group():
+    """Learner with a preprocessing dependency"""
+    tr = Transformer(Pipeline(Scale(), return_y=True),
+                     indexer=data.indexer, name='sc')
+    lr = Learner(OLS(), indexer=data.indexer, preprocess='sc', name='lr')
+    return Group(data.indexer, lr, tr)
+
+
+def _check_trace(tracer, backend):
+    """Check recorded spans"""
+    cats = set(s['cat'] for s in tracer.spans)
+    for cat in ['process', 'setup', 'run', 'task', 'slice', 'fit', 'save']:
+        assert cat in cats, "%s span missing with %s" % (cat, backend)
+
+    tasks = [s for s in tracer.spans if s['cat'] == 'task']
+    assert len(tasks) == 2 * (data.indexer.folds + 1)
+    for s in tasks:
+        assert s['args']['queue_wait'] >= 0
+        assert s['dur'] >= 0
+
+    reads = [s['args']['bytes_read'] for s in tracer.spans
+             if s['cat'] == 'slice']
+    assert all(r > 0 for r in reads)
+
+
+def test_tracer():
+    """[Parallel | Tracer] test spans across backends"""
+    for backend in ['threading', 'multiprocessing']:
+        tracer = Tracer()
+        group = _group()
+        group.backend = backend
+        for lr in group:
+            lr.backend = backend
+        _run(group, 'fit', X, y, tracer=tracer)
+        _check_trace(tracer, backend)
+        assert tracer.path is None
+
+
+def test_export():
+    """[Parallel | Tracer] test chrome trace export"""
+    tracer = Tracer()
+    _run(_group(), 'fit', X, y, tracer=tracer)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        f = os.path.join(tmp, 'trace.json')
+        trace = tracer.export(f)
+        with open(f) as fh:
+            loaded = json.load(fh)
+    finally:
+        shutil.rmtree(tmp)
+
+    assert loaded['traceEvents'] == trace['traceEvents']
+    ts = [e['ts'] for e in loaded['traceEvents']]
+    assert ts == sorted(ts)
+    for e in loaded['traceEvents']:
+        assert e['ph'] == 'X'
+        assert set(['name', 'cat', 'pid', 'tid', 'ts', 'dur']) <= set(e)
+
+    tracer.clear()
+    assert not tracer.spans
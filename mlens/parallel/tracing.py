@@ -0,0 +1,229 @@
+"""ML-Ensemble
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:license: MIT
+
+Task-level tracing of parallel estimation. Records spans for processor,
+layer and sub-task phases across workers, and exports them in the Chrome
+trace-event format.
+"""
+from __future__ import division
+
+import os
+import json
+import threading
+from multiprocessing import current_process
+from time import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _rss():
+    """Resident set size of the current process in bytes"""
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, AttributeError):
+        return None
+
+
+def now():
+    """Wall-clock time, comparable across worker processes"""
+    return time()
+
+
+def nbytes(*arrays):
+    """Number of bytes held by a set of arrays"""
+    out = 0
+    for array in arrays:
+        if array is None:
+            continue
+        if hasattr(array, 'nbytes'):
+            out += array.nbytes
+        elif hasattr(array, 'data') and hasattr(array.data, 'nbytes'):
+            # Sparse matrices
+            out += array.data.nbytes + array.indices.nbytes + \
+                array.indptr.nbytes
+    return int(out)
+
+
+class _Span(object):
+
+    """Context manager recording a trace event on exit"""
+
+    __slots__ = ['tracer', 'event', '_rss']
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self._rss = None
+        process = current_process()
+        thread = threading.current_thread()
+        args['worker'] = '%s/%s' % (process.name, thread.name)
+        self.event = {'name': name, 'cat': cat, 'ph': 'X',
+                      'pid': os.getpid(), 'tid': thread.ident, 'args': args}
+
+    def __enter__(self):
+        self._rss = _rss()
+        t0 = time()
+        self.event['ts'] = t0 * 1e6
+        queued = self.event['args'].pop('queued', None)
+        if queued is not None:
+            self.event['args']['queue_wait'] = t0 - queued
+        return self.event['args']
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.event['dur'] = time() * 1e6 - self.event['ts']
+        rss = _rss()
+        if rss is not None and self._rss is not None:
+            self.event['args']['rss_delta'] = rss - self._rss
+        if exc_type is not None:
+            self.event['args']['error'] = repr(exc_value)
+        self.tracer.record(self.event)
+        return False
+
+
+class _NullSpan(object):
+
+    """No-op span used when tracing is off"""
+
+    __slots__ = []
+
+    def __enter__(self):
+        return dict()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(tracer, name, cat, **args):
+    """Open a span on a tracer.
+
+    Parameters
+    ----------
+    tracer : :class:`Tracer`, None
+        tracer to record the span with. If ``None``, the span is a no-op.
+
+    name : str
+        name of the span, i.e. the task name.
+
+    cat : str
+        category of the span, i.e. the phase.
+
+    **args : optional
+        additional span data. If ``queued`` is passed, it is taken as the
+        wall-clock time the task was queued, and the span records the
+        ``queue_wait`` until the span was opened.
+
+    Returns
+    -------
+    span : context manager
+        The context returns a dictionary of span data that can be updated
+        within the context, i.e. with the number of bytes read.
+    """
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, cat, args)
+
+
+class Tracer(object):
+
+    """Task-level tracer.
+
+    Records spans of the processing phases of a parallel estimation: input
+    initialization, task setup, preprocessing, fitting, predicting, cache
+    saves and collection, for each sub-learner and sub-transformer and
+    across all workers. Each span records the worker that ran it, the
+    bytes read and written where applicable, and the change in resident
+    memory of the worker. Sub-task spans record the time spent queued before
+    a worker picked them up.
+
+    Pass a tracer to a processor, or to the ``fit``, ``predict`` and
+    ``transform`` calls of an ensemble. Spans recorded in worker processes
+    are written to the estimation cache and merged into :attr:`spans` when
+    the processor terminates.
+
+    .. versionadded:: 0.2.2
+
+    Examples
+    --------
+    >>> from mlens.parallel import Tracer
+    >>> tracer = Tracer()
+    >>> ensemble.fit(X, y, tracer=tracer)
+    >>> tracer.export('trace.json')  # Open in chrome://tracing
+    """
+
+    def __init__(self):
+        self.spans = list()
+        self.path = None
+        self._pid = os.getpid()
+
+    def __getstate__(self):
+        """Workers only need the trace sink"""
+        return {'path': self.path, '_pid': self._pid}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.spans = list()
+
+    def span(self, name, cat, **args):
+        """Open a span. See :func:`span`."""
+        return span(self, name, cat, **args)
+
+    def record(self, event):
+        """Record a trace event.
+
+        Events recorded in the process that created the tracer are stored
+        in memory. Events recorded in worker processes are appended to a
+        per-process file in the trace sink.
+        """
+        if os.getpid() == self._pid or self.path is None:
+            self.spans.append(event)
+            return
+
+        f = os.path.join(self.path, 'trace_%i.jsonl' % os.getpid())
+        with open(f, 'a') as trace:
+            trace.write(json.dumps(event) + '\n')
+
+    def collect(self):
+        """Merge spans recorded by worker processes"""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        for f in sorted(os.listdir(self.path)):
+            f = os.path.join(self.path, f)
+            with open(f) as trace:
+                self.spans.extend(json.loads(l) for l in trace if l.strip())
+            os.unlink(f)
+
+    def clear(self):
+        """Drop recorded spans"""
+        self.spans = list()
+
+    def export(self, f=None):
+        """Export spans in the Chrome trace-event format.
+
+        Parameters
+        ----------
+        f : str, optional
+            file path to write the trace to. Open in ``chrome://tracing`` or
+            any viewer that supports the trace-event format.
+
+        Returns
+        -------
+        trace : dict
+            trace-event dictionary.
+        """
+        events = sorted(self.spans, key=lambda e: e['ts'])
+        trace = {'traceEvents': events, 'displayTimeUnit': 'ms'}
+        if f is not None:
+            with open(f, 'w') as out:
+                json.dump(trace, out)
+        return trace
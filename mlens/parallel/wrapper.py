@@ -8,7 +8,7 @@ Estimator wrappers around base classes.
 """
 from .. import config
 from .base import BaseParallel, OutputMixin
-from .backend import ParallelProcessing
+from .backend import ParallelProcessing, pop_processor_kwargs
 from ..utils.exceptions import ParallelProcessingError, NotFittedError
 from ..utils.validation import check_inputs as _check_inputs
 
@@ -268,8 +268,10 @@ def run(caller, job, X, y=None, map=True, **kwargs):
     **kwargs: optional
         Keyword arguments. :func:`run` searches for
         ``proba`` and ``return_preds`` to temporarily update callers to run
-        desired job and return desired output. Other ``kwargs`` are passed
-        to either ``map`` or ``stack``.
+        desired job and return desired output. Processor settings
+        (``affinity``, ``numa_replicas``, ``tracer``, ``hooks``,
+        ``profile``) are passed to the processor. Other ``kwargs`` are
+        passed to either ``map`` or ``stack``.
     """
     X, y = check_inputs(X, y, kwargs.pop('array_check', 2))
 
@@ -283,7 +285,8 @@ def run(caller, job, X, y=None, map=True, **kwargs):
         verbose = max(getattr(caller, 'verbose', 0) - 4, 0)
         _backend = getattr(caller, 'backend', config.get_backend())
         n_jobs = getattr(caller, 'n_jobs', -1)
-        with ParallelProcessing(_backend, n_jobs, verbose) as mgr:
+        with ParallelProcessing(_backend, n_jobs, verbose,
+                                **pop_processor_kwargs(kwargs)) as mgr:
             if map:
                 out = mgr.map(caller, job, X, y, **kwargs)
             else:
@@ -23,8 +23,15 @@ class Subset(BaseEstimator, TransformerMixin):
         list of columns indexes to select subset with. Indexes can
         either be of type ``str`` if data accepts slicing on a list of
         strings, otherwise the list should be of type ``int``.
+
+    .. versionchanged:: 0.2.2
+       On a :class:`~mlens.parallel.columnar.ColumnarInput`, only the
+       columns of the subset are materialized.
     """
 
+    # Selects directly on columnar inputs
+    _columnar = True
+
     def __init__(self, subset=None):
         self.subset = subset
 
@@ -63,6 +70,9 @@ class Subset(BaseEstimator, TransformerMixin):
         if self.subset is None:
             return X
 
+        elif getattr(X, '__columnar__', False):
+            return X.take(self.subset)
+
         else:
             Xt = X.copy() if copy else X
 
@@ -6,6 +6,7 @@
 """
 
 from .id_train import IdTrain
+from .feature_store import FeatureStore
 from .utils import (
     pickle_save, pickle_load, load, time, print_time, safe_print, CMLog,
     kwarg_parser, clone_attribute)
@@ -17,6 +18,7 @@ from .checks import (
     assert_correct_format, check_initialized)
 
 __all__ = ['IdTrain',
+           'FeatureStore',
            'check_inputs',
            'check_instances',
            'check_ensemble_build',
@@ -0,0 +1,222 @@
+"""ML-ENSEMBLE
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:licence: MIT
+
+Persistent store of ensemble-layer features. Out-of-fold predictions of a
+fitted ensemble are written to disk as memory-mapped arrays, keyed by the
+ensemble configuration and a fingerprint of the data, so that repeated model
+selection runs over the same base layers never refit the base learners.
+"""
+
+from __future__ import division, print_function
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+
+from .fingerprint import fingerprint
+
+# Parameters that do not affect predictions
+VOLATILE_PARAMS = ['verbose', 'n_jobs', 'backend', 'raise_on_exception',
+                   'threads', 'feature_store', 'keep_preds']
+
+# Names generated from global counters differ between otherwise equal
+# instances
+AUTO_NAME = re.compile(
+    r'^(group|pipeline|learner|transformer|sequential)-\d+$')
+
+
+def describe(obj):
+    """Full, deterministic description of an estimator's configuration.
+
+    Recursively describes the parameters of estimators, layers and
+    learners. Unlike ``repr``, the description is never truncated.
+    Parameters that do not affect predictions, such as ``verbose`` and
+    ``n_jobs``, and generated names are ignored.
+    """
+    if hasattr(obj, 'get_params') and not isinstance(obj, type):
+        params = obj.get_params(deep=False)
+        return '%s(%s)' % (obj.__class__.__name__, ', '.join(
+            '%s=%s' % (k, describe(v)) for k, v in sorted(params.items())
+            if k not in VOLATILE_PARAMS and not (
+                k == 'name' and AUTO_NAME.match(str(v)))))
+    if isinstance(obj, (list, tuple)):
+        return '[%s]' % ', '.join(describe(o) for o in obj)
+    if isinstance(obj, dict):
+        return '{%s}' % ', '.join(
+            '%r: %s' % (k, describe(v)) for k, v in sorted(obj.items()))
+    if isinstance(obj, np.ndarray):
+        return fingerprint(obj)
+    return repr(obj)
+
+
+class FeatureStore(object):
+
+    """Persistent store of memory-mapped feature matrices.
+
+    Stores the predictions of fitted ensembles on disk, keyed by the
+    ensemble configuration and a fingerprint of the input data. Stored
+    matrices are returned as read-only memory maps, so that processes that
+    read the same entry share one copy in the page cache.
+
+    Pass a store (or a path) as the ``feature_store`` of an ensemble in
+    model selection mode, or of an
+    :class:`~mlens.model_selection.EnsembleTransformer`. When the ensemble
+    is fitted on data it has already been fitted on with the same
+    configuration, it restores the training set predictions from the store
+    instead of fitting the base learners. Predictions on other data, i.e.
+    the test folds of an :class:`~mlens.model_selection.Evaluator`, are
+    stored too. Base learners are only fitted if predictions are
+    requested for data not in the store.
+
+    Entries are never invalidated. Clear the store if base learners are
+    not deterministic given their parameters, or if an estimator's
+    behavior changes without a change of parameters.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    path : str, optional
+        directory of the store. Created if it does not exist. Defaults to a
+        new temporary directory.
+
+    full : bool (default = False)
+        whether to key entries on a fingerprint of all input values. By
+        default, a fixed sample of row blocks is hashed (see
+        :func:`~mlens.utils.fingerprint.fingerprint`), so that lookups
+        read a bounded number of bytes, but inputs that differ only
+        between the sampled rows share entries.
+
+    Examples
+    --------
+    >>> from mlens.utils import FeatureStore
+    >>> store = FeatureStore('/tmp/mlens-features')
+    >>> ensemble = SuperLearner(model_selection=True, feature_store=store)
+    >>> evl.fit(X, y, estimators, param_dicts,
+    ...         preprocessing={'sl': [ensemble]})
+    """
+
+    def __init__(self, path=None, full=False):
+        if path is None:
+            path = tempfile.mkdtemp(prefix='.mlens_store_')
+        elif not os.path.exists(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                # Created by another process
+                if not os.path.isdir(path):
+                    raise
+        self.path = path
+        self.full = full
+
+    def __repr__(self):
+        return '%s(path=%r)' % (self.__class__.__name__, self.path)
+
+    def __contains__(self, key):
+        return os.path.exists(self._file(key, 'X'))
+
+    def __len__(self):
+        return len([f for f in os.listdir(self.path)
+                    if f.endswith('.X.npy')])
+
+    def key(self, *parts):
+        """Build an entry key.
+
+        Parameters
+        ----------
+        *parts : str, array-like or estimator
+            parts of the key. Arrays are fingerprinted, and estimators are
+            described by their configuration.
+
+        Returns
+        -------
+        key : str
+            hex digest of the parts.
+        """
+        h = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, str):
+                pass
+            elif part is None or hasattr(part, 'shape'):
+                part = fingerprint(part, full=self.full)
+            else:
+                part = describe(part)
+            h.update(part.encode())
+            h.update(b'|')
+        return h.hexdigest()
+
+    def _file(self, key, name):
+        """Path to a stored array"""
+        return os.path.join(self.path, '%s.%s.npy' % (key, name))
+
+    def load(self, key):
+        """Load an entry.
+
+        Parameters
+        ----------
+        key : str
+            entry key.
+
+        Returns
+        -------
+        entry : tuple, None
+            tuple ``(X, y)`` of memory-mapped arrays, or ``None`` if the
+            key is not in the store. ``y`` is ``None`` if no targets were
+            stored with the entry.
+        """
+        if key not in self:
+            return None
+        X = np.load(self._file(key, 'X'), mmap_mode='r')
+        y = None
+        if os.path.exists(self._file(key, 'y')):
+            y = np.load(self._file(key, 'y'), mmap_mode='r')
+        return X, y
+
+    def dump(self, key, X, y=None):
+        """Write an entry.
+
+        Arrays are written to temporary files and moved in place, so that
+        concurrent readers never see partial entries.
+
+        Parameters
+        ----------
+        key : str
+            entry key.
+
+        X : array-like
+            feature matrix to store.
+
+        y : array-like, optional
+            targets to store with the entry.
+        """
+        # y first: an entry exists once X is in place
+        for name, array in (('y', y), ('X', X)):
+            if array is None:
+                continue
+            f = self._file(key, name)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as out:
+                np.save(out, np.asarray(array))
+            os.rename(tmp, f)
+
+    def clear(self):
+        """Remove all entries"""
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+
+
+def check_feature_store(store):
+    """Return a :class:`FeatureStore` from a store, a path or None"""
+    if store is None or isinstance(store, FeatureStore):
+        return store
+    if isinstance(store, str):
+        return FeatureStore(store)
+    raise TypeError("feature_store must be a FeatureStore instance or a "
+                    "path. Got %r." % store)
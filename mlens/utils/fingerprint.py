@@ -0,0 +1,190 @@
+"""ML-ENSEMBLE
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:licence: MIT
+
+Fingerprints of input arrays. By default, the shape and dtype of an array
+and a fixed set of strided row blocks, the first and last included, are
+hashed with a fast non-cryptographic hash, so that fingerprinting reads a
+bounded number of bytes however large the array. A full fingerprint hashes
+all rows in blocks, so that large arrays and memmaps are read sequentially
+and never copied in full. Fingerprints of arrays that cannot change, i.e.
+read-only memmaps, are cached by file and modification time. Fingerprints
+identify the training set of a fitted ensemble and key the feature store.
+"""
+
+from __future__ import division, print_function
+
+import zlib
+
+import numpy as np
+from scipy.sparse import issparse
+
+from .validation import ValidationCache
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Bytes of rows to hash at a time
+FINGERPRINT_BLOCK_NBYTES = 2 ** 24
+
+# Number and bytes of row blocks to hash in a sampled fingerprint
+FINGERPRINT_SAMPLE_BLOCKS = 32
+FINGERPRINT_SAMPLE_NBYTES = 2 ** 16
+
+FINGERPRINT_CACHE = ValidationCache()
+
+
+class _BlockHash(object):
+
+    """Streaming 64 bit hash of byte blocks.
+
+    Uses ``xxhash`` if installed, and a pair of ``crc32`` and ``adler32``
+    checksums otherwise.
+    """
+
+    def __init__(self):
+        if xxhash is not None:
+            self._h = xxhash.xxh64()
+        else:
+            self._crc, self._adler = 0, 1
+
+    def update(self, block):
+        """Hash a block of bytes or an array"""
+        if isinstance(block, np.ndarray):
+            block = np.ascontiguousarray(block).view(np.uint8)
+        if xxhash is not None:
+            self._h.update(block)
+        else:
+            self._crc = zlib.crc32(block, self._crc)
+            self._adler = zlib.adler32(block, self._adler)
+
+    def hexdigest(self):
+        """Hex digest of blocks hashed so far"""
+        if xxhash is not None:
+            return self._h.hexdigest()
+        return '%08x%08x' % (self._crc & 0xffffffff, self._adler & 0xffffffff)
+
+
+def _block_rows(X, block_nbytes):
+    """Number of rows per block"""
+    row_nbytes = X.dtype.itemsize * max(1, int(np.prod(X.shape[1:])))
+    return max(1, block_nbytes // row_nbytes)
+
+
+def _hash_block(h, block):
+    """Hash a block of rows"""
+    if block.dtype == object:
+        h.update(repr(block.tolist()).encode())
+    else:
+        h.update(block)
+
+
+def _hash_rows(h, X, block_nbytes):
+    """Hash an array in blocks of rows"""
+    if X.ndim == 0:
+        X = X.reshape(1)
+    step = _block_rows(X, block_nbytes)
+    for i in range(0, X.shape[0], step):
+        _hash_block(h, X[i:i + step])
+
+
+def _sample_blocks(n, step):
+    """Slices of a fixed set of strided row blocks of n rows"""
+    if n <= FINGERPRINT_SAMPLE_BLOCKS * step:
+        return [slice(i, i + step) for i in range(0, n, step)]
+    starts = np.linspace(0, n - step, FINGERPRINT_SAMPLE_BLOCKS)
+    return [slice(i, i + step) for i in starts.astype(np.int64).tolist()]
+
+
+def _sample_rows(h, X, rows=None):
+    """Hash a fixed set of strided row blocks, the first and last included"""
+    if X.ndim == 0:
+        X = X.reshape(1)
+    step = _block_rows(X, FINGERPRINT_SAMPLE_NBYTES)
+    if isinstance(rows, np.ndarray):
+        # Index the sampled blocks only
+        for block in _sample_blocks(rows.shape[0], step):
+            _hash_block(h, X[rows[block]])
+        return
+    if rows is not None:
+        X = X[rows]
+    for block in _sample_blocks(X.shape[0], step):
+        _hash_block(h, X[block])
+
+
+def _hash_array(h, X, full, block_nbytes, rows=None):
+    """Hash all rows of an array, or a sample"""
+    if not full:
+        _sample_rows(h, X, rows)
+    else:
+        _hash_rows(h, X[rows] if rows is not None else X, block_nbytes)
+
+
+def fingerprint(X, block_nbytes=FINGERPRINT_BLOCK_NBYTES, memoize=True,
+                full=False):
+    """Fingerprint of an array.
+
+    The shape and dtype of the array are hashed together with a sample of
+    its rows, or, with ``full=True``, all of its data. A sample is a fixed
+    set of row blocks spread evenly over the array, the first and last
+    included, of about 2 MB in total. Arrays smaller than that are hashed
+    in full either way. The fingerprint does not depend on the memory
+    layout of the array.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    X : array-like, sparse matrix, columnar input, None
+        array to fingerprint.
+
+    block_nbytes : int (default = 2 ** 24)
+        bytes of rows to hash at a time with ``full=True``.
+
+    memoize : bool (default = True)
+        whether to cache the fingerprint of arrays that cannot change.
+
+    full : bool (default = False)
+        whether to hash all data. A sampled fingerprint does not tell
+        apart arrays that differ only in rows between the sampled blocks.
+
+    Returns
+    -------
+    fingerprint : str
+        hex digest of the array's shape, dtype and data.
+    """
+    if X is None:
+        return 'none'
+
+    cached = None
+    if memoize:
+        cached = FINGERPRINT_CACHE.get(X)
+        if cached is not None and full in cached:
+            return cached[full]
+
+    h = _BlockHash()
+    if issparse(X):
+        S = X.tocsr()
+        h.update(repr(('csr', S.shape, S.dtype.str)).encode())
+        for a in (S.data, S.indices, S.indptr):
+            _hash_array(h, a, full, block_nbytes)
+    elif getattr(X, '__columnar__', False):
+        h.update(repr(('columnar', X.shape, X.dtype.str)).encode())
+        for a in X.arrays:
+            _hash_array(h, a, full, block_nbytes, X.rows)
+    else:
+        A = np.asarray(X)
+        h.update(repr((A.shape, A.dtype.str)).encode())
+        _hash_array(h, A, full, block_nbytes)
+    out = h.hexdigest()
+
+    if memoize:
+        # Sampled and full fingerprints are cached side by side
+        cached = dict(cached) if cached is not None else dict()
+        cached[full] = out
+        FINGERPRINT_CACHE.set(X, cached)
+    return out
@@ -12,11 +12,10 @@ training data.
 
 from __future__ import division, print_function
 
-from ..utils.exceptions import NotFittedError
+from .exceptions import NotFittedError
+from .fingerprint import fingerprint
 from ..externals.sklearn.base import BaseEstimator
 
-from numpy import array_equal, ix_
-from numpy.random import permutation
 from numbers import Integral
 
 
@@ -24,48 +23,53 @@ class IdTrain(BaseEstimator):
 
     """Container to identify training set.
 
-    Samples a random subset from set passed to the `fit` method, to allow
-    identification of the training set in a `transform` or `predict` method.
+    Stores the shape and a fingerprint of the set passed to the `fit`
+    method, to allow identification of the training set in a `transform` or
+    `predict` method.
+
+    .. versionchanged:: 0.2.2
+        The training set is identified by a hash of strided blocks of rows,
+        or of all its values, instead of a random sample of size
+        ``[size, size]``. See :func:`~mlens.utils.fingerprint.fingerprint`.
+        Fingerprints of read-only memmaps are cached by file and
+        modification time.
 
     Parameters
     ----------
     size : int
-        size to sample. A random subset of size [size, size] will be stored
-        in the instance.
+        unused. Kept for backwards compatibility.
+
+    full : bool (default = False)
+        whether to hash all values of the training set. By default, a fixed
+        sample of row blocks is hashed, so that checks read a bounded
+        number of bytes.
+
+        .. versionadded:: 0.2.2
     """
 
-    def __init__(self, size=10):
+    def __init__(self, size=10, full=False):
 
         if not isinstance(size, Integral):
             raise ValueError("'size' must be an integer. Got %r" % size)
 
         self.size = size
+        self.full = full
 
     def fit(self, X):
-        """Sample a training set.
+        """Fingerprint a training set.
 
         Parameters
         ----------
         X: array-like
-            training set to sample observations from.
+            training set to fingerprint.
 
         Returns
         ----------
         self: obj
-            fitted instance with stored sample.
+            fitted instance with stored fingerprint.
         """
         self.train_shape = X.shape
-
-        sample_idx = {}
-        for i in range(2):
-            dim_size = min(X.shape[i], self.size)
-            sample_idx[i] = permutation(X.shape[i])[:dim_size]
-
-        sample = X[ix_(sample_idx[0], sample_idx[1])]
-
-        self.sample_idx_ = sample_idx
-        self.sample_ = sample
-
+        self.fingerprint_ = fingerprint(X, full=self.full)
         return self
 
     def is_train(self, X):
@@ -74,12 +78,12 @@ class IdTrain(BaseEstimator):
         Parameters
         ----------
         X: array-like
-            training set to sample observations from.
+            array to check.
 
         Returns
         ----------
-        self: obj
-            fitted instance with stored sample.
+        is_train: bool
+            whether ``X`` has the shape and fingerprint of the training set.
         """
         if not hasattr(self, "train_shape"):
             raise NotFittedError("This IdTrain instance is not fitted yet.")
@@ -87,18 +91,7 @@ class IdTrain(BaseEstimator):
         if not self._check_shape(X):
             return False
 
-        idx = self.sample_idx_
-
-        try:
-            # Grab sample from `X`
-            sample = X[ix_(idx[0], idx[1])]
-
-            return array_equal(sample, self.sample_)
-
-        except IndexError:
-            # If index is out of bounds, X.shape < training_set.shape
-            # -> X is not the training set
-            return False
+        return fingerprint(X, full=self.full) == self.fingerprint_
 
     def _check_shape(self, X):
         """Check if X has the shape as the training set."""
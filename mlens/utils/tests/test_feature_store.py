@@ -0,0 +1,81 @@
+"""ML-ENSEMBLE
+
+:author: Sebastian Flennerhag
+:copyright: 2017
+:licence: MIT
+"""
+
+from __future__ import division
+
+import numpy as np
+
+from mlens.utils import FeatureStore
+from mlens.utils.feature_store import fingerprint, describe
+from mlens.utils.dummy import OLS
+from mlens.ensemble import SuperLearner
+
+from sklearn.neighbors import KNeighborsRegressor
+
+X = np.arange(60, dtype=np.float64).reshape(20, 3)
+y = X.sum(axis=1)
+
+
+class CountingKNN(KNeighborsRegressor):
+
+    """KNN regressor counting calls to fit"""
+
+    n_fits = 0
+
+    def fit(self, X, y):
+        CountingKNN.n_fits += 1
+        return super(CountingKNN, self).fit(X, y)
+
+
+def test_fingerprint():
+    """[Utils] FeatureStore: test fingerprint."""
+    assert fingerprint(X) == fingerprint(X.copy())
+    assert fingerprint(X) != fingerprint(X.astype(np.float32))
+    assert fingerprint(X) != fingerprint(X.reshape(30, 2))
+    assert fingerprint(X) != fingerprint(X + 1)
+
+
+def test_describe():
+    """[Utils] FeatureStore: test describe ignores volatile params."""
+    a = SuperLearner(n_jobs=1, verbose=False).add([OLS()])
+    b = SuperLearner(n_jobs=2, verbose=True).add([OLS()])
+    c = SuperLearner().add([OLS(offset=1)])
+    assert describe(a) == describe(b)
+    assert describe(a) != describe(c)
+
+
+def test_dump_load():
+    """[Utils] FeatureStore: test dump and load."""
+    store = FeatureStore()
+    key = store.key('test', X)
+    assert store.load(key) is None
+
+    store.dump(key, X, y)
+    assert key in store
+    assert len(store) == 1
+
+    P, z = store.load(key)
+    assert isinstance(P, np.memmap)
+    np.testing.assert_array_equal(P, X)
+    np.testing.assert_array_equal(z, y)
+
+    store.clear()
+    assert len(store) == 0
+
+
+def test_ensemble_restore():
+    """[Utils] FeatureStore: test ensemble restores stored features."""
+    store = FeatureStore()
+    out = list()
+    for _ in range(2):
+        ens = SuperLearner(model_selection=True, feature_store=store)
+        ens.add([CountingKNN(n_neighbors=2), OLS()])
+        CountingKNN.n_fits = 0
+        ens.fit(X, y)
+        out.append(ens.transform(X, y)[0])
+    assert CountingKNN.n_fits == 0
+    np.testing.assert_array_equal(out[0], out[1])
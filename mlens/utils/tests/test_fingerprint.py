@@ -0,0 +1,94 @@
+"""ML-ENSEMBLE
+
+Test of array fingerprints.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from mlens.utils import IdTrain
+from mlens.utils.fingerprint import (fingerprint, FINGERPRINT_CACHE,
+                                     FINGERPRINT_SAMPLE_BLOCKS)
+from mlens.parallel.columnar import ColumnarInput
+
+X = np.random.RandomState(0).rand(50, 4)
+
+
+def test_fingerprint_blocks():
+    """[Utils] fingerprint: independent of blocks and memory layout."""
+    ref = fingerprint(X, memoize=False)
+    assert fingerprint(X, block_nbytes=40, memoize=False) == ref
+    assert fingerprint(X, block_nbytes=40, memoize=False, full=True) == ref
+    assert fingerprint(np.asfortranarray(X), memoize=False) == ref
+    assert fingerprint(np.array(X[::-1][::-1]), memoize=False) == ref
+
+    Z = X.copy()
+    Z[37, 2] += 1e-12
+    assert fingerprint(Z, block_nbytes=40, memoize=False) != ref
+
+    S = csr_matrix(X)
+    assert fingerprint(S) == fingerprint(S.tocsc())
+    assert fingerprint(S) != ref
+
+
+def test_fingerprint_sample():
+    """[Utils] fingerprint: samples strided row blocks of large arrays."""
+    # 2 ** 13 rows of 8 bytes per block
+    Z = np.arange(2 ** 13 * FINGERPRINT_SAMPLE_BLOCKS * 4, dtype=np.float64)
+    ref = fingerprint(Z, memoize=False)
+    full = fingerprint(Z, memoize=False, full=True)
+    assert ref != full
+
+    # Rows between sampled blocks are not hashed
+    W = Z.copy()
+    W[2 ** 13 + 1] = -1
+    assert fingerprint(W, memoize=False) == ref
+    assert fingerprint(W, memoize=False, full=True) != full
+
+    # First and last rows are
+    for i in [0, -1]:
+        W = Z.copy()
+        W[i] = -1
+        assert fingerprint(W, memoize=False) != ref
+
+    # Columnar views sample the rows of the view
+    C = ColumnarInput([Z, Z])
+    V = ColumnarInput([Z[::2], Z[::2]])
+    rows = np.arange(0, Z.shape[0], 2)
+    assert fingerprint(C[::2], memoize=False) == \
+        fingerprint(V, memoize=False)
+    assert fingerprint(C[rows], memoize=False) == \
+        fingerprint(V, memoize=False)
+
+
+def test_fingerprint_memmap():
+    """[Utils] fingerprint: cached for read-only memmaps."""
+    FINGERPRINT_CACHE.clear()
+    tmp = tempfile.mkdtemp()
+    try:
+        f = os.path.join(tmp, 'X.npy')
+        np.save(f, X)
+        M = np.load(f, mmap_mode='r')
+        assert fingerprint(M) == fingerprint(X)
+        assert fingerprint(M, full=True) == fingerprint(X, full=True)
+        assert len(FINGERPRINT_CACHE) == 1
+        assert fingerprint(M, full=True) == \
+            FINGERPRINT_CACHE.get(M)[True]
+        del M
+    finally:
+        FINGERPRINT_CACHE.clear()
+        shutil.rmtree(tmp)
+
+
+def test_id_train_near_duplicate():
+    """[Utils] IdTrain: near-duplicates are not the training set."""
+    id_train = IdTrain().fit(X)
+    assert id_train.is_train(X.copy())
+
+    Z = X.copy()
+    Z[11, 3] = 0
+    assert not id_train.is_train(Z)
+    assert not IdTrain(full=True).fit(X).is_train(Z)
@@ -7,11 +7,15 @@ import numpy as np
 from scipy.sparse import csr
 from mlens.utils.validation import _get_context, _check_all_finite, \
     check_all_finite, _check_sparse_format, check_inputs, \
-    _check_column_or_1d, soft_check_1d, soft_check_x_y, soft_check_array
+    _check_column_or_1d, soft_check_1d, soft_check_x_y, soft_check_array, \
+    VALIDATION_CACHE
 
 from mlens.utils.exceptions import InputDataWarning
 from mlens.utils.dummy import OLS
 
+import os
+import shutil
+import tempfile
 import warnings
 
 X = np.arange(12).reshape(6, 2)
@@ -97,6 +101,50 @@ def test_check_sparse_format_dtype():
     assert flags
 
 
+def test_check_all_finite_chunked():
+    """[Utils] check_all_finite: checks chunks in parallel."""
+    Z = np.random.rand(100, 3)
+    assert check_all_finite(Z, n_jobs=2, chunk_nbytes=48, memoize=False)
+    Z[97, 1] = np.nan
+    assert not check_all_finite(Z, n_jobs=2, chunk_nbytes=48, memoize=False)
+    assert not check_all_finite(Z, chunk_nbytes=48, memoize=False)
+
+
+def test_check_all_finite_memoize():
+    """[Utils] check_all_finite: memoizes read-only inputs."""
+    VALIDATION_CACHE.clear()
+    tmp = tempfile.mkdtemp()
+    try:
+        f = os.path.join(tmp, 'X.npy')
+        np.save(f, np.random.rand(10, 2))
+        Z = np.load(f, mmap_mode='r')
+        assert check_all_finite(Z) and len(VALIDATION_CACHE) == 1
+
+        # Views of the file are keyed by their geometry
+        assert check_all_finite(np.asarray(Z)[2:]) and check_all_finite(Z)
+        assert len(VALIDATION_CACHE) == 2
+
+        # Writeable inputs can change and are not memoized
+        W = np.random.rand(10, 2)
+        assert check_all_finite(W) and len(VALIDATION_CACHE) == 2
+        W.flags.writeable = False
+        assert check_all_finite(W) and len(VALIDATION_CACHE) == 3
+
+        # Stale results are not used
+        VALIDATION_CACHE.set(W, False)
+        assert not check_all_finite(W)
+        W = W.copy()
+        assert check_all_finite(W)
+        del Z
+
+        # Level 2 checks still raise on non-finite input
+        W[3, 1] = np.inf
+        np.testing.assert_raises(ValueError, check_inputs, W, np.arange(10), 2)
+    finally:
+        VALIDATION_CACHE.clear()
+        shutil.rmtree(tmp)
+
+
 def test_check_sparse_format_finite():
     """[Utils] _check_sparse_format: flags sparse X with inf or nan."""
     Z = X.astype('float')
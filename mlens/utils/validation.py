@@ -9,18 +9,30 @@ extends it to a soft check that issues warnings but don't force changes to the
 inputs.
 """
 
+import os
+import weakref
 import warnings
+import threading
+from collections import OrderedDict
 
 import numpy as np
 import scipy.sparse as sp
 
 from ..externals import six
+from ..externals.joblib import Parallel, delayed
+from ..externals.joblib.pool import has_shareable_memory, reduce_memmap
 from mlens.externals.sklearn.validation import check_X_y, _num_samples, \
     _shape_repr, check_array, check_consistent_length
 from ..utils.exceptions import InputDataWarning, NonBLASDotWarning
 
 FLOAT_DTYPES = (np.float64, np.float32, np.float16)
 
+# Bytes per chunk of finiteness checks
+CHECK_CHUNK_NBYTES = 2 ** 26
+
+# Number of memoized finiteness checks
+VALIDATION_CACHE_SIZE = 256
+
 # Silenced by default to reduce verbosity. Turn on at runtime for
 # performance profiling.
 warnings.simplefilter('ignore', NonBLASDotWarning)
@@ -246,9 +258,145 @@ def _check_all_finite(X):
                       'scipy sparse array. Details:\n%r' % e, InputDataWarning)
 
 
-def check_all_finite(X):
-    """Return False if X contains NaN or infinity."""
-    return _check_all_finite(X.data if sp.issparse(X) else X)
+def _version_key(X):
+    """Key identifying the content of an array, or None if it can change.
+
+    Read-only memmaps are identified by file, modification time and the
+    geometry of the view. In-memory arrays are identified by object
+    identity if neither the array nor any array it views is writeable.
+    """
+    if not isinstance(X, np.ndarray):
+        return None
+
+    if has_shareable_memory(X):
+        _, args = reduce_memmap(X)
+        filename, dtype, mode, offset, order, shape, strides = args[:7]
+        if mode != 'r':
+            return None
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return ('file', os.path.abspath(filename), stat.st_mtime,
+                stat.st_size, np.dtype(dtype).str, offset, order, shape,
+                strides)
+
+    base = X
+    while isinstance(base, np.ndarray):
+        if base.flags.writeable:
+            return None
+        base = base.base
+    return 'id', id(X), X.dtype.str, X.shape, X.strides
+
+
+class ValidationCache(object):
+
+    """Memoized results of input checks.
+
+    Results are kept for arrays whose content cannot change without
+    changing the key of the array, see :func:`_version_key`.
+
+    .. versionadded:: 0.2.2
+
+    Parameters
+    ----------
+    max_entries : int (default = 256)
+        number of results to keep.
+    """
+
+    def __init__(self, max_entries=VALIDATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, X):
+        """Memoized result for X, or None"""
+        key = _version_key(X)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            ref, result = entry
+            if key[0] == 'id' and ref() is not X:
+                # Identity was reused by another array
+                del self._entries[key]
+                return None
+            return result
+
+    def set(self, X, result):
+        """Memoize the result for X"""
+        key = _version_key(X)
+        if key is None:
+            return
+        ref = weakref.ref(X) if key[0] == 'id' else None
+        with self._lock:
+            self._entries[key] = (ref, result)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all results"""
+        with self._lock:
+            self._entries = OrderedDict()
+
+
+VALIDATION_CACHE = ValidationCache()
+
+
+def check_all_finite(X, n_jobs=1, chunk_nbytes=CHECK_CHUNK_NBYTES,
+                     memoize=True):
+    """Return False if X contains NaN or infinity.
+
+    Large arrays are checked in chunks of rows, in parallel threads if
+    ``n_jobs`` is not 1. Results for arrays that cannot change are memoized,
+    so that repeated calls on the same input, i.e. a read-only memmap, skip
+    the check.
+
+    .. versionchanged:: 0.2.2
+       Added ``n_jobs``, ``chunk_nbytes`` and ``memoize``.
+
+    Parameters
+    ----------
+    X : array-like, sparse matrix
+        array to check.
+
+    n_jobs : int (default = 1)
+        number of threads to check chunks with. ``-1`` uses all cores.
+
+    chunk_nbytes : int (default = 2 ** 26)
+        bytes per chunk.
+
+    memoize : bool (default = True)
+        whether to use and store memoized results.
+    """
+    X = X.data if sp.issparse(X) else X
+    if not hasattr(X, 'dtype') or \
+            X.dtype.char not in np.typecodes['AllFloat']:
+        return _check_all_finite(X)
+
+    if memoize:
+        result = VALIDATION_CACHE.get(X)
+        if result is not None:
+            return result
+
+    n = X.shape[0] if X.ndim else 1
+    step = max(1, int(chunk_nbytes // max(X.nbytes // max(n, 1), 1)))
+    chunks = [X[i:i + step] for i in range(0, n, step)] if X.ndim else [X]
+    if n_jobs == 1 or len(chunks) == 1:
+        result = all(_check_all_finite(c) for c in chunks)
+    else:
+        # Reductions release the GIL
+        result = all(Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(_check_all_finite)(c) for c in chunks))
+
+    if memoize:
+        VALIDATION_CACHE.set(X, result)
+    return result
 
 
 def _check_sparse_format(spmatrix, accept_sparse=True, dtype=None,
@@ -484,13 +632,13 @@ def _check_column_or_1d(y, context=""):
     return CHANGE
 
 
-def _check_x_y(X, y):
+def _check_x_y(X, y, force_all_finite=True):
     """Wrapper for our default arguments - relax some Scikit-learn defaults."""
     return check_X_y(X, y,
                      accept_sparse=['csr', 'csc'],  # Accept sparse csr, csc
                      order=None,             # Make no C or Fortran imposition
                      copy=False,             # Do not trigger copying
-                     force_all_finite=True,  # Raise error on np.inf or np.nan
+                     force_all_finite=force_all_finite,  # Check np.inf, np.nan
                      ensure_2d=True,         # Force 'X' do be a matrix
                      allow_nd=True,          # Allow 'X.ndim' > 2
                      multi_output=True,      # Allow 'y.shape[1]' > 1
@@ -498,20 +646,20 @@ def _check_x_y(X, y):
                      )
 
 
-def _check_array(X):
+def _check_array(X, force_all_finite=True):
     """Wrapper for our default arguments - relax some Scikit-learn defaults."""
     return check_array(X,
                        accept_sparse=['csr', 'csc'],  # Accept sparse csr, csc
                        order=None,  # Do not enforce C or Fortran
                        copy=False,  # Do not trigger copying
-                       force_all_finite=True,  # Raise error on np.inf/np.nan
+                       force_all_finite=force_all_finite,  # np.inf/np.nan
                        ensure_2d=True,  # Force 'X' do be a matrix
                        allow_nd=True,  # Allow 'X.ndim' > 2
                        warn_on_dtype=False  # Mute as 'dtype' is 'None'
                        )
 
 
-def check_inputs(X, y=None, check_level=0):
+def check_inputs(X, y=None, check_level=0, n_jobs=1):
     r"""Pre-checks on input arrays X and y.
 
     Checks input data according to ``check_level`` to ensure format is roughly
@@ -521,8 +669,10 @@ def check_inputs(X, y=None, check_level=0):
 
     Parameters
     ----------
-    X : nd-array, list or sparse matrix
-        Input data.
+    X : nd-array, list, sparse matrix or columnar input
+        Input data. Columnar inputs (see
+        :class:`~mlens.parallel.columnar.ColumnarInput`) are checked
+        column by column and never converted.
 
     y : nd-array, list or sparse matrix
         Labels.
@@ -539,6 +689,12 @@ def check_inputs(X, y=None, check_level=0):
               which converts ``X`` and ``y`` to numpy arrays and raises error
               if conversion fails.
 
+    n_jobs : int (default = 1)
+        number of threads to check ``X`` for NaN and infinite values with.
+        See :func:`check_all_finite`.
+
+        .. versionadded:: 0.2.2
+
     Returns
     ---------
     FAIL : fail flag, optional
@@ -553,14 +709,27 @@ def check_inputs(X, y=None, check_level=0):
     random_state : object, optional
         numpy RandomState object.
     """
+    if getattr(X, '__columnar__', False):
+        if check_level == 2:
+            X.check()
+            if y is not None:
+                y = check_array(y, 'csr', ensure_2d=False, dtype=None)
+                check_consistent_length(X, y)
+        return X, y
+
     if check_level == 1:
         soft_check_x_y(X, y)
 
     if check_level == 2:
 
         if y is None:
-            X = _check_array(X)
+            X = _check_array(X, force_all_finite=False)
         else:
-            X, y = _check_x_y(X, y)
+            X, y = _check_x_y(X, y, force_all_finite=False)
+
+        # Chunked, parallel and memoized
+        if not check_all_finite(X, n_jobs=n_jobs):
+            raise ValueError("Input contains NaN, infinity"
+                             " or a value too large for %r." % X.dtype)
 
     return X, y
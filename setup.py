@@ -27,6 +27,7 @@ setup(name='mlens',
       include_package_data=True,
       install_requires=['numpy>=1.11',
                         'scipy>=0.17'],
+      extras_require={'threads': ['threadpoolctl']},
       license='MIT',
       platforms='any',
       classifiers=['License :: OSI Approved :: MIT License',